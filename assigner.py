@@ -0,0 +1,313 @@
+"""
+Asignación de canciones a usuarios según la capacidad de cada carril
+(antes: canción i → usuario i % len(users), aunque ese usuario no pudiera)
+
+Cada canción ya renderizada va al usuario disponible con menos playlists
+asignadas, así el reparto final sigue siendo parejo. Un carril no está
+disponible si:
+- no tiene token vigente (falló la renovación o expiró)
+- Spotify lo tiene en pausa por un 429 (Retry-After todavía corriendo)
+- ya tiene todas sus playlists simultáneas en curso (con muchos errores
+  recientes baja a una a la vez)
+- acumuló varios errores seguidos: descansa un rato antes de volver a probar
+- llegó a su cupo diario de playlists (outputs/user_quota.json, se cuenta
+  entre corridas del mismo día)
+
+Una cuenta rota o frenada ya no se lleva su parte: las demás la absorben, y
+una canción cuya playlist no se pudo crear se reintenta con otro usuario
+Al reanudar, una playlist ya creada se termina con el usuario que la creó
+
+Cupo diario: `--daily-quota N` para todos o "daily_quota" en users.json
+"""
+import asyncio
+import collections
+import json
+import os
+import time
+from datetime import date
+
+from cache import file_lock
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUOTA_PATH = os.path.join(base_dir, "./outputs/user_quota.json")
+
+# Últimos resultados por usuario que se miran para la tasa de error
+ERROR_WINDOW = 20
+# Por encima de esta tasa el carril baja a una playlist a la vez
+MAX_ERROR_RATE = 0.5
+
+# Errores seguidos que mandan a descansar al carril (el descanso se duplica
+# si vuelve a fallar apenas regresa)
+ERROR_STREAK = 5
+COOLDOWN = 30.0
+MAX_COOLDOWN = 600.0
+
+# Sin carril disponible se vuelve a mirar cada tanto: las pausas y los
+# descansos vencen solos, sin que nadie avise
+POLL_INTERVAL = 0.5
+
+# Motivos por los que un carril no toma canciones
+NO_TOKEN = 'sin token'
+RATE_LIMITED = 'rate limit'
+RESTING = 'descansando'
+QUOTA = 'cupo diario'
+FULL = 'lleno'
+
+# Motivos que no se arreglan esperando (en esta corrida)
+PERMANENT = {NO_TOKEN, QUOTA}
+
+
+class NoLaneAvailable(Exception):
+    """Ningún usuario puede tomar la canción (y esperar no lo va a arreglar)"""
+
+
+def user_quotas(users, default=None):
+    """{user_id: cupo diario o None} desde users.json ("daily_quota") o el default"""
+    return {
+        user['user_id']: user.get('daily_quota') or default or None
+        for user in users
+    }
+
+
+class QuotaLedger:
+    """
+    Playlists creadas hoy por usuario, guardadas en un JSON chico:
+        {"date": "2024-06-10", "created": {"user1": 40, ...}}
+    Al cambiar el día se empieza de cero
+    """
+    def __init__(self, path=DEFAULT_QUOTA_PATH):
+        self.path = path
+        self.day = date.today().isoformat()
+        self.created = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get('date') == self.day:
+                self.created = data.get('created', {})
+
+    def _roll(self):
+        today = date.today().isoformat()
+        if today != self.day:
+            self.day = today
+            self.created = {}
+
+    def used(self, user_id):
+        self._roll()
+        return self.created.get(user_id, 0)
+
+    def add(self, user_id):
+        self._roll()
+        self.created[user_id] = self.created.get(user_id, 0) + 1
+
+    def save(self):
+        """
+        Guarda los conteos propios sin pisar los de otros usuarios: con
+        --shards cada proceso tiene su grupo de usuarios y todos usan el
+        mismo archivo (el lock evita que dos procesos mezclen a la vez y el
+        último pise lo que guardó el otro)
+        """
+        if not self.path:
+            return
+        with file_lock(self.path):
+            created = dict(self.created)
+            other = QuotaLedger(self.path)
+            if other.day == self.day:
+                created = {**other.created, **created}
+            tmp_path = f"{self.path}.tmp{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'date': self.day, 'created': created}, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class Lane:
+    """Estado de un usuario durante la corrida"""
+    __slots__ = ('user_id', 'quota', 'in_flight', 'reserved', 'assigned',
+                 'recent', 'streak', 'cooldown', 'resting_until', 'rests')
+
+    def __init__(self, user_id, quota=None):
+        self.user_id = user_id
+        self.quota = quota
+        self.in_flight = 0          # canciones escribiéndose ahora
+        self.reserved = 0           # de esas, las que crean una playlist nueva
+        self.assigned = 0           # total asignado en la corrida (incluye retomadas)
+        self.recent = collections.deque(maxlen=ERROR_WINDOW)   # 1 = error
+        self.streak = 0
+        self.cooldown = COOLDOWN
+        self.resting_until = 0.0
+        self.rests = 0
+
+    @property
+    def error_rate(self):
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+
+class UserAssigner:
+    """
+    Reparte las canciones entre los carriles de escritura (uno por usuario)
+
+        user_id = await assigner.acquire(owner, new_playlist=True)
+        ...escribir...
+        await assigner.release(user_id, ok, created)
+    """
+    def __init__(self, token_manager, scheduler, user_ids, in_flight,
+                 quotas=None, ledger=None, events=None):
+        quotas = quotas or {}
+        self.token_manager = token_manager
+        self.scheduler = scheduler
+        self.in_flight = in_flight
+        self.ledger = ledger if ledger is not None else QuotaLedger(path=None)
+        self.events = events
+        self.lanes = {user_id: Lane(user_id, quotas.get(user_id)) for user_id in user_ids}
+        self.condition = asyncio.Condition()
+        self.stats = {'waits': 0, 'rests': 0}
+
+    # ===== ESTADO DE LOS CARRILES =====
+
+    def has_lane(self, user_id):
+        return user_id in self.lanes
+
+    def unavailable(self, lane, new_playlist=True, now=None):
+        """Motivo por el que el carril no puede tomar una canción ahora (None si puede)"""
+        now = now or time.monotonic()
+        if not self.token_manager.is_valid(lane.user_id):
+            return NO_TOKEN
+        if new_playlist and lane.quota is not None:
+            if self.ledger.used(lane.user_id) + lane.reserved >= lane.quota:
+                return QUOTA
+        if lane.resting_until > now:
+            return RESTING
+        if self.scheduler.backoff_remaining(self.token_manager.current_token(lane.user_id)) > 0:
+            return RATE_LIMITED
+        capacity = self.in_flight if lane.error_rate <= MAX_ERROR_RATE else 1
+        if lane.in_flight >= capacity:
+            return FULL
+        return None
+
+    def blocked(self):
+        """
+        {user_id: motivo} si ningún carril puede crear una playlist ahora,
+        None si alguno puede (o solo está lleno: se libera al terminar)
+        """
+        now = time.monotonic()
+        reasons = {lane.user_id: self.unavailable(lane, True, now) for lane in self.lanes.values()}
+        if any(reason in (None, FULL) for reason in reasons.values()):
+            return None
+        return reasons
+
+    def _pick(self, owner, new_playlist, exclude=()):
+        """Carril elegido, o el dict {user_id: motivo} si no hay ninguno"""
+        lanes = [self.lanes[owner]] if owner in self.lanes else self.lanes.values()
+        now = time.monotonic()
+        best, reasons = None, {}
+        for lane in lanes:
+            if lane.user_id in exclude:
+                continue
+            reason = self.unavailable(lane, new_playlist, now)
+            if reason:
+                reasons[lane.user_id] = reason
+                continue
+            # El que menos lleva primero: el reparto final queda parejo
+            if best is None or ((lane.assigned, lane.error_rate, lane.in_flight)
+                                < (best.assigned, best.error_rate, best.in_flight)):
+                best = lane
+        return best or reasons
+
+    def count_existing(self, user_id):
+        """Una canción que ya estaba completa cuenta para el reparto de su usuario"""
+        lane = self.lanes.get(user_id)
+        if lane is not None:
+            lane.assigned += 1
+
+    def reader(self):
+        """Usuario con token vigente para lecturas (top tracks): el menos frenado"""
+        valid = [
+            (self.scheduler.backoff_remaining(self.token_manager.current_token(user_id)), user_id)
+            for user_id in self.lanes if self.token_manager.is_valid(user_id)
+        ]
+        if not valid:
+            raise NoLaneAvailable("Ningún usuario tiene token vigente")
+        return min(valid)[1]
+
+    # ===== ASIGNACIÓN =====
+
+    async def acquire(self, owner=None, new_playlist=True, exclude=()):
+        """
+        Espera a que algún carril tenga lugar y lo reserva
+        owner: la canción solo puede ir a ese usuario (playlist ya creada)
+        exclude: usuarios que ya fallaron con esta canción
+        Lanza NoLaneAvailable si ningún carril posible va a liberarse
+        """
+        waited = False
+        async with self.condition:
+            while True:
+                picked = self._pick(owner, new_playlist, exclude)
+                if isinstance(picked, Lane):
+                    break
+                if not picked:
+                    raise NoLaneAvailable("Ningún otro usuario puede tomar la canción")
+                if all(reason in PERMANENT for reason in picked.values()):
+                    detail = ", ".join(f"{user_id}: {reason}" for user_id, reason in picked.items())
+                    raise NoLaneAvailable(f"Ningún usuario disponible ({detail})")
+                if not waited:
+                    waited = True
+                    self.stats['waits'] += 1
+                try:
+                    await asyncio.wait_for(self.condition.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+            picked.in_flight += 1
+            picked.assigned += 1
+            if new_playlist:
+                picked.reserved += 1
+            return picked.user_id
+
+    async def release(self, user_id, ok, new_playlist=True, created=False):
+        """Libera el lugar; ok/created alimentan la tasa de error y el cupo diario"""
+        async with self.condition:
+            lane = self.lanes[user_id]
+            lane.in_flight -= 1
+            if new_playlist:
+                lane.reserved -= 1
+            if created:
+                self.ledger.add(user_id)
+            lane.recent.append(0 if ok else 1)
+
+            if ok:
+                lane.streak = 0
+                lane.cooldown = COOLDOWN
+            else:
+                lane.streak += 1
+                if lane.streak >= ERROR_STREAK:
+                    self._rest(lane)
+            self.condition.notify_all()
+
+    def _rest(self, lane):
+        lane.resting_until = time.monotonic() + lane.cooldown
+        lane.rests += 1
+        self.stats['rests'] += 1
+        if self.events is not None:
+            self.events.warning(
+                'lane_rest',
+                f"   😴 {lane.user_id}: {lane.streak} errores seguidos, descansa {lane.cooldown:.0f}s",
+                user_id=lane.user_id, streak=lane.streak, seconds=lane.cooldown,
+                error_rate=round(lane.error_rate, 3)
+            )
+        lane.streak = 0
+        lane.cooldown = min(MAX_COOLDOWN, lane.cooldown * 2)
+
+    def summary(self):
+        """Por usuario: asignadas, tasa de error reciente, descansos y cupo usado"""
+        return {
+            user_id: {
+                'assigned': lane.assigned,
+                'error_rate': round(lane.error_rate, 3),
+                'rests': lane.rests,
+                'quota': lane.quota,
+                'used_today': self.ledger.used(user_id),
+            }
+            for user_id, lane in self.lanes.items()
+        }
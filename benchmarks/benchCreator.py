@@ -0,0 +1,257 @@
+"""
+Benchmark de create_playlists_circular_distribution contra el servidor local
+(benchmarks/mockServer.py): no crea playlists reales ni usa cuentas reales
+
+    python benchmarks/benchCreator.py --sizes 100 1000 10000 100000
+    python benchmarks/benchCreator.py --sizes 1000 --latency-ms 50 --rate-429 0.05
+    python benchmarks/benchCreator.py --sizes 1000 --throttled-users benchuser0 --failing-users benchuser1
+    python benchmarks/benchCreator.py --sizes 1000 --rerun
+
+--rerun corre todo otra vez con un journal nuevo (como si se hubiera perdido)
+y muestra cuánto cuesta: las playlists ya existen en el mock y no se crean de nuevo
+
+Reporta playlists/seg, latencia p50/p99 por tipo de llamada y RSS máximo
+Cada tamaño corre en su propio proceso para que el RSS sea comparable
+"""
+import argparse
+import collections
+import contextlib
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(base_dir, "..")
+sys.path.insert(0, root_dir)
+
+# (método, patrón de ruta) → nombre de la llamada
+ENDPOINTS = [
+    ('POST', re.compile(r'/api/token$'), 'get_access_token'),
+    ('GET', re.compile(r'/v1/me/playlists'), 'get_user_playlists'),
+    ('GET', re.compile(r'/v1/playlists/[^/]+/tracks'), 'get_playlist_tracks'),
+    ('POST', re.compile(r'/v1/users/[^/]+/playlists$'), 'create_playlist'),
+    ('POST', re.compile(r'/v1/playlists/[^/]+/tracks$'), 'add_tracks_to_playlist'),
+    ('PUT', re.compile(r'/v1/playlists/[^/]+/images$'), 'upload_playlist_image'),
+    ('GET', re.compile(r'/v1/artists/[^/]+/top-tracks'), 'get_artist_top_tracks'),
+    ('GET', re.compile(r'/v1/search'), 'search_tracks'),
+    ('GET', re.compile(r'/v1/tracks\?'), 'get_tracks'),
+    ('GET', re.compile(r'/v1/artists\?'), 'get_artists'),
+    ('GET', re.compile(r'/images/'), 'download_image'),
+    ('GET', re.compile(r'/(search|api/search|songs|lyrics)'), 'genius'),
+]
+
+
+def classify(method, url):
+    for endpoint_method, pattern, name in ENDPOINTS:
+        if method == endpoint_method and pattern.search(url):
+            return name
+    return 'other'
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def synthetic_catalog(size, root):
+    """Catálogo con la forma de Dragons_data.json: pocos artistas, portadas compartidas"""
+    artists = max(1, size // 20)
+    covers = max(1, size // 10)
+    songs = []
+    for i in range(size):
+        artist_idx = i % artists
+        songs.append({
+            'song': f"Bench Song {i}",
+            'artist': f"Bench Artist {artist_idx}",
+            'uri': f"spotify:track:bench{i:017d}",
+            'image_url': f"{root}/images/cover{i % covers}.jpg",
+            'artist_uri': f"spotify:artist:bench{artist_idx:016d}",
+            'artist_id': f"bench{artist_idx:016d}",
+        })
+    return songs
+
+
+def run_single(args):
+    """Corre una sola medición (en un proceso propio) e imprime el resultado en JSON"""
+    from creator import SpotifyPlaylistCreator, create_playlists_circular_distribution
+    from transport import HttpTransport
+    from cache import LyricsCache, TopTracksCache
+    from images import CoverImageCache
+
+    latencies = collections.defaultdict(list)
+    latencies_lock = threading.Lock()
+
+    def record(response, *a, **kw):
+        name = classify(response.request.method, response.url)
+        with latencies_lock:
+            latencies[name].append(response.elapsed.total_seconds() * 1000)
+
+    class TimedTransport(HttpTransport):
+        """Transporte que registra la latencia de cada respuesta"""
+        def configure_session(self, session):
+            session.hooks['response'].append(record)
+            return super().configure_session(session)
+
+    root = f"http://127.0.0.1:{args.port}"
+    tmp = tempfile.mkdtemp(prefix='bench_creator_')
+    songs = synthetic_catalog(args.single, root)
+    users = [
+        {'user_id': f"benchuser{i}", 'refresh_token': f"bench-refresh-{i}"}
+        for i in range(args.users)
+    ]
+
+    cache_path = os.path.join(tmp, 'cache.sqlite')
+    creator = SpotifyPlaylistCreator(
+        'bench-client', 'bench-secret', 'bench-genius',
+        transport=TimedTransport(pool_size=max(32, args.users * args.in_flight * 2)),
+        lyrics_cache=LyricsCache(path=cache_path),
+        top_tracks_cache=TopTracksCache(path=cache_path),
+        covers=CoverImageCache(covers_dir=os.path.join(tmp, 'covers')),
+        base_url=f"{root}/v1",
+        accounts_url=root,
+        genius_root=root
+    )
+
+    def measure(journal_name):
+        latencies.clear()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            stats = create_playlists_circular_distribution(
+                in_flight_per_user=args.in_flight,
+                songs=songs,
+                user_list=users,
+                creator=creator,
+                log_path=os.path.join(tmp, 'creation_log.txt'),
+                journal_path=os.path.join(tmp, journal_name),
+                token_cache_path=os.path.join(tmp, 'token_cache.bin'),
+                metrics_path=os.path.join(tmp, 'metrics.json'),
+                quota_path=os.path.join(tmp, 'user_quota.json')
+            )
+            return stats, time.perf_counter() - start
+
+    stats, elapsed = measure('progress_journal.jsonl')
+    if args.rerun:
+        # Mismo catálogo, journal nuevo: todo debería salir del listado de playlists
+        stats, elapsed = measure('progress_journal.rerun.jsonl')
+
+    result = {
+        'songs': args.single,
+        'seconds': elapsed,
+        'playlists': stats['total_playlists'],
+        'errors': stats['total_errors'],
+        'existing': stats['total_existing'],
+        'playlists_per_sec': stats['total_playlists'] / elapsed if elapsed else 0.0,
+        'per_user': stats['playlists_por_usuario'],
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'calls': {
+            name: {
+                'count': len(values),
+                'p50_ms': percentile(values, 50),
+                'p99_ms': percentile(values, 99),
+            }
+            for name, values in sorted(latencies.items())
+        }
+    }
+    print(json.dumps(result))
+
+
+def wait_for_server(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def reset_server(port):
+    """Borra las playlists que el mock guardó (ver mockServer.py /reset)"""
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/reset", method='POST')
+    urllib.request.urlopen(request, timeout=5).close()
+
+
+def print_report(result):
+    print(f"\n📦 {result['songs']} canciones → {result['playlists']} playlists "
+          f"({result['errors']} errores) en {result['seconds']:.1f}s")
+    if result['existing']:
+        print(f"   🔁 {result['existing']} ya existían (no se crearon de nuevo)")
+    print(f"   🚀 {result['playlists_per_sec']:.1f} playlists/seg   "
+          f"🧠 RSS máximo: {result['peak_rss_mb']:.0f} MB")
+    print(f"   {'llamada':<26}{'n':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, call in result['calls'].items():
+        print(f"   {name:<26}{call['count']:>9}{call['p50_ms']:>10.1f}{call['p99_ms']:>10.1f}")
+    print("   por usuario: " + ", ".join(f"{user_id} {count}" for user_id, count in result['per_user'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del creador contra el mock local")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--users', type=int, default=6)
+    parser.add_argument('--in-flight', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttled-users', nargs='*', default=[],
+                        help="Usuarios a los que el mock responde siempre 429 al crear playlists")
+    parser.add_argument('--failing-users', nargs='*', default=[],
+                        help="Usuarios a los que el mock responde siempre 403 al crear playlists")
+    parser.add_argument('--rerun', action='store_true',
+                        help="Mide una segunda corrida sobre el mismo catálogo (journal nuevo)")
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args)
+        return
+
+    server = subprocess.Popen([
+        sys.executable, os.path.join(base_dir, 'mockServer.py'),
+        '--port', str(args.port),
+        '--latency-ms', str(args.latency_ms),
+        '--rate-429', str(args.rate_429),
+        '--error-rate', str(args.error_rate),
+        '--throttled-users', *args.throttled_users,
+        '--failing-users', *args.failing_users,
+    ])
+    try:
+        if not wait_for_server(args.port):
+            print("❌ El servidor local no arrancó")
+            sys.exit(1)
+
+        print("="*70)
+        print(f"🧪 BENCHMARK - {args.users} usuarios, {args.in_flight} playlists simultáneas por usuario")
+        print(f"   Latencia {args.latency_ms} ms, 429: {args.rate_429:.0%}, errores: {args.error_rate:.0%}")
+        print("="*70)
+
+        for size in args.sizes:
+            # Cada medición empieza sin playlists de la anterior
+            reset_server(args.port)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--single', str(size),
+                 '--port', str(args.port), '--users', str(args.users),
+                 '--in-flight', str(args.in_flight), *(['--rerun'] if args.rerun else [])],
+                capture_output=True, text=True
+            )
+            if output.returncode != 0:
+                print(f"\n❌ Falló la medición con {size} canciones:\n{output.stderr}")
+                continue
+            print_report(json.loads(output.stdout.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
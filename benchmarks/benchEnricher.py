@@ -0,0 +1,92 @@
+"""
+Enriquecimiento del catálogo contra el servidor local (benchmarks/mockServer.py)
+
+    python benchmarks/benchEnricher.py --songs 10000 --latency-ms 50
+
+Completa un catálogo sintético sin artist_id/portada/popularidad usando
+/tracks?ids= y /artists?ids= y cuenta las llamadas que recibió el servidor
+(≈ canciones / 50), comparándolas con una llamada por canción
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(base_dir, "..")
+sys.path.insert(0, root_dir)
+
+from benchCreator import wait_for_server
+
+
+def server_requests(port):
+    """Llamadas a /tracks y /artists que recibió el servidor"""
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as response:
+        by_endpoint = json.load(response)['by_endpoint']
+    return by_endpoint.get('several_tracks', 0) + by_endpoint.get('several_artists', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del enricher contra el mock local")
+    parser.add_argument('--songs', type=int, default=10_000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--port', type=int, default=8902)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    args = parser.parse_args()
+
+    from cache import LyricsCache, TopTracksCache
+    from catalog import Catalog
+    from creator import SpotifyPlaylistCreator
+    from enricher import CatalogEnricher
+
+    server = subprocess.Popen([
+        sys.executable, os.path.join(base_dir, 'mockServer.py'),
+        '--port', str(args.port),
+        '--latency-ms', str(args.latency_ms),
+        '--rate-429', str(args.rate_429),
+    ])
+    try:
+        if not wait_for_server(args.port):
+            print("❌ El servidor local no arrancó")
+            sys.exit(1)
+
+        root = f"http://127.0.0.1:{args.port}"
+        tmp = tempfile.mkdtemp(prefix='bench_enricher_')
+        cache_path = os.path.join(tmp, 'cache.sqlite')
+        creator = SpotifyPlaylistCreator(
+            'bench-client', 'bench-secret', 'bench-genius',
+            lyrics_cache=LyricsCache(path=cache_path),
+            top_tracks_cache=TopTracksCache(path=cache_path),
+            base_url=f"{root}/v1", accounts_url=root, genius_root=root
+        )
+        catalog = Catalog.from_records(
+            {'song': f"Bench Song {i}", 'artist': f"Bench Artist {i % 50}",
+             'uri': f"spotify:track:bench{i:017d}", 'source': "openSp", 'rank': i + 1}
+            for i in range(args.songs)
+        )
+
+        print(f"🧪 {args.songs} canciones, {args.workers} llamadas simultáneas, "
+              f"latencia {args.latency_ms} ms")
+        for run in ("Catálogo incompleto", "Catálogo completo"):
+            enricher = CatalogEnricher(creator, max_workers=args.workers)
+            before = server_requests(args.port)
+            start = time.perf_counter()
+            enricher.enrich(catalog)
+            elapsed = time.perf_counter() - start
+            calls = server_requests(args.port) - before
+
+            print(f"   {run:<22}{elapsed:8.2f} s   ✅ {enricher.stats['enriched']} filas   "
+                  f"🌐 {calls} llamadas (vs {args.songs} de a una)")
+        creator.transport.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Ingesta de muchos archivos: secuencial vs pool de procesos
+
+    python benchmarks/benchIngest.py --files 24 --items 20000
+
+Genera páginas sintéticas con la forma de chartsJson/openSp*.json y mide
+getSongList/ingest.py con 1 proceso y con uno por núcleo (o --workers),
+verificando que el catálogo resultante sea idéntico
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(base_dir, "..", "getSongList"))
+
+from ingest import ingest
+from benchStreamReader import write_dump
+
+
+def timed_ingest(sources, workers):
+    start = time.perf_counter()
+    catalog = ingest(sources, workers=workers)
+    return catalog, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta secuencial vs paralela")
+    parser.add_argument('--files', type=int, default=24)
+    parser.add_argument('--items', type=int, default=20_000, help="Items por archivo")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for i in range(args.files):
+            path = os.path.join(tmp, f"openSp{i + 1}.json")
+            write_dump(path, args.items)
+            sources.append(("openSp", path))
+        size_mb = sum(os.path.getsize(path) for _, path in sources) / 1024 / 1024
+        print(f"🧪 {args.files} archivos × {args.items} items ({size_mb:.0f} MB)")
+
+        serial, serial_seconds = timed_ingest(sources, 1)
+        parallel, parallel_seconds = timed_ingest(sources, args.workers)
+
+        if serial.columns != parallel.columns:
+            print("❌ El catálogo paralelo no coincide con el secuencial")
+            sys.exit(1)
+
+        print(f"   {'1 proceso':<14}{serial_seconds:8.2f} s")
+        print(f"   {f'{args.workers} procesos':<14}{parallel_seconds:8.2f} s")
+        print(f"   ✅ Mismo catálogo ({len(parallel)} filas), "
+              f"{serial_seconds / parallel_seconds:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Memoria por canción: lista de dicts (antes) vs Track con __slots__ (ahora)
+
+    python benchmarks/benchMemory.py --songs 1000000
+
+Genera un Dragons_data.json sintético (pocos artistas y portadas repetidas,
+como en los charts) y mide con tracemalloc lo que queda en memoria después
+de cargarlo de cada forma:
+- json.load               lista de dicts (como se cargaba antes)
+- json.load + Track       object_hook=Track.from_dict (creator.load_songs)
+- catálogo columnar       Catalog.load + tracks() (outputs/catalog.json)
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(base_dir, ".."))
+
+from catalog import Catalog, Track
+
+
+def synthetic_records(size):
+    artists = max(1, size // 20)
+    for i in range(size):
+        artist_idx = i % artists
+        yield {
+            "song": f"Bench Song {i}",
+            "artist": f"Bench Artist {artist_idx}",
+            "uri": f"spotify:track:bench{i:017d}",
+            "image_url": f"https://i.scdn.co/image/ab67616d0000b273{i % (size // 10 or 1):024d}",
+            "artist_uri": f"spotify:artist:bench{artist_idx:016d}",
+            "artist_id": f"bench{artist_idx:016d}",
+        }
+
+
+def measure(load):
+    """Memoria retenida (bytes) y pico durante la carga"""
+    gc.collect()
+    tracemalloc.start()
+    songs = load()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(songs), current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria por canción: dicts vs Track")
+    parser.add_argument('--songs', type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'Dragons_data.json')
+        catalog_path = os.path.join(tmp, 'catalog.json')
+        records = list(synthetic_records(args.songs))
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+        Catalog.from_records(records).save(catalog_path)
+        del records
+
+        def load_dicts():
+            with open(json_path, encoding='utf-8') as f:
+                return json.load(f)
+
+        def load_tracks():
+            with open(json_path, encoding='utf-8') as f:
+                return json.load(f, object_hook=Track.from_dict)
+
+        def load_catalog():
+            return Catalog.load(catalog_path).tracks()
+
+        print(f"🧪 {args.songs} canciones")
+        print(f"   {'carga':<24}{'bytes/canción':>15}{'total MB':>10}{'pico MB':>10}")
+        baseline = None
+        for name, load in [
+            ("json.load (dicts)", load_dicts),
+            ("json.load + Track", load_tracks),
+            ("catálogo → Track", load_catalog),
+        ]:
+            count, current, peak = measure(load)
+            per_song = current / count
+            baseline = baseline or per_song
+            print(f"   {name:<24}{per_song:>15.0f}{current / 2**20:>10.1f}{peak / 2**20:>10.1f}"
+                  f"   ({baseline / per_song:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Resolución YouTube → Spotify contra el servidor local (benchmarks/mockServer.py)
+
+    python benchmarks/benchResolver.py --songs 500 --latency-ms 50
+
+Resuelve dos veces el mismo chart sintético con un caché vacío: la primera
+vez hace una búsqueda por canción (en paralelo), la segunda todo sale del
+caché y no hay ninguna llamada a la API
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(base_dir, "..")
+sys.path.insert(0, root_dir)
+
+from benchCreator import wait_for_server
+
+
+def synthetic_chart(size):
+    """Filas con la forma de chartsYt: sin URI, con invitados en el título"""
+    return [
+        {
+            'song': f"Bench Song {i}" + (" (feat. Guest)" if i % 5 == 0 else ""),
+            'artist': f"Bench Artist {i % 50}" + (" & Other" if i % 3 == 0 else ""),
+            'uri': "",
+            'artist_id': None,
+            'image_url': None,
+            'source': "chartsYt",
+            'rank': i + 1,
+        }
+        for i in range(size)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del resolver contra el mock local")
+    parser.add_argument('--songs', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    args = parser.parse_args()
+
+    from cache import LyricsCache, SearchCache, TopTracksCache
+    from catalog import Catalog
+    from creator import SpotifyPlaylistCreator
+    from resolver import SpotifyResolver, resolve_catalog
+
+    server = subprocess.Popen([
+        sys.executable, os.path.join(base_dir, 'mockServer.py'),
+        '--port', str(args.port),
+        '--latency-ms', str(args.latency_ms),
+        '--rate-429', str(args.rate_429),
+    ])
+    try:
+        if not wait_for_server(args.port):
+            print("❌ El servidor local no arrancó")
+            sys.exit(1)
+
+        root = f"http://127.0.0.1:{args.port}"
+        tmp = tempfile.mkdtemp(prefix='bench_resolver_')
+        cache_path = os.path.join(tmp, 'cache.sqlite')
+        creator = SpotifyPlaylistCreator(
+            'bench-client', 'bench-secret', 'bench-genius',
+            lyrics_cache=LyricsCache(path=cache_path),
+            top_tracks_cache=TopTracksCache(path=cache_path),
+            base_url=f"{root}/v1", accounts_url=root, genius_root=root
+        )
+        rows = synthetic_chart(args.songs)
+
+        print(f"🧪 {args.songs} canciones, {args.workers} búsquedas simultáneas, "
+              f"latencia {args.latency_ms} ms")
+        for run in ("Caché vacío", "Caché lleno"):
+            search_cache = SearchCache(path=cache_path)
+            resolver = SpotifyResolver(creator, search_cache=search_cache, max_workers=args.workers)
+            catalog = Catalog.from_records(dict(row) for row in rows)
+
+            start = time.perf_counter()
+            catalog, _ = resolve_catalog(catalog, resolver)
+            elapsed = time.perf_counter() - start
+
+            print(f"   {run:<14}{elapsed:8.2f} s   "
+                  f"✅ {resolver.stats['resolved']} resueltas   "
+                  f"⚠️ {resolver.stats['unresolved']} sin coincidencia   "
+                  f"🌐 {search_cache.stats['fetches']} búsquedas")
+            search_cache.close()
+        creator.transport.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark del modo por procesos (creator.py run --shards N) contra el
+servidor local (benchmarks/mockServer.py)
+
+    python benchmarks/benchShards.py --songs 5000 --users 60 --shards 1 2 4 8
+
+Misma corrida con distinta cantidad de procesos: con muchos usuarios el
+trabajo de CPU de un solo proceso pasa a ser el límite y más procesos
+deberían dar más playlists/seg (hasta la cantidad de núcleos)
+"""
+import argparse
+import contextlib
+import functools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(base_dir, ".."))
+sys.path.insert(0, base_dir)
+
+from benchCreator import synthetic_catalog, wait_for_server, reset_server
+
+
+def bench_creator(root, tmp, shard, users, options):
+    """Creador de cada worker apuntando al servidor local"""
+    from creator import SpotifyPlaylistCreator
+    from transport import HttpTransport
+    from cache import LyricsCache, TopTracksCache
+    from images import CoverImageCache
+    from events import EventLog
+
+    cache_path = os.path.join(tmp, 'cache.sqlite')
+    return SpotifyPlaylistCreator(
+        'bench-client', 'bench-secret', 'bench-genius',
+        transport=HttpTransport(pool_size=max(32, len(users) * options['in_flight_per_user'] * 2)),
+        lyrics_cache=LyricsCache(path=cache_path),
+        top_tracks_cache=TopTracksCache(path=cache_path),
+        covers=CoverImageCache(covers_dir=os.path.join(tmp, 'covers'), max_workers=1),
+        events=EventLog(None, console=None),
+        base_url=f"{root}/v1",
+        accounts_url=root,
+        genius_root=root
+    )
+
+
+def run(shards, args):
+    from shards import run_sharded
+
+    root = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory(prefix='bench_shards_') as tmp:
+        songs = synthetic_catalog(args.songs, root)
+        users = [
+            {'user_id': f"benchuser{i}", 'refresh_token': f"bench-refresh-{i}"}
+            for i in range(args.users)
+        ]
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            stats = run_sharded(
+                shards,
+                in_flight_per_user=args.in_flight,
+                songs=songs,
+                user_list=users,
+                log_path=os.path.join(tmp, 'creation_log.txt'),
+                journal_path=os.path.join(tmp, 'progress_journal.jsonl'),
+                token_cache_path=os.path.join(tmp, 'token_cache.bin'),
+                metrics_path=os.path.join(tmp, 'metrics.json'),
+                events_path='',
+                quota_path=os.path.join(tmp, 'user_quota.json'),
+                factory=functools.partial(bench_creator, root, tmp)
+            )
+            elapsed = time.perf_counter() - start
+    return stats, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de --shards contra el mock local")
+    parser.add_argument('--songs', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=60)
+    parser.add_argument('--in-flight', type=int, default=3)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    server = subprocess.Popen([
+        sys.executable, os.path.join(base_dir, 'mockServer.py'),
+        '--port', str(args.port),
+        '--latency-ms', str(args.latency_ms),
+    ])
+    try:
+        if not wait_for_server(args.port):
+            print("❌ El servidor local no arrancó")
+            sys.exit(1)
+
+        print(f"🧪 {args.songs} canciones, {args.users} usuarios, {os.cpu_count()} núcleos")
+        print(f"   {'procesos':<10}{'playlists':>10}{'errores':>9}{'seg':>8}{'playlists/seg':>15}")
+        baseline = None
+        for shards in args.shards:
+            reset_server(args.port)
+            stats, elapsed = run(shards, args)
+            rate = stats['total_playlists'] / elapsed if elapsed else 0.0
+            baseline = baseline or rate
+            print(f"   {shards:<10}{stats['total_playlists']:>10}{stats['total_errors']:>9}"
+                  f"{elapsed:>8.1f}{rate:>15.1f}   ({rate / baseline if baseline else 0:.1f}x)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Tiempo de arranque de creator.py
+
+    python benchmarks/benchStartup.py --runs 10
+
+Mide (en procesos nuevos, mediana de varias corridas) cuánto tarda:
+- `import creator` (no debería leer archivos ni importar lyricsgenius/requests)
+- `creator.py --help`
+- `creator.py stats`
+y muestra los módulos que más tardan en importarse (python -X importtime)
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.abspath(os.path.join(base_dir, ".."))
+creator_path = os.path.join(root_dir, "creator.py")
+
+COMMANDS = [
+    ('python (vacío)', [sys.executable, '-c', 'pass']),
+    ('import creator', [sys.executable, '-c', 'import creator']),
+    ('creator.py --help', [sys.executable, creator_path, '--help']),
+    ('creator.py stats', [sys.executable, creator_path, 'stats']),
+]
+
+# Módulos pesados que no deberían cargarse al importar creator
+HEAVY_MODULES = ['lyricsgenius', 'requests', 'httpx', 'PIL', 'cryptography']
+
+
+def timed_run(command):
+    start = time.perf_counter()
+    subprocess.run(command, cwd=root_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def import_times():
+    """(módulo, µs acumulados) de `import creator` según -X importtime"""
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import creator'],
+        cwd=root_dir, capture_output=True, text=True
+    ).stderr
+    times = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        times.append((module.strip(), int(cumulative)))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de creator.py")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"🧪 Arranque de creator.py (mediana de {args.runs} corridas)")
+    for name, command in COMMANDS:
+        runs = [timed_run(command) for _ in range(args.runs)]
+        print(f"   {name:<22}{statistics.median(runs):8.1f} ms")
+
+    times = import_times()
+    loaded = {module for module, _ in times}
+    heavy = [module for module in HEAVY_MODULES if module in loaded]
+    if heavy:
+        print(f"   ⚠️ `import creator` carga módulos pesados: {', '.join(heavy)}")
+    else:
+        print(f"   ✅ `import creator` no carga {', '.join(HEAVY_MODULES)}")
+
+    print(f"\n📦 Imports más lentos:")
+    for module, cumulative in sorted(times, key=lambda t: -t[1])[:args.top]:
+        print(f"   {module:<30}{cumulative / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Memoria y tiempo: json.load vs getSongList/streamReader.py
+
+    python benchmarks/benchStreamReader.py --items 200000
+
+Genera un export sintético con la forma de chartsJson/openSp*.json
+(data.playlistV2.content.items) y compara el pico de memoria (tracemalloc)
+y el tiempo de recorrer todos los items con cada método
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(base_dir, "..", "getSongList"))
+
+from streamReader import iter_items
+
+ITEMS_PATH = ["data", "playlistV2", "content", "items"]
+
+
+def synthetic_item(i):
+    return {
+        "itemV2": {"data": {
+            "name": f"Canción {i}",
+            "uri": f"spotify:track:bench{i:017d}",
+            "artists": {"items": [{
+                "uri": f"spotify:artist:bench{i % 500:016d}",
+                "profile": {"name": f"Artista {i % 500}"}
+            }]},
+            "albumOfTrack": {"coverArt": {"sources": [
+                {"url": f"https://i.scdn.co/image/{i:040x}", "width": width, "height": width}
+                for width in (64, 300, 640)
+            ]}}
+        }}
+    }
+
+
+def write_dump(path, items):
+    """Escribe el JSON de a un item para no necesitar la lista en memoria"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"data": {"playlistV2": {"content": {"totalCount": %d, "items": [' % items)
+        for i in range(items):
+            if i:
+                f.write(", ")
+            f.write(json.dumps(synthetic_item(i), ensure_ascii=False))
+        f.write("]}}}}")
+
+
+def with_json_load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return sum(1 for item in data["data"]["playlistV2"]["content"]["items"] if item["itemV2"]["data"]["name"])
+
+
+def with_stream(path):
+    return sum(1 for item in iter_items(path, ITEMS_PATH) if item["itemV2"]["data"]["name"])
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="json.load vs lector incremental")
+    parser.add_argument('--items', type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "openSpBench.json")
+        write_dump(path, args.items)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"🧪 {args.items} items ({size_mb:.0f} MB)")
+
+        results = {}
+        for name, fn in (('json.load', with_json_load), ('streamReader', with_stream)):
+            count, elapsed, peak_mb = measure(fn, path)
+            results[name] = count
+            print(f"   {name:<14}{elapsed:8.2f} s   pico {peak_mb:8.1f} MB")
+
+        if len(set(results.values())) != 1:
+            print(f"❌ Cantidades distintas: {results}")
+            sys.exit(1)
+        print(f"   ✅ Mismos {count} items")
+
+
+if __name__ == "__main__":
+    main()
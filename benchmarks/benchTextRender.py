@@ -0,0 +1,140 @@
+"""
+Microbenchmark del render de títulos y descripciones
+
+    python benchmarks/benchTextRender.py --songs 100000
+
+Compara textrender.render_catalog contra la implementación anterior
+(copiada abajo tal cual estaba en creator.py) y verifica que ambas
+produzcan exactamente el mismo texto
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(base_dir, ".."))
+
+from catalog import Track
+from textrender import render_catalog
+
+
+# ===== IMPLEMENTACIÓN ANTERIOR (referencia) =====
+
+def legacy_clean_text_for_spotify(text):
+    import re
+    text = text.encode('ascii', 'ignore').decode('ascii')
+    text = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_create_playlist_title(song_name, artist_name, lyrics_preview):
+    import re
+    song_name = legacy_clean_text_for_spotify(song_name)
+    artist_name = legacy_clean_text_for_spotify(artist_name)
+    base_title = f"{song_name} {artist_name}"
+    if len(base_title) >= 100:
+        return base_title[:97] + "..."
+    if not lyrics_preview:
+        return base_title
+    lyrics_preview = lyrics_preview.replace('\n', ' ')
+    lyrics_preview = lyrics_preview.replace('\r', ' ')
+    lyrics_preview = re.sub(r'\s+', ' ', lyrics_preview)
+    lyrics_preview = legacy_clean_text_for_spotify(lyrics_preview)
+    available_space = 100 - len(base_title) - 3
+    if available_space > 10:
+        if len(lyrics_preview) <= available_space:
+            return f"{base_title}  {lyrics_preview}"
+        else:
+            truncated = lyrics_preview[:available_space-3]
+            last_space = truncated.rfind(' ')
+            if last_space > 10:
+                truncated = truncated[:last_space]
+            return f"{base_title}  {truncated}..."
+    return base_title
+
+
+def legacy_create_playlist_description(lyrics):
+    if not lyrics:
+        return "Letra no disponible."
+    import re
+    lyrics = lyrics.replace('\n', ' ')
+    lyrics = lyrics.replace('\r', ' ')
+    lyrics = re.sub(r'\s+', ' ', lyrics)
+    lyrics = legacy_clean_text_for_spotify(lyrics)
+    if len(lyrics) <= 300:
+        return lyrics.strip()
+    else:
+        truncated = lyrics[:297]
+        last_space = truncated.rfind(' ')
+        if last_space > 280:
+            truncated = truncated[:last_space]
+        return truncated.strip() + "..."
+
+
+def legacy_render(songs, lyrics):
+    titles = [
+        legacy_create_playlist_title(song['song'], song['artist'], song_lyrics)
+        for song, song_lyrics in zip(songs, lyrics)
+    ]
+    descriptions = [legacy_create_playlist_description(song_lyrics) for song_lyrics in lyrics]
+    return titles, descriptions
+
+
+# ===== DATOS SINTÉTICOS =====
+
+WORDS = ['love', 'noche', 'corazón', 'fire', 'stars', 'llueve', 'light', 'sueño',
+         'road', 'home', '❤️', 'ñandú', 'Ooh-ooh', '(yeah)', 'niña', 'déjà vu']
+
+
+def synthetic_catalog(size, seed=7):
+    rng = random.Random(seed)
+    songs, lyrics = [], []
+    for i in range(size):
+        songs.append(Track(
+            f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+            f"Artista {rng.choice(WORDS)} {i % 500}",
+        ))
+        if rng.random() < 0.1:
+            lyrics.append(None)
+            continue
+        lines = [
+            ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 9)))
+            for _ in range(rng.randint(20, 60))
+        ]
+        lyrics.append('\n'.join(lines).replace('\n\n', '\r\n\t'))
+    return songs, lyrics
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de textrender")
+    parser.add_argument('--songs', type=int, default=100_000)
+    args = parser.parse_args()
+
+    songs, lyrics = synthetic_catalog(args.songs)
+    print(f"🧪 Render de {len(songs)} canciones")
+
+    legacy, legacy_seconds = timed(legacy_render, songs, lyrics)
+    new, new_seconds = timed(render_catalog, songs, lyrics)
+
+    if legacy != new:
+        mismatches = sum(a != b for a, b in zip(legacy[0] + legacy[1], new[0] + new[1]))
+        print(f"❌ Resultados distintos en {mismatches} textos")
+        sys.exit(1)
+
+    for name, seconds in (('anterior', legacy_seconds), ('textrender', new_seconds)):
+        per_song_us = seconds / len(songs) * 1e6
+        print(f"   {name:<12} {seconds:8.2f} s   {per_song_us:8.1f} µs/canción")
+    print(f"   ✅ Mismo resultado, {legacy_seconds / new_seconds:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
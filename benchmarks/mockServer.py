@@ -0,0 +1,463 @@
+"""
+Servidor local que imita las APIs de Spotify y Genius que usan creator.py
+y main.py, para medir rendimiento sin tocar cuentas reales
+
+Latencia, 429 y errores 5xx son configurables:
+    python benchmarks/mockServer.py --port 8900 --latency-ms 30 --rate-429 0.02
+
+También se puede frenar o romper a usuarios puntuales (crear playlist
+responde siempre 429 o 403 para ellos):
+    python benchmarks/mockServer.py --throttled-users benchuser0 --failing-users benchuser1
+
+Endpoints:
+    POST /api/token                     (accounts.spotify.com)
+    GET  /v1/me
+    GET  /v1/me/playlists               (offset/limit, hasta 50)
+    POST /v1/users/{id}/playlists
+    GET  /v1/playlists/{id}/tracks      (offset/limit)
+    POST /v1/playlists/{id}/tracks
+    PUT  /v1/playlists/{id}/images
+    GET  /v1/artists/{id}/top-tracks
+    GET  /v1/tracks?ids=, /v1/artists?ids=  (hasta 50 ids)
+    GET  /v1/search                     (type=track, q='track:"..." artist:"..."')
+    GET  /search, /api/search/song      (Genius: API y API pública)
+    GET  /songs/{id}                    (Genius)
+    GET  /lyrics/{id}                   (Genius: página HTML con la letra)
+    GET  /images/{name}                 (portadas tipo i.scdn.co)
+    GET  /stats                         (contadores del servidor)
+    POST /reset                         (borra las playlists creadas)
+
+Las playlists creadas se guardan en memoria (nombre, descripción, dueño y canciones)
+para que GET /me/playlists devuelva lo que ya hizo una corrida anterior
+"""
+import argparse
+import asyncio
+import hashlib
+import html
+import itertools
+import random
+import re
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse
+import uvicorn
+
+app = FastAPI()
+
+settings = {
+    'latency_ms': 20.0,
+    'jitter_ms': 10.0,
+    'rate_429': 0.0,
+    'retry_after': 1,
+    'error_rate': 0.0,
+    'lyrics_missing_rate': 0.1,
+    'search_missing_rate': 0.05,
+    'throttled_users': set(),
+    'failing_users': set(),
+}
+
+counters = {'requests': 0, 'throttled': 0, 'errors': 0, 'by_endpoint': {}}
+playlist_ids = itertools.count(1)
+
+# Playlists creadas: id → {'name', 'description', 'owner', 'tracks': [uri, ...]}
+playlists = {}
+# access token → refresh token, y refresh token → usuario (se aprende al
+# crear la primera playlist): así /me/playlists sabe de quién es el token
+token_seeds = {}
+seed_users = {}
+
+# JPEG mínimo (solo cabecera + relleno): suficiente para el pipeline de portadas
+FAKE_JPEG = b'\xff\xd8\xff\xe0' + bytes(20_000) + b'\xff\xd9'
+
+
+async def simulate(endpoint):
+    """
+    Aplica la latencia configurada y decide si la petición falla
+    Retorna una respuesta de error (429/500) o None si debe seguir normal
+    """
+    counters['requests'] += 1
+    counters['by_endpoint'][endpoint] = counters['by_endpoint'].get(endpoint, 0) + 1
+
+    latency = settings['latency_ms'] + random.uniform(-1, 1) * settings['jitter_ms']
+    await asyncio.sleep(max(0.0, latency) / 1000)
+
+    if random.random() < settings['rate_429']:
+        counters['throttled'] += 1
+        return JSONResponse(
+            {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+            status_code=429,
+            headers={'Retry-After': str(settings['retry_after'])}
+        )
+    if random.random() < settings['error_rate']:
+        counters['errors'] += 1
+        return JSONResponse({'error': {'status': 500, 'message': 'Server error'}}, status_code=500)
+    return None
+
+
+def bearer(request):
+    return request.headers.get('authorization', '').removeprefix('Bearer ')
+
+
+def fake_id(*parts):
+    """ID estilo Spotify (22 caracteres) determinístico"""
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:22]
+
+
+# ===== SPOTIFY =====
+
+@app.post("/api/token")
+async def token(request: Request):
+    error = await simulate('token')
+    if error:
+        return error
+    form = await request.form()
+    seed = form.get('refresh_token') or form.get('code') or 'anon'
+    access_token = f"mock-{fake_id(seed, str(random.random()))}"
+    token_seeds[access_token] = seed
+    return {
+        'access_token': access_token,
+        'token_type': 'Bearer',
+        'expires_in': 3600,
+        'refresh_token': form.get('refresh_token') or f"refresh-{fake_id(seed)}",
+        'scope': 'playlist-modify-public playlist-modify-private ugc-image-upload'
+    }
+
+
+@app.get("/v1/me")
+async def me(request: Request):
+    error = await simulate('me')
+    if error:
+        return error
+    user_id = fake_id(request.headers.get('authorization', ''))
+    return {'id': user_id, 'display_name': f"Mock {user_id[:6]}", 'email': f"{user_id}@mock.local"}
+
+
+@app.post("/v1/users/{user_id}/playlists", status_code=201)
+async def create_playlist(user_id: str, request: Request):
+    error = await simulate('create_playlist')
+    if error:
+        return error
+    if user_id in settings['throttled_users']:
+        counters['throttled'] += 1
+        return JSONResponse(
+            {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+            status_code=429,
+            headers={'Retry-After': str(settings['retry_after'])}
+        )
+    if user_id in settings['failing_users']:
+        counters['errors'] += 1
+        return JSONResponse({'error': {'status': 403, 'message': 'Forbidden'}}, status_code=403)
+    body = await request.json()
+    playlist_id = f"pl{next(playlist_ids):020d}"
+    playlists[playlist_id] = {
+        'name': body.get('name'), 'description': body.get('description'), 'owner': user_id, 'tracks': []
+    }
+    seed = token_seeds.get(bearer(request))
+    if seed:
+        seed_users[seed] = user_id
+    return JSONResponse({
+        'id': playlist_id,
+        'name': body.get('name'),
+        'description': body.get('description'),
+        'owner': {'id': user_id},
+        'external_urls': {'spotify': f"https://open.spotify.com/playlist/{playlist_id}"}
+    }, status_code=201)
+
+
+@app.get("/v1/me/playlists")
+async def my_playlists(request: Request, offset: int = 0, limit: int = 20):
+    error = await simulate('my_playlists')
+    if error:
+        return error
+    if limit > 50:
+        return JSONResponse({'error': {'status': 400, 'message': 'Invalid limit'}}, status_code=400)
+    user_id = seed_users.get(token_seeds.get(bearer(request)))
+    owned = [
+        (playlist_id, playlist) for playlist_id, playlist in playlists.items()
+        if user_id and playlist['owner'] == user_id
+    ]
+    return {
+        'items': [
+            {
+                'id': playlist_id,
+                'name': playlist['name'],
+                # Como Spotify: la descripción viene con entidades HTML
+                'description': html.escape(playlist['description'] or ''),
+                'owner': {'id': playlist['owner']},
+                'external_urls': {'spotify': f"https://open.spotify.com/playlist/{playlist_id}"},
+                'tracks': {'total': len(playlist['tracks'])},
+            }
+            for playlist_id, playlist in owned[offset:offset + limit]
+        ],
+        'total': len(owned),
+        'offset': offset,
+        'limit': limit,
+    }
+
+
+@app.get("/v1/playlists/{playlist_id}/tracks")
+async def playlist_tracks(playlist_id: str, offset: int = 0, limit: int = 100):
+    error = await simulate('playlist_tracks')
+    if error:
+        return error
+    if playlist_id not in playlists:
+        return JSONResponse({'error': {'status': 404, 'message': 'Not found'}}, status_code=404)
+    tracks = playlists[playlist_id]['tracks']
+    return {'items': [{'track': {'uri': uri}} for uri in tracks[offset:offset + limit]], 'total': len(tracks)}
+
+
+@app.post("/v1/playlists/{playlist_id}/tracks")
+async def add_tracks(playlist_id: str, request: Request):
+    error = await simulate('add_tracks')
+    if error:
+        return error
+    body = await request.json()
+    if playlist_id in playlists:
+        playlists[playlist_id]['tracks'].extend(body.get('uris', []))
+    return JSONResponse({'snapshot_id': fake_id(playlist_id)}, status_code=201)
+
+
+@app.put("/v1/playlists/{playlist_id}/images")
+async def upload_image(playlist_id: str, request: Request):
+    error = await simulate('upload_image')
+    if error:
+        return error
+    body = await request.body()
+    if len(body) > 256 * 1024:
+        return JSONResponse({'error': {'status': 413, 'message': 'Payload too large'}}, status_code=413)
+    return Response(status_code=202)
+
+
+@app.get("/v1/artists/{artist_id}/top-tracks")
+async def top_tracks(artist_id: str, market: str = "US"):
+    error = await simulate('top_tracks')
+    if error:
+        return error
+    tracks = []
+    for i in range(10):
+        track_id = fake_id(artist_id, market, str(i))
+        tracks.append({'id': track_id, 'uri': f"spotify:track:{track_id}", 'name': f"Top {i + 1}"})
+    return {'tracks': tracks}
+
+
+SEARCH_FIELD = re.compile(r'(track|artist):"([^"]*)"')
+
+
+def fake_track(name, artist):
+    track_id = fake_id(name, artist)
+    artist_id = fake_id(artist)
+    root = settings.get('root', '')
+    return {
+        'id': track_id,
+        'uri': f"spotify:track:{track_id}",
+        'name': name,
+        'artists': [{'id': artist_id, 'uri': f"spotify:artist:{artist_id}", 'name': artist}],
+        'album': {'images': [{'url': f"{root}/images/{track_id}.jpg", 'width': 640, 'height': 640}]},
+    }
+
+
+def several_ids(ids):
+    """ids=a,b,c → lista, o respuesta 400 si son más de 50 (como Spotify)"""
+    ids = [i for i in ids.split(',') if i]
+    if not ids or len(ids) > 50:
+        return None, JSONResponse(
+            {'error': {'status': 400, 'message': 'Invalid ids (1 to 50)'}}, status_code=400
+        )
+    return ids, None
+
+
+@app.get("/v1/tracks")
+async def several_tracks(ids: str = "", market: str = None):
+    error = await simulate('several_tracks')
+    if error:
+        return error
+    ids, error = several_ids(ids)
+    if error:
+        return error
+    root = settings.get('root', '')
+    tracks = []
+    for track_id in ids:
+        if track_id.startswith('missing'):
+            tracks.append(None)
+            continue
+        # Pocos artistas por canción, determinísticos según el id
+        artist_id = fake_id('artist', track_id[-3:])
+        tracks.append({
+            'id': track_id,
+            'uri': f"spotify:track:{track_id}",
+            'name': f"Track {track_id}",
+            'popularity': int(fake_id('popularity', track_id), 16) % 101,
+            'artists': [{'id': artist_id, 'uri': f"spotify:artist:{artist_id}", 'name': f"Artist {artist_id}"}],
+            'album': {'images': [{'url': f"{root}/images/{track_id}.jpg", 'width': 640, 'height': 640}]},
+        })
+    return {'tracks': tracks}
+
+
+@app.get("/v1/artists")
+async def several_artists(ids: str = ""):
+    error = await simulate('several_artists')
+    if error:
+        return error
+    ids, error = several_ids(ids)
+    if error:
+        return error
+    root = settings.get('root', '')
+    return {'artists': [
+        {
+            'id': artist_id,
+            'uri': f"spotify:artist:{artist_id}",
+            'name': f"Artist {artist_id}",
+            'popularity': int(fake_id('popularity', artist_id), 16) % 101,
+            'images': [{'url': f"{root}/images/{artist_id}.jpg", 'width': 640, 'height': 640}],
+        }
+        for artist_id in ids
+    ]}
+
+
+@app.get("/v1/search")
+async def search(q: str = "", type: str = "track", limit: int = 20):
+    error = await simulate('search')
+    if error:
+        return error
+    fields = dict(SEARCH_FIELD.findall(q))
+    name, artist = fields.get('track', q), fields.get('artist', 'Unknown')
+    items = []
+    if random.random() >= settings['search_missing_rate']:
+        # El resultado correcto más versiones parecidas (como Spotify)
+        items = [
+            fake_track(name, artist),
+            fake_track(f"{name} - Live", artist),
+            fake_track(name, f"{artist} Tribute Band"),
+            fake_track(f"{name} (Remix)", f"DJ {artist}"),
+        ][:limit]
+    return {'tracks': {'items': items, 'total': len(items), 'limit': limit, 'offset': 0}}
+
+
+@app.get("/images/{name}")
+async def image(name: str):
+    error = await simulate('image')
+    if error:
+        return error
+    return Response(FAKE_JPEG, media_type='image/jpeg')
+
+
+# ===== GENIUS =====
+
+def genius_song(query):
+    song_id = int(hashlib.sha1(query.encode()).hexdigest()[:8], 16)
+    root = settings.get('root', '')
+    return {
+        'id': song_id,
+        '_type': 'song',
+        'title': query,
+        'full_title': query,
+        'lyrics_state': 'complete',
+        'primary_artist': {'name': query.split(' ')[-1] if query else ''},
+        'url': f"{root}/lyrics/{song_id}",
+        'path': f"/lyrics/{song_id}",
+    }
+
+
+def genius_hits(q):
+    if random.random() < settings['lyrics_missing_rate']:
+        return []
+    return [{'type': 'song', 'index': 'song', 'result': genius_song(q)}]
+
+
+@app.get("/search")
+async def genius_search(q: str = ""):
+    error = await simulate('genius_search')
+    if error:
+        return error
+    return {'meta': {'status': 200}, 'response': {'hits': genius_hits(q)}}
+
+
+@app.get("/api/search/{type_}")
+async def genius_public_search(type_: str, q: str = ""):
+    error = await simulate('genius_search')
+    if error:
+        return error
+    hits = genius_hits(q)
+    return {
+        'meta': {'status': 200},
+        'response': {'sections': [{'type': type_, 'hits': hits}], 'next_page': None}
+    }
+
+
+@app.get("/songs/{song_id}")
+async def genius_song_info(song_id: int):
+    error = await simulate('genius_song')
+    if error:
+        return error
+    song = genius_song(str(song_id))
+    song['id'] = song_id
+    song['url'] = f"{settings.get('root', '')}/lyrics/{song_id}"
+    return {'meta': {'status': 200}, 'response': {'song': song}}
+
+
+@app.get("/lyrics/{song_id}", response_class=HTMLResponse)
+async def genius_lyrics(song_id: int):
+    error = await simulate('genius_lyrics')
+    if error:
+        return error
+    random.seed(song_id)
+    words = ['love', 'night', 'fire', 'stars', 'heart', 'rain', 'light', 'dream', 'road', 'home']
+    lines = [' '.join(random.choice(words) for _ in range(7)) for _ in range(24)]
+    random.seed()
+    return f"""
+    <html><body>
+        <div data-lyrics-container="true">{'<br/>'.join(lines)}</div>
+    </body></html>
+    """
+
+
+@app.get("/stats")
+async def stats():
+    return counters
+
+
+@app.post("/reset")
+async def reset():
+    """Empieza sin playlists (entre mediciones de un benchmark)"""
+    playlists.clear()
+    return {'ok': True}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de Spotify/Genius para benchmarks")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=settings['latency_ms'])
+    parser.add_argument('--jitter-ms', type=float, default=settings['jitter_ms'])
+    parser.add_argument('--rate-429', type=float, default=settings['rate_429'],
+                        help="Probabilidad de responder 429 con Retry-After")
+    parser.add_argument('--retry-after', type=int, default=settings['retry_after'])
+    parser.add_argument('--error-rate', type=float, default=settings['error_rate'],
+                        help="Probabilidad de responder 500")
+    parser.add_argument('--lyrics-missing-rate', type=float, default=settings['lyrics_missing_rate'])
+    parser.add_argument('--search-missing-rate', type=float, default=settings['search_missing_rate'])
+    parser.add_argument('--throttled-users', nargs='*', default=[],
+                        help="Usuarios que reciben siempre 429 al crear playlists")
+    parser.add_argument('--failing-users', nargs='*', default=[],
+                        help="Usuarios que reciben siempre 403 al crear playlists")
+    args = parser.parse_args()
+
+    settings.update({
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'rate_429': args.rate_429,
+        'retry_after': args.retry_after,
+        'error_rate': args.error_rate,
+        'lyrics_missing_rate': args.lyrics_missing_rate,
+        'search_missing_rate': args.search_missing_rate,
+        'throttled_users': set(args.throttled_users),
+        'failing_users': set(args.failing_users),
+        'root': f"http://{args.host}:{args.port}",
+    })
+
+    print(f"🧪 Mock Spotify/Genius en http://{args.host}:{args.port}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
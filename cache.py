@@ -0,0 +1,284 @@
+"""
+Caché persistente en SQLite para no repetir llamadas a APIs externas
+Se guarda en outputs/cache.sqlite (una tabla por tipo de dato)
+"""
+import concurrent.futures
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sin lock entre procesos
+    fcntl = None
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(base_dir, "./outputs/cache.sqlite")
+
+_non_alnum = re.compile(r'[^a-z0-9]+')
+
+# Al pasarse de max_entries se borra este extra de una vez: el conteo y el
+# DELETE se hacen cada tanto, no en cada escritura
+EVICT_BATCH = 0.05
+
+
+def normalize_key(*parts):
+    """
+    Normaliza texto para usarlo como clave de caché
+    "Yellow", "Coldplay" y "yellow ", "COLDPLAY" dan la misma clave
+    """
+    normalized = []
+    for part in parts:
+        text = unicodedata.normalize('NFKD', part or '')
+        text = text.encode('ascii', 'ignore').decode('ascii').lower()
+        normalized.append(_non_alnum.sub(' ', text).strip())
+    return '|'.join(normalized)
+
+
+class SQLiteCache:
+    """
+    Caché clave → valor (JSON) con TTL, caché negativo y límite de tamaño
+
+    - value None se guarda como "no encontrado" y expira con negative_ttl
+    - Si se supera max_entries se eliminan las entradas menos usadas (en
+      tandas: se lleva la cuenta de filas en memoria y solo se cuenta de
+      verdad al pasarse del límite)
+    - ttl=None significa que las entradas positivas no expiran
+    """
+    def __init__(self, table, path=DEFAULT_CACHE_PATH, ttl=None,
+                 negative_ttl=7 * 24 * 3600, max_entries=100_000):
+        self.table = table
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'evictions': 0}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                found INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)"
+        )
+        # Cota superior de las filas (un reemplazo también suma): se corrige
+        # con el conteo real cuando pasa el límite
+        self.rows = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _expired(self, found, created_at, now):
+        ttl = self.ttl if found else self.negative_ttl
+        return ttl is not None and now - created_at > ttl
+
+    def get(self, key):
+        """
+        Retorna (True, valor) si la clave está en caché (valor None = no encontrado)
+        o (False, None) si hay que consultar la API
+        """
+        return self._get(key, count=True)
+
+    def _get(self, key, count):
+        """get sin sumar a las estadísticas si count=False"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT value, found, created_at FROM {self.table} WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None or self._expired(row[1], row[2], now):
+                if count:
+                    self.stats['misses'] += 1
+                return False, None
+
+            self.conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            if row[1]:
+                if count:
+                    self.stats['hits'] += 1
+                return True, json.loads(row[0])
+            if count:
+                self.stats['negative_hits'] += 1
+            return True, None
+
+    def set(self, key, value):
+        """Guarda un valor (o None para "no encontrado")"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                f"(key, value, found, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), value is not None, now, now)
+            )
+            self.rows += 1
+            if self.rows > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # Conteo real: la cuenta en memoria incluye reemplazos y no ve lo
+        # que escriben otros procesos (--shards)
+        count = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            excess += int(self.max_entries * EVICT_BATCH)
+            deleted = self.conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+            self.stats['evictions'] += deleted
+            count -= deleted
+        self.rows = count
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class LyricsCache(SQLiteCache):
+    """
+    Letras ya limpias, indexadas por (canción, artista) normalizados
+    Las letras no cambian: las positivas no expiran, las negativas sí
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, negative_ttl=7 * 24 * 3600,
+                 max_entries=200_000):
+        super().__init__(
+            'lyrics', path=path, ttl=None,
+            negative_ttl=negative_ttl, max_entries=max_entries
+        )
+
+    def get_lyrics(self, song_name, artist_name):
+        return self.get(normalize_key(song_name, artist_name))
+
+    def set_lyrics(self, song_name, artist_name, lyrics):
+        self.set(normalize_key(song_name, artist_name), lyrics)
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Lock exclusivo entre procesos sobre `path`.lock, para leer, mezclar y
+    reemplazar un archivo que comparten los procesos de --shards
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SingleFlight:
+    """
+    Combina llamadas concurrentes con la misma clave: solo la primera
+    ejecuta `fn()` y las demás esperan y reciben el mismo resultado
+    """
+    def __init__(self):
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self.in_flight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn()
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+
+class FetchingCache(SQLiteCache):
+    """
+    Caché con lectura a través: si la clave no está se llama a `fetch()`
+    Si varios hilos piden la misma clave a la vez, solo uno hace la
+    petición HTTP y los demás esperan ese mismo resultado
+    """
+    def __init__(self, table, **kwargs):
+        super().__init__(table, **kwargs)
+        self.stats['coalesced'] = 0
+        self.stats['fetches'] = 0
+        self.single_flight = SingleFlight()
+
+    def fetch_once(self, key, fetch):
+        """
+        Retorna el valor en caché o llama a `fetch()` (una sola vez por clave)
+        Si `fetch()` retorna None (error HTTP) el resultado no se guarda
+        """
+        found, value = self.get(key)
+        if found:
+            return value
+
+        def load():
+            # Otro hilo pudo haberlo guardado justo antes (ya se contó el miss)
+            found, value = self._get(key, count=False)
+            if not found:
+                self.stats['fetches'] += 1
+                value = fetch()
+                if value is not None:
+                    self.set(key, value)
+            return value
+
+        value = self.single_flight.do(key, load)
+        self.stats['coalesced'] = self.single_flight.coalesced
+        return value
+
+
+class TopTracksCache(FetchingCache):
+    """Top tracks por (artist_id, market) con TTL"""
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=24 * 3600, max_entries=50_000):
+        super().__init__('top_tracks', path=path, ttl=ttl, max_entries=max_entries)
+
+    def get_or_fetch(self, artist_id, market, fetch):
+        return self.fetch_once(f"{artist_id}|{market}", fetch)
+
+
+class SearchCache(FetchingCache):
+    """
+    Resultados de búsqueda en Spotify (candidatos) por (canción, artista)
+    normalizados: la misma entrada de un chart no se vuelve a buscar
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=30 * 24 * 3600, max_entries=200_000):
+        super().__init__('spotify_search', path=path, ttl=ttl, max_entries=max_entries)
+
+    def get_or_fetch(self, song_name, artist_name, fetch):
+        return self.fetch_once(normalize_key(song_name, artist_name), fetch)
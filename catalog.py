@@ -0,0 +1,328 @@
+"""
+Catálogo de canciones en formato columnar
+Una lista por columna en vez de una lista de dicts por canción: el archivo
+es compacto y se carga en milisegundos (sin re-parsear los JSON de origen)
+
+    song, artist, uri, artist_id, image_url, source, rank, popularity
+
+- outputs/catalog.json     columnas en JSON compacto (sin dependencias)
+- outputs/catalog.parquet  Parquet, si pyarrow está instalado (`pip install pyarrow`)
+
+Lo genera getSongList/ingest.py y lo lee creator.py (enricher.py completa
+artist_id, image_url y popularity desde la API de Spotify)
+Los textos que se repiten entre canciones (artista, artist_id, portada,
+fuente) se guardan una sola vez en memoria (sys.intern) y creator.py recorre
+las canciones como Track (__slots__) en vez de dicts
+CatalogIndex deduplica canciones (misma URI o mismo título + artista
+principal) y junta las que vienen de fuentes sin URI (charts de YouTube)
+"""
+import json
+import os
+import re
+import sys
+
+from cache import normalize_key
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CATALOG_PATH = os.path.join(base_dir, "./outputs/catalog.json")
+DEFAULT_PARQUET_PATH = os.path.join(base_dir, "./outputs/catalog.parquet")
+
+# enriched_at: fecha (YYYY-MM-DD) en que enricher.py pidió la fila a la API
+COLUMNS = ('song', 'artist', 'uri', 'artist_id', 'image_url', 'source', 'rank', 'popularity',
+           'enriched_at')
+INT_COLUMNS = ('rank', 'popularity')
+# Columnas con muchos valores repetidos: una sola copia de cada string
+INTERNED_COLUMNS = ('artist', 'artist_id', 'image_url', 'source', 'enriched_at')
+CATALOG_VERSION = 1
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Track:
+    """
+    Una canción, con la forma de Dragons_data.json pero sin un dict por canción
+    (~2-3 veces menos memoria por canción con catálogos de millones de filas)
+    Acepta track['song'] y track.get('uri') además de track.song, así sirve
+    donde antes se pasaba un dict
+    """
+    __slots__ = ('song', 'artist', 'uri', 'artist_id', 'image_url', 'popularity')
+
+    def __init__(self, song, artist, uri=None, artist_id=None, image_url=None, popularity=None):
+        self.song = song
+        self.artist = _intern(artist)
+        self.uri = uri
+        self.artist_id = _intern(artist_id)
+        self.image_url = _intern(image_url)
+        self.popularity = popularity
+
+    @classmethod
+    def from_dict(cls, data):
+        """Un item de Dragons_data.json (o una fila del catálogo)"""
+        artist_id = data.get('artist_id')
+        if not artist_id and data.get('artist_uri'):
+            artist_id = data['artist_uri'].split(':')[-1]
+        return cls(
+            data.get('song'), data.get('artist'), data.get('uri'),
+            artist_id, data.get('image_url'), data.get('popularity')
+        )
+
+    @property
+    def artist_uri(self):
+        return f"spotify:artist:{self.artist_id}" if self.artist_id else None
+
+    @artist_uri.setter
+    def artist_uri(self, value):
+        self.artist_id = _intern(value.split(':')[-1]) if value else None
+
+    def to_dict(self):
+        """Forma de Dragons_data.json"""
+        return {
+            "song": self.song,
+            "artist": self.artist,
+            "uri": self.uri,
+            "image_url": self.image_url,
+            "artist_uri": self.artist_uri,
+            "artist_id": self.artist_id
+        }
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        setattr(self, name, value)
+
+    def __repr__(self):
+        return f"Track({self.song!r}, {self.artist!r}, {self.uri!r})"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+class Catalog:
+    def __init__(self, columns=None):
+        columns = columns or {}
+        lengths = {len(columns[name]) for name in COLUMNS if columns.get(name) is not None}
+        if len(lengths) > 1:
+            raise ValueError(f"Columnas de distinto largo: {lengths}")
+        # Columnas que no existían cuando se guardó el catálogo quedan en None
+        size = lengths.pop() if lengths else 0
+        self.columns = {
+            name: columns[name] if columns.get(name) is not None else [None] * size
+            for name in COLUMNS
+        }
+        for name in INTERNED_COLUMNS:
+            self.columns[name] = [_intern(value) for value in self.columns[name]]
+
+    @classmethod
+    def from_records(cls, records):
+        """Arma el catálogo desde un iterable de dicts (se consume de a uno)"""
+        catalog = cls()
+        for record in records:
+            catalog.append(record)
+        return catalog
+
+    def append(self, record):
+        for name in COLUMNS:
+            value = record.get(name)
+            self.columns[name].append(_intern(value) if name in INTERNED_COLUMNS else value)
+
+    def extend(self, columns):
+        """Agrega al final las filas de otro catálogo (dict de columnas)"""
+        for name in COLUMNS:
+            values = columns[name]
+            if name in INTERNED_COLUMNS:
+                values = map(_intern, values)
+            self.columns[name].extend(values)
+
+    def __len__(self):
+        return len(self.columns['song'])
+
+    def __getitem__(self, name):
+        """Columna completa: catalog['uri']"""
+        return self.columns[name]
+
+    def rows(self):
+        """Filas completas (todas las columnas) como dicts, de a una"""
+        for values in zip(*(self.columns[name] for name in COLUMNS)):
+            yield dict(zip(COLUMNS, values))
+
+    def tracks(self):
+        """Canciones como Track (lo que usa creator.py)"""
+        return [
+            Track(*values) for values in zip(
+                self.columns['song'], self.columns['artist'], self.columns['uri'],
+                self.columns['artist_id'], self.columns['image_url'], self.columns['popularity']
+            )
+        ]
+
+    def records(self):
+        """Canciones con la forma de Dragons_data.json (para guardarlas en JSON)"""
+        return [track.to_dict() for track in self.tracks()]
+
+    # ===== DISCO =====
+
+    def save(self, path=DEFAULT_CATALOG_PATH):
+        """Guarda en .parquet (requiere pyarrow) o .json según la extensión"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+
+        if path.endswith('.parquet'):
+            pyarrow = _pyarrow()
+            if pyarrow is None:
+                raise ImportError("Guardar en Parquet requiere `pip install pyarrow`")
+            table = pyarrow.table({
+                name: (
+                    pyarrow.array(values, pyarrow.int32()) if name in INT_COLUMNS
+                    # Pocas fuentes distintas: se guardan como diccionario
+                    else pyarrow.array(values, pyarrow.string()).dictionary_encode() if name == 'source'
+                    else pyarrow.array(values, pyarrow.string())
+                )
+                for name, values in self.columns.items()
+            })
+            pyarrow.parquet.write_table(table, tmp_path)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'version': CATALOG_VERSION, 'columns': self.columns},
+                    f, ensure_ascii=False, separators=(',', ':')
+                )
+        # Escritura atómica: nunca queda un catálogo a medio escribir
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CATALOG_PATH):
+        if path.endswith('.parquet'):
+            pyarrow = _pyarrow()
+            if pyarrow is None:
+                raise ImportError("Leer Parquet requiere `pip install pyarrow`")
+            return cls(pyarrow.parquet.read_table(path).to_pydict())
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CATALOG_VERSION:
+            raise ValueError(f"Versión de catálogo no soportada: {data.get('version')}")
+        return cls(data['columns'])
+
+
+def find_catalog():
+    """Ruta del catálogo a usar (Parquet si se puede leer, si no JSON) o None"""
+    if os.path.exists(DEFAULT_PARQUET_PATH) and _pyarrow() is not None:
+        return DEFAULT_PARQUET_PATH
+    if os.path.exists(DEFAULT_CATALOG_PATH):
+        return DEFAULT_CATALOG_PATH
+    return None
+
+
+def load_catalog(path=None):
+    path = path or find_catalog()
+    if path is None:
+        raise FileNotFoundError("No hay catálogo: correr getSongList/ingest.py")
+    return Catalog.load(path)
+
+
+# ===== DEDUPLICACIÓN =====
+
+# "(feat. X)", "[with Y]": el mismo tema figura con y sin invitados según la fuente
+_FEATURING = re.compile(r'\s*[\(\[](?:feat\.?|ft\.?|featuring|with)\s[^\)\]]*[\)\]]', re.IGNORECASE)
+# "Song - Remastered 2011", "Song - 2011 Remaster"
+_REMASTER = re.compile(r'\s+-\s+[^-]*remaster[^-]*$', re.IGNORECASE)
+# Separadores entre artistas: "A, B", "A & B", "A feat. B"
+_ARTIST_SEPARATOR = re.compile(r'\s*(?:,|&|\bfeat\.?\s|\bft\.?\s)\s*', re.IGNORECASE)
+
+# Campos que aporta una fila con URI al juntarse con una que no tiene
+JOIN_FIELDS = ('uri', 'artist_id', 'artist_uri', 'image_url')
+
+
+def _normalize(text):
+    # Títulos sin letras latinas (p. ej. japonés) no deben quedar vacíos
+    return normalize_key(text) or (text or '').casefold().strip()
+
+
+def clean_title(song):
+    """Título sin invitados ni "Remastered" (así se compara entre fuentes)"""
+    return _REMASTER.sub('', _FEATURING.sub('', song or '')).strip()
+
+
+def primary_artist(artist):
+    """Primer artista de 'A, B', 'A & B' o 'A feat. B'"""
+    return _ARTIST_SEPARATOR.split(artist or '', maxsplit=1)[0].strip()
+
+
+def name_key(song, artist):
+    """Clave (título, artista principal) normalizada"""
+    return f"{_normalize(clean_title(song))}|{_normalize(primary_artist(artist))}"
+
+
+class CatalogIndex:
+    """
+    Índice en memoria para deduplicar filas en O(1) cada una
+    - por URI de Spotify
+    - por (título, artista principal) normalizados, para fuentes sin URI
+    La primera aparición se queda con su posición; si una fila sin URI
+    (YouTube) coincide con otra que sí la tiene, se completa con sus datos
+    """
+    def __init__(self):
+        self.records = []      # filas únicas, en orden de aparición
+        self.by_uri = {}       # uri → fila
+        self.by_name = {}      # name_key → fila
+        self.stats = {
+            'rows': 0,             # filas recibidas
+            'uri_duplicates': 0,   # misma URI que una fila anterior
+            'joined': 0,           # mismo título/artista, una de las dos sin URI
+            'name_collisions': 0,  # mismo título/artista con URIs distintas (se dejan las dos)
+        }
+
+    def add(self, record):
+        """Agrega la fila si es nueva (True); si repite una anterior la descarta (False)"""
+        self.stats['rows'] += 1
+        uri = record.get('uri') or None
+        if uri and uri in self.by_uri:
+            self.stats['uri_duplicates'] += 1
+            return False
+
+        key = name_key(record.get('song'), record.get('artist'))
+        existing = self.by_name.get(key)
+        if existing is not None:
+            if uri and existing.get('uri'):
+                # Otra versión del tema (en vivo, single, álbum): no es duplicado
+                self.stats['name_collisions'] += 1
+            else:
+                self.stats['joined'] += 1
+                if uri:
+                    # La fila anterior no tenía URI: se completa con la de Spotify
+                    for field in JOIN_FIELDS:
+                        if record.get(field):
+                            existing[field] = record[field]
+                    self.by_uri[uri] = existing
+                return False
+
+        self.records.append(record)
+        if uri:
+            self.by_uri[uri] = record
+        self.by_name.setdefault(key, record)
+        return True
+
+    def catalog(self):
+        return Catalog.from_records(self.records)
+
+
+def deduplicate(records):
+    """Filas únicas (en orden) y las estadísticas del índice"""
+    index = CatalogIndex()
+    unique = [record for record in records if index.add(record)]
+    return unique, index.stats
@@ -5,50 +5,202 @@ Una canción por playlist, rotando entre todos los usuarios
 Incluye letras en descripciones usando Genius API
 """
 import os
-import requests
-import json
+import sys
 import time
+import json
 import base64
+import asyncio
+import argparse
+import functools
+import threading
+import concurrent.futures
 from datetime import datetime
-import lyricsgenius
+import textrender
+from ratelimit import RequestScheduler
+from tokens import TokenManager, DEFAULT_TOKEN_CACHE_PATH
+from cache import LyricsCache, TopTracksCache, DEFAULT_CACHE_PATH
+from images import CoverImageCache, DEFAULT_COVERS_DIR
+from metrics import Metrics, DEFAULT_METRICS_PATH, print_summary
+from events import EventLog, DEFAULT_EVENTS_PATH, LEVELS
+from catalog import Track, load_catalog, deduplicate
+from journal import (
+    ProgressJournal, load_journal, song_key,
+    DEFAULT_JOURNAL_PATH, STEP_PLAYLIST, STEP_TRACKS, STEP_IMAGE, STEP_DONE
+)
+from pipeline import PlaylistPipeline, OrderedLogWriter, ENRICH_WORKERS
+from assigner import UserAssigner, QuotaLedger, user_quotas, DEFAULT_QUOTA_PATH
+from existing import fetch_index
+from jobqueue import JobQueue, QueueStream, DEFAULT_QUEUE_PATH, PENDING, LEASED, DONE, FAILED
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
 config_path = os.path.join(base_dir, "./Credencials/config.json")
 users_path = os.path.join(base_dir, "./Credencials/users.json")
 songs_path = os.path.join(base_dir, "./outputs/Dragons_data.json")
 
-# Cargar configuración
-with open(config_path, 'r') as f:
-    config = json.load(f)
+# Límite de Spotify para GET /tracks?ids= y GET /artists?ids=
+MAX_IDS_PER_REQUEST = 50
+
+
+# Configuración, usuarios y catálogo se leen recién cuando un comando los
+# necesita: importar este módulo no toca disco ni importa lyricsgenius/requests
+
+@functools.lru_cache(maxsize=None)
+def load_config():
+    """config.json: spotify_client_id, spotify_client_secret, genius_token"""
+    with open(config_path, 'r') as f:
+        return json.load(f)
 
-CLIENT_ID = config['spotify_client_id']
-CLIENT_SECRET = config['spotify_client_secret']
-GENIUS_TOKEN = config['genius_token']
 
-# Cargar usuarios autorizados
-with open(users_path, 'r') as f:
-    users = json.load(f)
+@functools.lru_cache(maxsize=None)
+def load_users():
+    """Usuarios autorizados (users.json)"""
+    with open(users_path, 'r') as f:
+        return json.load(f)
 
-# Cargar datos de canciones
-with open(songs_path, 'r', encoding='utf-8') as f:
-    all_songs = json.load(f)
+
+@functools.lru_cache(maxsize=None)
+def load_songs(catalog_path=None):
+    """
+    Canciones a procesar: Dragons_data.json, o el catálogo columnar de
+    getSongList/ingest.py si se pide con --catalog (ver catalog.py)
+    """
+    if catalog_path:
+        return load_catalog(catalog_path).tracks()
+    with open(songs_path, 'r', encoding='utf-8') as f:
+        # Cada canción pasa a Track apenas se parsea: nunca están todos los dicts en memoria
+        return json.load(f, object_hook=Track.from_dict)
+
+
+def playable_songs(songs):
+    """
+    Una playlist por canción: las repetidas (misma URI o mismo título y
+    artista) no generan otra playlist ni otra tanda de llamadas, y las que no
+    tienen URI (charts de YouTube sin resolver, ver resolver.py) no se pueden
+    agregar a una playlist
+    Acepta dicts con la forma de Dragons_data.json o Track
+    Retorna (lista de Track, cantidad descartada)
+    """
+    songs = [song if isinstance(song, Track) else Track.from_dict(song) for song in songs]
+    unique, _ = deduplicate(songs)
+    playable = [song for song in unique if song.uri]
+    return playable, len(songs) - len(playable)
 
 
 class SpotifyPlaylistCreator:
-    def __init__(self, client_id, client_secret, genius_token):
+    def __init__(self, client_id, client_secret, genius_token, scheduler=None,
+                 lyrics_cache=None, top_tracks_cache=None, covers=None, transport=None,
+                 base_url="https://api.spotify.com/v1",
+                 accounts_url="https://accounts.spotify.com", genius_root=None, metrics=None,
+                 events=None):
         self.client_id = client_id
         self.client_secret = client_secret
-        self.base_url = "https://api.spotify.com/v1"
+        self.base_url = base_url
+        self.accounts_url = accounts_url
+        
+        # Conexiones persistentes (keep-alive) por host, compartidas por todo
+        if transport is None:
+            from transport import HttpTransport
+            transport = HttpTransport()
+        self.transport = transport
+        
+        # Si hay un TokenManager, un 401 renueva el token y reintenta
+        self.token_manager = None
+        
+        # Planificador compartido: rate limit por token + reintentos en 429
+        self.scheduler = scheduler or RequestScheduler()
+        
+        # Genius se inicializa recién cuando se busca la primera letra
+        self.genius_token = genius_token
+        self.genius_root = genius_root
+        self._genius = None
+        self.genius_lock = threading.Lock()
+        
+        # Caché persistente de letras (outputs/cache.sqlite)
+        self.lyrics_cache = lyrics_cache if lyrics_cache is not None else LyricsCache()
+        
+        # Caché de top tracks por artista (uno por artista, no por canción)
+        self.top_tracks_cache = top_tracks_cache if top_tracks_cache is not None else TopTracksCache()
+        
+        # Portadas ya procesadas (una descarga por álbum, no por playlist)
+        self.covers = covers or CoverImageCache()
         
-        # Inicializar Genius API
-        self.genius = lyricsgenius.Genius(genius_token)
-        self.genius.verbose = False
-        self.genius.remove_section_headers = True
-        self.genius.skip_non_songs = True
-        self.genius.timeout = 15
+        # Cantidad, status y latencia de cada tipo de llamada (ver metrics.py)
+        self.metrics = metrics if metrics is not None else Metrics()
+        
+        # Log de eventos (ver events.py); por defecto solo consola, nivel info
+        self.events = events if events is not None else EventLog()
+    
+    @property
+    def genius(self):
+        """Cliente de Genius API (se crea la primera vez que se usa)"""
+        with self.genius_lock:
+            if self._genius is None:
+                import lyricsgenius
+                genius = lyricsgenius.Genius(self.genius_token)
+                genius.verbose = False
+                genius.remove_section_headers = True
+                genius.skip_non_songs = True
+                genius.timeout = 15
+                if self.genius_root:
+                    # Para apuntar a un servidor local (benchmarks/mockServer.py)
+                    genius.API_ROOT = f"{self.genius_root}/"
+                    genius.PUBLIC_API_ROOT = f"{self.genius_root}/api/"
+                    genius.WEB_ROOT = f"{self.genius_root}/"
+                # La sesión interna de lyricsgenius también usa nuestro pool
+                if hasattr(genius, '_session'):
+                    self.transport.configure_session(genius._session)
+                self._genius = genius
+            return self._genius
+    
+    def _request(self, method, url, rate_key=None, call='other', **kwargs):
+        """
+        Toda petición HTTP pasa por aquí para respetar el rate limit
+        rate_key: access token (o identificador) cuyo bucket se usa
+        call: tipo de llamada para las métricas (create_playlist, ...)
+        """
+        with self.metrics.time_call(call) as timer:
+            response = self.scheduler.request(
+                lambda: self.transport.request(method, url, **kwargs),
+                key=rate_key
+            )
+            
+            # Token vencido o revocado: se renueva una sola vez y se reintenta
+            if response.status_code == 401 and self.token_manager is not None:
+                new_token = self.token_manager.refresh_after_401(rate_key)
+                if new_token:
+                    kwargs['headers'] = {**kwargs.get('headers', {}), 'Authorization': f'Bearer {new_token}'}
+                    response = self.scheduler.request(
+                        lambda: self.transport.request(method, url, **kwargs),
+                        key=new_token
+                    )
+            
+            timer.status = response.status_code
+        return response
         
     def get_access_token(self, refresh_token):
         """Obtiene un access token usando el refresh token"""
+        return self.get_access_token_info(refresh_token)['access_token']
+    
+    def get_access_token_info(self, refresh_token):
+        """
+        Respuesta completa del refresh: access_token, expires_in (segundos)
+        y, si Spotify lo rota, un refresh_token nuevo
+        """
+        return self._token_request({
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token
+        }, call='get_access_token')
+    
+    def get_client_token(self):
+        """
+        Token de la aplicación (client credentials), sin usuario
+        Alcanza para búsquedas y metadata, no para crear playlists
+        """
+        return self._token_request(
+            {'grant_type': 'client_credentials'}, call='get_client_token'
+        )['access_token']
+    
+    def _token_request(self, data, call):
         auth_header = base64.b64encode(
             f"{self.client_id}:{self.client_secret}".encode()
         ).decode()
@@ -58,19 +210,17 @@ class SpotifyPlaylistCreator:
             'Content-Type': 'application/x-www-form-urlencoded'
         }
         
-        data = {
-            'grant_type': 'refresh_token',
-            'refresh_token': refresh_token
-        }
-        
-        response = requests.post(
-            'https://accounts.spotify.com/api/token',
+        response = self._request(
+            'POST',
+            f"{self.accounts_url}/api/token",
+            rate_key='accounts',
+            call=call,
             headers=headers,
             data=data
         )
         
         if response.status_code == 200:
-            return response.json()['access_token']
+            return response.json()
         else:
             raise Exception(f"Error obteniendo token: {response.text}")
     
@@ -78,9 +228,20 @@ class SpotifyPlaylistCreator:
         """
         Obtiene las letras de una canción usando Genius API
         Retorna None si no se encuentran
+        Primero consulta el caché: una canción ya vista no llama a Genius
         """
+        cached, lyrics = self.lyrics_cache.get_lyrics(song_name, artist_name)
+        if cached:
+            self.events.debug('lyrics_cache_hit', song=song_name, artist=artist_name, found=lyrics is not None)
+            return lyrics
+        
+        # Solo se mide lo que va a Genius (los aciertos del caché no son llamadas)
+        with self.metrics.time_call('get_lyrics') as timer:
+            return self._search_lyrics(song_name, artist_name, timer)
+    
+    def _search_lyrics(self, song_name, artist_name, timer):
         try:
-            print(f"      🔍 Buscando letra: {song_name} {artist_name}")
+            self.events.debug('lyrics_search', song=song_name, artist=artist_name)
             song = self.genius.search_song(song_name, artist_name)
             
             if song and song.lyrics:
@@ -101,14 +262,23 @@ class SpotifyPlaylistCreator:
                         clean_lines.append(line)
                 
                 clean_lyrics = '\n'.join(clean_lines)
-                print(f"      ✅ Letra encontrada ({len(clean_lyrics)} caracteres)")
+                self.events.debug('lyrics_found', song=song_name, artist=artist_name, length=len(clean_lyrics))
+                timer.status = 'found'
+                self.lyrics_cache.set_lyrics(song_name, artist_name, clean_lyrics)
                 return clean_lyrics
             else:
-                print(f"      ⚠️ Letra no encontrada")
+                self.events.debug('lyrics_not_found', song=song_name, artist=artist_name)
+                timer.status = 'not_found'
+                # Caché negativo: expira antes por si Genius la agrega después
+                self.lyrics_cache.set_lyrics(song_name, artist_name, None)
                 return None
                 
         except Exception as e:
-            print(f"      ❌ Error buscando letra: {e}")
+            self.events.warning(
+                'lyrics_error', f"   ⚠️ Error buscando letra de {song_name}: {e}",
+                song=song_name, artist=artist_name, error=str(e)
+            )
+            timer.status = 'error'
             return None
     
     def clean_text_for_spotify(self, text):
@@ -116,130 +286,171 @@ class SpotifyPlaylistCreator:
         Limpia el texto para que sea aceptado por Spotify
         Remueve caracteres especiales problemáticos
         """
-        import re
-        
-        # Remover emojis y caracteres no ASCII problemáticos
-        text = text.encode('ascii', 'ignore').decode('ascii')
-        
-        # Remover caracteres de control y otros problemáticos
-        text = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', text)
-        
-        # Limpiar espacios múltiples
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        return textrender.clean_text(text)
     
     def create_playlist_title(self, song_name, artist_name, lyrics_preview):
-        import re  # ← 1️⃣ AGREGAMOS ESTO AL INICIO
-    
-        # Limpiar nombres
-        song_name = self.clean_text_for_spotify(song_name)
-        artist_name = self.clean_text_for_spotify(artist_name)
-    
-        base_title = f"{song_name} {artist_name}"
-    
-        if len(base_title) >= 100:
-            return base_title[:97] + "..."
-    
-        if not lyrics_preview:
-            return base_title
-    
-        # ============================================
-        # 2️⃣ AQUÍ VA EL BLOQUE DE LIMPIEZA (REEMPLAZA TODO LO VIEJO)
-        # ============================================
-    
-        # Paso 1: Convertir saltos de línea en espacios
-        lyrics_preview = lyrics_preview.replace('\n', ' ')
-        lyrics_preview = lyrics_preview.replace('\r', ' ')
-    
-        # Paso 2: Limpiar espacios múltiples
-        lyrics_preview = re.sub(r'\s+', ' ', lyrics_preview)
-    
-        # Paso 3: Limpiar caracteres especiales
-        lyrics_preview = self.clean_text_for_spotify(lyrics_preview)
-    
-        # ============================================
-        # FIN DEL BLOQUE DE LIMPIEZA
-        # ============================================
-    
-        # Calcular espacio disponible
-        available_space = 100 - len(base_title) - 3
-    
-        if available_space > 10:
-            # 3️⃣ AQUÍ CAMBIA LA LÓGICA (YA NO USAMOS split)
-        
-            if len(lyrics_preview) <= available_space:
-                return f"{base_title}  {lyrics_preview}"
-            else:
-                truncated = lyrics_preview[:available_space-3]
-                last_space = truncated.rfind(' ')
-                if last_space > 10:
-                    truncated = truncated[:last_space]
-                return f"{base_title}  {truncated}..."
-    
-        return base_title
+        """Título: canción + artista + comienzo de la letra (máx. 100 caracteres)"""
+        return textrender.render_title(song_name, artist_name, lyrics_preview)
     
     def create_playlist_description(self, lyrics):
         """
         Crea la descripción de la playlist SOLO con la letra
         Spotify limita a 300 caracteres
         """
-        if not lyrics:
-            # ⚠️ DESCRIPCIÓN CUANDO NO HAY LETRA
-            return "Letra no disponible."
+        description = textrender.render_description(lyrics)
+        if lyrics:
+            self.events.debug('description_rendered', preview=description[:150], length=len(description))
+        return description
+    
+    def render_playlists(self, songs, lyrics):
+        """
+        Títulos y descripciones de muchas canciones en una sola llamada
+        Retorna (titles, descriptions), ya limpios para Spotify
+        """
+        return textrender.render_catalog(songs, lyrics)
 
-        import re
+    
+    def get_artist_top_tracks(self, access_token, artist_id, country="US", limit=5):
+        """Devuelve las canciones top del artista (desde caché si ya se pidieron)"""
+        def fetch():
+            headers = {"Authorization": f"Bearer {access_token}"}
+            url = f"{self.base_url}/artists/{artist_id}/top-tracks?market={country}"
+            response = self._request(
+                'GET', url, rate_key=access_token, call='get_artist_top_tracks', headers=headers
+            )
+            
+            if response.status_code != 200:
+                self.events.warning(
+                    'top_tracks_error', f"   ⚠️ Error obteniendo top tracks: {response.status_code}",
+                    artist_id=artist_id, status=response.status_code
+                )
+                return None
+            
+            # Solo guardamos lo que usamos para que el caché sea liviano
+            return [
+                {'id': t.get('id'), 'uri': t['uri'], 'name': t.get('name')}
+                for t in response.json().get("tracks", [])
+            ]
         
-        # 🔧 ORDEN CORRECTO: Primero reemplazar saltos de línea, LUEGO limpiar con clean_text
-        # Paso 1: Convertir saltos de línea en espacios (esto asegura separación)
-        lyrics = lyrics.replace('\n', ' ')
-        lyrics = lyrics.replace('\r', ' ')
+        tracks = self.top_tracks_cache.get_or_fetch(artist_id, country, fetch)
+        return (tracks or [])[:limit]
+    
+    def search_tracks(self, access_token, query, limit=5, market=None):
+        """
+        Busca canciones en Spotify
+        Retorna candidatos compactos (uri, name, artists, artist_id, image_url)
+        o None si la búsqueda falló
+        """
+        headers = {"Authorization": f"Bearer {access_token}"}
+        params = {'q': query, 'type': 'track', 'limit': limit}
+        if market:
+            params['market'] = market
+        response = self._request(
+            'GET', f"{self.base_url}/search", rate_key=access_token, call='search_tracks',
+            headers=headers, params=params
+        )
         
-        # Paso 2: Limpiar espacios múltiples
-        lyrics = re.sub(r'\s+', ' ', lyrics)
+        if response.status_code != 200:
+            self.events.warning(
+                'search_error', f"   ⚠️ Error buscando '{query}': {response.status_code}",
+                query=query, status=response.status_code
+            )
+            return None
         
-        # Paso 3: Ahora sí, aplicar clean_text_for_spotify (que remueve caracteres especiales)
-        lyrics = self.clean_text_for_spotify(lyrics)
+        candidates = []
+        for track in response.json().get('tracks', {}).get('items', []):
+            artists = track.get('artists', [])
+            images = track.get('album', {}).get('images', [])
+            candidates.append({
+                'uri': track['uri'],
+                'name': track.get('name', ''),
+                'artists': [artist.get('name', '') for artist in artists],
+                'artist_id': artists[0].get('id') if artists else None,
+                # Spotify ordena las imágenes de mayor a menor
+                'image_url': images[0]['url'] if images else None,
+            })
+        return candidates
+    
+    def _get_several(self, access_token, kind, ids, params=None):
+        """GET /{kind}?ids=a,b,c (hasta MAX_IDS_PER_REQUEST ids); None si falló"""
+        if len(ids) > MAX_IDS_PER_REQUEST:
+            raise ValueError(f"Máximo {MAX_IDS_PER_REQUEST} ids por llamada ({len(ids)})")
+        headers = {"Authorization": f"Bearer {access_token}"}
+        params = dict(params or {}, ids=",".join(ids))
+        response = self._request(
+            'GET', f"{self.base_url}/{kind}", rate_key=access_token, call=f'get_{kind}',
+            headers=headers, params=params
+        )
         
-        # Debug temporal (puedes eliminar después de verificar)
-        print(f"\n   🔍 DEBUG LETRA LIMPIA:")
-        print(f"      Original length: {len(lyrics)}")
-        print(f"      Preview: {lyrics[:150]}...")
+        if response.status_code != 200:
+            self.events.warning(
+                f'get_{kind}_error', f"   ⚠️ Error obteniendo {kind} ({len(ids)} ids): {response.status_code}",
+                ids=len(ids), status=response.status_code
+            )
+            return None
+        # Spotify devuelve null en la posición de los ids que no existen
+        return response.json().get(kind, [])
+    
+    def get_tracks(self, access_token, track_ids, market=None):
+        """
+        Metadata de varias canciones en una sola llamada (GET /tracks?ids=)
+        Retorna {track_id: {uri, artist_id, image_url, popularity}}
+        o None si la llamada falló
+        """
+        tracks = self._get_several(
+            access_token, 'tracks', track_ids, {'market': market} if market else None
+        )
+        if tracks is None:
+            return None
         
-        # Limitar a 300 caracteres
-        if len(lyrics) <= 300:
-            return lyrics.strip()
-        else:
-            truncated = lyrics[:297]
-            last_space = truncated.rfind(' ')
-            if last_space > 280:  # evita cortar palabras
-                truncated = truncated[:last_space]
-            return truncated.strip() + "..."
-
+        result = {}
+        for track in tracks:
+            if not track:
+                continue
+            artist_ids = [artist.get('id') for artist in track.get('artists', []) if artist.get('id')]
+            images = track.get('album', {}).get('images', [])
+            result[track['id']] = {
+                'uri': track.get('uri'),
+                # El artista principal (el que usa el catálogo para top tracks)
+                'artist_id': artist_ids[0] if artist_ids else None,
+                'image_url': images[0]['url'] if images else None,
+                'popularity': track.get('popularity'),
+            }
+        return result
     
-    def get_artist_top_tracks(self, access_token, artist_id, country="US", limit=5):
-        """Devuelve las canciones top del artista"""
-        headers = {"Authorization": f"Bearer {access_token}"}
-        url = f"{self.base_url}/artists/{artist_id}/top-tracks?market={country}"
-        response = requests.get(url, headers=headers)
+    def get_artists(self, access_token, artist_ids):
+        """
+        Metadata de varios artistas en una sola llamada (GET /artists?ids=)
+        Retorna {artist_id: {name, image_url, popularity}} o None si falló
+        """
+        artists = self._get_several(access_token, 'artists', artist_ids)
+        if artists is None:
+            return None
         
-        if response.status_code == 200:
-            tracks = response.json().get("tracks", [])
-            return tracks[:limit]
-        else:
-            print(f"   ⚠️ Error obteniendo top tracks: {response.status_code}")
-            return []
+        return {
+            artist['id']: {
+                'name': artist.get('name'),
+                'image_url': artist['images'][0]['url'] if artist.get('images') else None,
+                'popularity': artist.get('popularity'),
+            }
+            for artist in artists if artist
+        }
     
-    def create_playlist(self, access_token, user_id, name, description=""):
-        """Crea una playlist vacía"""
+    def create_playlist(self, access_token, user_id, name, description="", prerendered=False):
+        """
+        Crea una playlist vacía
+        prerendered=True: name y description ya vienen de textrender (limpios
+        y truncados), no hace falta volver a limpiarlos
+        """
         headers = {
             'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json'
         }
         
-        # Limpiar y validar datos
-        name = self.clean_text_for_spotify(name)
-        description = self.clean_text_for_spotify(description)
+        if not prerendered:
+            # Limpiar y validar datos
+            name = self.clean_text_for_spotify(name)
+            description = self.clean_text_for_spotify(description)
         
         # Truncar si es necesario
         name = name[:100] if len(name) > 100 else name
@@ -251,29 +462,67 @@ class SpotifyPlaylistCreator:
             'public': True
         }
         
-        # DEBUG: Imprimir lo que se está enviando
-        print(f"   🔍 DEBUG - Enviando a Spotify:")
-        print(f"      User ID: {user_id}")
-        print(f"      Título ({len(name)} chars): {name[:80]}...")
-        print(f"      Descripción ({len(description)} chars): {description[:80]}...")
+        self.events.debug(
+            'create_playlist_request', user_id=user_id,
+            name=name, name_length=len(name), description_length=len(description)
+        )
         
-        response = requests.post(
+        response = self._request(
+            'POST',
             f"{self.base_url}/users/{user_id}/playlists",
+            rate_key=access_token,
+            call='create_playlist',
             headers=headers,
             json=data
         )
         
-        # DEBUG: Mostrar respuesta completa si hay error
         if response.status_code != 201:
-            print(f"   ❌ DEBUG - Respuesta completa:")
-            print(f"      Status: {response.status_code}")
-            print(f"      Body: {response.text}")
-            print(f"      Headers enviados: {headers}")
-            print(f"      Data enviado: {json.dumps(data, indent=2)}")
-            raise Exception(f"Error creando playlist: {response.text}")
+            # Sin headers: llevan el token del usuario
+            self.events.error(
+                'create_playlist_failed', user_id=user_id, status=response.status_code,
+                body=response.text[:1000], data=data
+            )
+            raise Exception(f"Error creando playlist: {response.status_code} {response.text[:200]}")
+        
+        return response.json()
+    
+    def get_user_playlists(self, access_token, offset=0, limit=50):
+        """
+        Una página de las playlists del usuario dueño del token (GET /me/playlists)
+        Retorna {'items': [...], 'total': N} o None si falló
+        """
+        headers = {"Authorization": f"Bearer {access_token}"}
+        response = self._request(
+            'GET', f"{self.base_url}/me/playlists", rate_key=access_token, call='get_user_playlists',
+            headers=headers, params={'offset': offset, 'limit': limit}
+        )
         
+        if response.status_code != 200:
+            self.events.warning(
+                'get_user_playlists_error',
+                f"   ⚠️ Error listando playlists (offset {offset}): {response.status_code}",
+                offset=offset, status=response.status_code
+            )
+            return None
         return response.json()
     
+    def get_playlist_first_track(self, access_token, playlist_id):
+        """URI de la primera canción de la playlist (None si está vacía o falló)"""
+        headers = {"Authorization": f"Bearer {access_token}"}
+        response = self._request(
+            'GET', f"{self.base_url}/playlists/{playlist_id}/tracks", rate_key=access_token,
+            call='get_playlist_tracks', headers=headers,
+            params={'offset': 0, 'limit': 1, 'fields': 'items(track(uri))'}
+        )
+        
+        if response.status_code != 200:
+            self.events.warning(
+                'get_playlist_tracks_error', playlist_id=playlist_id, status=response.status_code
+            )
+            return None
+        items = response.json().get('items', [])
+        return (items[0].get('track') or {}).get('uri') if items else None
+    
     def add_tracks_to_playlist(self, access_token, playlist_id, track_uris):
         """Agrega canciones a una playlist"""
         headers = {
@@ -286,36 +535,54 @@ class SpotifyPlaylistCreator:
             batch = track_uris[i:i+100]
             data = {'uris': batch}
             
-            response = requests.post(
+            response = self._request(
+                'POST',
                 f"{self.base_url}/playlists/{playlist_id}/tracks",
+                rate_key=access_token,
+                call='add_tracks_to_playlist',
                 headers=headers,
                 json=data
             )
             
             if response.status_code != 201:
-                print(f"   ⚠️ Error agregando canciones: {response.text}")
+                self.events.warning(
+                    'add_tracks_error', playlist_id=playlist_id,
+                    status=response.status_code, body=response.text[:1000]
+                )
                 return False
-            
-            time.sleep(0.5)
         
         return True
     
+    def download_image(self, image_url):
+        """Descarga los bytes de una imagen (None si falla)"""
+        img_response = self._request(
+            'GET', image_url, rate_key='images', call='download_image', timeout=10
+        )
+        if img_response.status_code != 200:
+            return None
+        return img_response.content
+    
+    def prepare_cover(self, image_url):
+        """Payload base64 de la portada, desde el caché de disco si ya existe"""
+        return self.covers.get_payload(image_url, self.download_image)
+    
     def upload_playlist_image(self, access_token, playlist_id, image_url):
-        """Descarga una imagen y la sube como cover de la playlist"""
+        """Sube la portada (ya procesada y en caché) como cover de la playlist"""
         try:
-            img_response = requests.get(image_url, timeout=10)
-            if img_response.status_code != 200:
+            image_base64 = self.prepare_cover(image_url)
+            if not image_base64:
                 return False
             
-            image_base64 = base64.b64encode(img_response.content).decode()
-            
             headers = {
                 'Authorization': f'Bearer {access_token}',
                 'Content-Type': 'image/jpeg'
             }
             
-            response = requests.put(
+            response = self._request(
+                'PUT',
                 f"{self.base_url}/playlists/{playlist_id}/images",
+                rate_key=access_token,
+                call='upload_playlist_image',
                 headers=headers,
                 data=image_base64
             )
@@ -323,252 +590,811 @@ class SpotifyPlaylistCreator:
             return response.status_code == 202
             
         except Exception as e:
-            print(f"   ⚠️ Error subiendo imagen: {e}")
+            self.events.warning('upload_image_error', playlist_id=playlist_id, error=str(e))
             return False
+    
+    # ===== API ASÍNCRONA =====
+    # Cada llamada bloqueante corre en un hilo aparte para que el event loop
+    # pueda atender muchas playlists (de varios usuarios) al mismo tiempo
+    
+    async def get_access_token_async(self, refresh_token):
+        """Versión asíncrona de get_access_token"""
+        return await asyncio.to_thread(self.get_access_token, refresh_token)
+    
+    async def get_lyrics_async(self, song_name, artist_name):
+        """Versión asíncrona de get_lyrics"""
+        return await asyncio.to_thread(self.get_lyrics, song_name, artist_name)
+    
+    async def get_artist_top_tracks_async(self, access_token, artist_id, country="US", limit=5):
+        """Versión asíncrona de get_artist_top_tracks"""
+        return await asyncio.to_thread(
+            self.get_artist_top_tracks, access_token, artist_id, country, limit
+        )
+    
+    async def create_playlist_async(self, access_token, user_id, name, description="",
+                                    prerendered=False):
+        """Versión asíncrona de create_playlist"""
+        return await asyncio.to_thread(
+            self.create_playlist, access_token, user_id, name, description, prerendered
+        )
+    
+    async def get_user_playlists_async(self, access_token, offset=0, limit=50):
+        """Versión asíncrona de get_user_playlists"""
+        return await asyncio.to_thread(self.get_user_playlists, access_token, offset, limit)
+    
+    async def get_playlist_first_track_async(self, access_token, playlist_id):
+        """Versión asíncrona de get_playlist_first_track"""
+        return await asyncio.to_thread(self.get_playlist_first_track, access_token, playlist_id)
+    
+    async def add_tracks_to_playlist_async(self, access_token, playlist_id, track_uris):
+        """Versión asíncrona de add_tracks_to_playlist"""
+        return await asyncio.to_thread(
+            self.add_tracks_to_playlist, access_token, playlist_id, track_uris
+        )
+    
+    async def prepare_cover_async(self, image_url):
+        """Versión asíncrona de prepare_cover"""
+        return await asyncio.to_thread(self.prepare_cover, image_url)
+    
+    async def upload_playlist_image_async(self, access_token, playlist_id, image_url):
+        """Versión asíncrona de upload_playlist_image"""
+        return await asyncio.to_thread(
+            self.upload_playlist_image, access_token, playlist_id, image_url
+        )
+
+
+# Canciones promocionales (fijas para todas las playlists)
+PROMO_TRACKS = [
+    "spotify:track:4pem1s55isBqZ6HDbuFRG9",  # Promo 1 Open Hearts
+    "spotify:track:0zWYg2LyzO3VjH2qoV6igp"   # Promo 2 Given up on Me
+]
+
+# Playlists simultáneas por usuario (cada usuario es un carril independiente)
+IN_FLIGHT_PER_USER = 3
 
+# Conexiones por host: alcanza para todas las peticiones en curso
+POOL_SIZE_PER_HOST = 32
 
-def create_playlists_circular_distribution():
+# Tiempo aproximado por playlist (solo para la estimación inicial);
+# el ritmo real lo marca el RequestScheduler según lo que responde Spotify
+SECONDS_PER_PLAYLIST = 2
+
+
+async def run_circular_distribution_async(creator, songs, users, promo_tracks, in_flight,
+                                          stats, log, journal,
+                                          token_cache_path=DEFAULT_TOKEN_CACHE_PATH,
+                                          quotas=None, ledger=None, on_finish=None,
+                                          check_existing=True, positions=None, catalog_size=None):
     """
-    Crea playlists distribuyendo canciones circularmente entre usuarios
+    Motor asíncrono: procesa las canciones con el pipeline por etapas y las
+    reparte entre los carriles de escritura (uno por usuario) según la
+    capacidad de cada uno en el momento (ver assigner.py)
+    Con check_existing primero lista las playlists de cada usuario y no
+    vuelve a crear las que ya existen (ver existing.py)
+    """
+    # Un hilo por petición en curso (el executor por defecto de asyncio es
+    # muy chico para todos los carriles: se quedaría como cuello de botella)
+    asyncio.get_running_loop().set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(8, len(users) * in_flight * 2 + ENRICH_WORKERS)
+        )
+    )
+    
+    # Obtener tokens de todos los usuarios al inicio (en paralelo, reutilizando
+    # los que sigan vigentes en el caché cifrado)
+    print("🔐 Obteniendo tokens de acceso...\n")
+    token_manager = TokenManager(creator, users, cache_path=token_cache_path)
+    creator.token_manager = token_manager
+    errors = await asyncio.to_thread(token_manager.start)
+    
+    for user in users:
+        if user['user_id'] in errors:
+            error = errors[user['user_id']]
+            print(f"   ❌ Error obteniendo token para {user['user_id']}: {error}")
+            log.write(f"❌ Error token: {user['user_id']} - {error}\n")
+        else:
+            print(f"   ✅ Token obtenido: {user['user_id']}")
+    print(f"\n   💾 {token_manager.stats['from_cache']} tokens reutilizados del caché")
+    
+    existing = None
+    if check_existing:
+        print("\n🔎 Buscando playlists que ya existen en las cuentas...")
+        existing = await fetch_index(creator, token_manager, [user['user_id'] for user in users])
+        print(f"   📚 {len(existing)} playlists propias ({existing.stats['list_calls']} páginas listadas)")
+        if existing.stats['duplicates']:
+            print(f"   ⚠️ {existing.stats['duplicates']} con nombre repetido "
+                  f"({existing.stats['track_calls']} consultas para desempatar)")
+        for user_id in sorted(existing.incomplete):
+            print(f"   ❌ No se pudieron listar las playlists de {user_id}: sus canciones se crean igual")
+    
+    print("\n" + "="*70 + "\n")
+    
+    log_writer = OrderedLogWriter(log)
+    
+    # ===== DISTRIBUCIÓN SEGÚN CAPACIDAD =====
+    # Cada canción va al usuario con lugar que menos playlists lleva; los que
+    # no tienen token, están en 429, fallan seguido o llegaron a su cupo
+    # diario no reciben canciones mientras dure eso
+    assigner = UserAssigner(
+        token_manager, creator.scheduler, [user['user_id'] for user in users], in_flight,
+        quotas=quotas, ledger=ledger, events=creator.events
+    )
+    if isinstance(songs, QueueStream):
+        # No reclamar de la cola canciones que ningún usuario puede crear
+        songs.assigner = assigner
+    pipeline = PlaylistPipeline(
+        creator, token_manager, assigner, journal, promo_tracks, stats, log_writer,
+        total=catalog_size or len(songs), on_finish=on_finish, existing=existing,
+        positions=positions
+    )
+    try:
+        # La cola de trabajos ya entrega (song_idx, song) a medida que reclama
+        await pipeline.run(songs if hasattr(songs, '__aiter__') else enumerate(songs))
+    finally:
+        token_manager.stop()
+        stats['carriles'] = assigner.summary()
+
+
+def build_creator(user_count, in_flight_per_user=IN_FLIGHT_PER_USER, http2=False,
+                  events=None, covers=None):
+    """Creador contra las APIs reales (config.json), con conexiones para todos los carriles"""
+    from transport import HttpTransport
+    config = load_config()
+    transport = HttpTransport(
+        pool_size=max(POOL_SIZE_PER_HOST, user_count * in_flight_per_user * 2),
+        http2=http2
+    )
+    return SpotifyPlaylistCreator(
+        config['spotify_client_id'],
+        config['spotify_client_secret'],
+        config['genius_token'],
+        transport=transport,
+        covers=covers,
+        events=events
+    )
+
+
+def create_playlists_circular_distribution(in_flight_per_user=IN_FLIGHT_PER_USER, resume=False,
+                                           http2=False, songs=None, user_list=None, creator=None,
+                                           log_path='creation_log.txt',
+                                           journal_path=DEFAULT_JOURNAL_PATH,
+                                           token_cache_path=DEFAULT_TOKEN_CACHE_PATH,
+                                           metrics_path=DEFAULT_METRICS_PATH, metrics_port=None,
+                                           events_path=DEFAULT_EVENTS_PATH, log_level='info',
+                                           daily_quota=None, quota_path=DEFAULT_QUOTA_PATH,
+                                           stats=None, log_summary=True, job_queue=None,
+                                           check_existing=True, positions=None, catalog_size=None):
+    """
+    Crea playlists repartiendo las canciones entre usuarios
     
     Lógica:
-    - Canción 1 → Usuario 1
-    - Canción 2 → Usuario 2
-    - ...
-    - Canción 10 → Usuario 10
-    - Canción 11 → Usuario 1 (reinicia)
+    - Cada canción va al usuario con lugar libre que menos playlists lleva,
+      así el reparto final queda parejo
+    - Un usuario sin token, frenado por 429, con muchos errores seguidos o
+      que llegó a su cupo diario (`daily_quota`, o "daily_quota" en
+      users.json) deja de recibir canciones y los demás absorben su parte
+    
+    Las canciones pasan por un pipeline (enriquecimiento → render → escritura)
+    y cada usuario es un carril de escritura con hasta `in_flight_per_user`
+    playlists en curso al mismo tiempo
+    
+    Con resume=True se retoma la corrida anterior desde el journal de
+    progreso: solo se hacen los pasos que faltaron
+    
+    Con http2=True las peticiones se multiplexan sobre HTTP/2 (requiere httpx)
+    
+    Las métricas por llamada y por canción se guardan en metrics_path; con
+    metrics_port también se exponen en /metrics (Prometheus) durante la corrida
+    
+    Cada paso queda en events_path (JSONL, un evento 'playlist' por canción);
+    log_level='debug' agrega el detalle de cada llamada
+    
+    songs, user_list, creator y las rutas permiten correrlo sobre otros datos
+    (por ejemplo los benchmarks contra el servidor local); por defecto usa
+    Dragons_data.json, users.json y las APIs reales
+    Si se pasa `stats` (un dict) se va llenando durante la corrida
+    Con log_summary=False el log queda solo con las líneas de cada canción
+    (el modo por procesos arma el encabezado y el resumen, ver shards.py);
+    positions y catalog_size numeran esas líneas como en el catálogo completo
+    Con job_queue (un JobQueue) las canciones se reclaman de la cola
+    compartida en vez de salir de `songs` (ver jobqueue.py)
+    Con check_existing=False no se buscan las playlists que ya existen en
+    las cuentas: se crean todas (ver existing.py)
+    Retorna el dict de estadísticas
     """
-    creator = SpotifyPlaylistCreator(CLIENT_ID, CLIENT_SECRET, GENIUS_TOKEN)
+    if user_list is None:
+        user_list = load_users()
     
-    # Canciones promocionales (fijas para todas las playlists)
-    promo_tracks = [
-        "spotify:track:4pem1s55isBqZ6HDbuFRG9",  # Promo 1 Open Hearts
-        "spotify:track:0zWYg2LyzO3VjH2qoV6igp"   # Promo 2 Given up on Me
-    ]
+    stream = None
+    if job_queue is not None:
+        # Las canciones salen de la cola a medida que el pipeline tiene lugar
+        stream = QueueStream(job_queue, [user['user_id'] for user in user_list])
+        songs, skipped = stream, 0
+    else:
+        # 🔧 PRUEBA: Pasar songs=load_songs()[:10] (o `run --limit 10`) para probar solo 10 canciones
+        if songs is None:
+            songs = load_songs()
+        songs, skipped = playable_songs(songs)
+    
+    # Con la cola varias instancias comparten log y eventos: se agregan, no se truncan
+    append = resume or stream is not None
+    
+    if creator is None:
+        creator = build_creator(
+            len(user_list), in_flight_per_user, http2,
+            events=EventLog(events_path, level=log_level, append=append)
+        )
     
     print("\n" + "="*70)
     print("🎵 SPOTIFY PLAYLIST CREATOR - DISTRIBUCIÓN CIRCULAR")
     print("="*70)
     print(f"\n📊 Configuración:")
-    print(f"   • Total de usuarios: {len(users)}")
-    print(f"   • Total de canciones: {len(all_songs)}")
-    print(f"   • Playlists a crear: {len(all_songs)} (una por canción)")
-    print(f"   • Distribución: Circular entre {len(users)} usuarios")
+    print(f"   • Total de usuarios: {len(user_list)}")
+    print(f"   • Total de canciones: {len(songs)}")
+    if skipped:
+        print(f"   • Descartadas (repetidas o sin URI): {skipped}")
+    print(f"   • Playlists a crear: {len(songs)} (una por canción)")
+    print(f"   • Distribución: Según capacidad entre {len(user_list)} usuarios")
+    print(f"   • Playlists simultáneas por usuario: {in_flight_per_user}")
+    if daily_quota:
+        print(f"   • Cupo diario por usuario: {daily_quota}")
     print(f"   • Canciones por playlist: ~5 (1 principal + 2 extras + 2 promos)")
     print("\n" + "="*70 + "\n")
     
-    # Log
-    log = open('creation_log.txt', 'w', encoding='utf-8')
-    log.write(f"Inicio: {datetime.now()}\n")
-    log.write(f"Distribución Circular: {len(all_songs)} canciones entre {len(users)} usuarios\n\n")
-    
-    stats = {
-        'total_playlists': 0,
-        'total_errors': 0,
-        'total_songs_added': 0,
-        'playlists_por_usuario': {user['user_id']: 0 for user in users}
-    }
+    # Journal de progreso (al reanudar se leen los pasos ya completados); con
+    # la cola, el progreso de cada canción se guarda en su trabajo
+    if stream is not None:
+        journal = stream.journal
+        print(f"🗂️  Cola {os.path.relpath(job_queue.path, base_dir)}: {len(songs)} canciones pendientes "
+              f"(instancia {stream.worker_id})\n")
+    else:
+        journal = ProgressJournal(path=journal_path, resume=resume)
+        if resume:
+            print(f"♻️  Reanudando: {len(journal.state)} canciones con progreso previo\n")
     
-    # Obtener tokens de todos los usuarios al inicio
-    user_tokens = {}
-    print("🔐 Obteniendo tokens de acceso...\n")
-    for user in users:
-        try:
-            token = creator.get_access_token(user['refresh_token'])
-            user_tokens[user['user_id']] = token
-            print(f"   ✅ Token obtenido: {user['user_id']}")
-        except Exception as e:
-            print(f"   ❌ Error obteniendo token para {user['user_id']}: {e}")
-            log.write(f"❌ Error token: {user['user_id']} - {e}\n")
+    # Log (al reanudar se agrega al log existente en vez de truncarlo)
+    log = open(log_path, 'a' if append else 'w', encoding='utf-8')
+    if log_summary:
+        write_log_header(log, len(songs), len(user_list), append)
     
-    print("\n" + "="*70 + "\n")
+    # Un dict de afuera permite seguir el progreso desde otro hilo (ver shards.py)
+    if stats is None:
+        stats = {}
+    stats.update(new_stats(user_list))
     
-    # ===== DISTRIBUCIÓN CIRCULAR =====
-    # 🔧 PRUEBA: Cambiar all_songs por all_songs[:10] para probar solo 10 canciones
-    # 🔧 PRUEBA: Cambiar all_songs por all_songs[:1] para probar solo 1 canción
-    test_songs = all_songs[:1]  # ← CAMBIAR AQUÍ: [:1] = 1 canción, [:10] = 10 canciones, o quitar para todas
+    metrics_server = None
+    if metrics_port:
+        metrics_server = creator.metrics.serve(metrics_port)
+        print(f"📈 Métricas en http://127.0.0.1:{metrics_port}/metrics\n")
     
-    # print(f"⚠️  MODO PRUEBA: Procesando {len(test_songs)} de {len(all_songs)} canciones\n")
+    # Playlists creadas hoy por cada usuario (cuenta también corridas anteriores)
+    ledger = QuotaLedger(quota_path)
     
-    # Iterar sobre las canciones (de prueba o todas)
-    for song_idx, song in enumerate(all_songs):
-        # Calcular a qué usuario le toca (distribución circular)
-        user_idx = song_idx % len(users)  # Módulo para hacer circular
-        current_user = users[user_idx]
-        
-        # Verificar si tenemos token para este usuario
-        if current_user['user_id'] not in user_tokens:
-            print(f"⚠️ [{song_idx + 1}/{len(test_songs)}] Sin token para {current_user['user_id']}, saltando...")
-            stats['total_errors'] += 1
-            continue
-        
-        access_token = user_tokens[current_user['user_id']]
-        
-        try:
-            print(f"\n📝 [{song_idx + 1}/{len(test_songs)}] 👤 Usuario: {current_user['user_id']}")
-            print(f"   🎵 Canción: {song['song']} - {song['artist']}")
-            
-            # ===== OBTENER LETRA =====
-            # 🔧 MODO DEBUG: Comentar esta línea para probar sin letras
-            lyrics = creator.get_lyrics(song['song'], song['artist'])
-            # 🔧 MODO DEBUG: Descomentar esto para probar SIN buscar letras
-            # lyrics = None
-            # print(f"      ⚠️ MODO DEBUG: Saltando búsqueda de letra")
-            
-            # ===== CREAR TÍTULO Y DESCRIPCIÓN =====
-            # 🎨 AQUÍ SE GENERA EL NOMBRE DE LA PLAYLIST
-            # Puedes cambiarlo manualmente aquí si quieres un formato diferente:
-            playlist_name = creator.create_playlist_title(
-                song['song'], 
-                song['artist'], 
-                lyrics
-            )
-            
-            # 🎨 O usar un formato personalizado:
-            # playlist_name = f"{song['song']} - {song['artist']}"  # Simple
-            # playlist_name = f"🎵 {song['song']}"  # Solo canción con emoji
-            # playlist_name = f"{song['artist']}: {song['song']}"  # Artista primero
-            
-            playlist_description = creator.create_playlist_description(
-                lyrics
-            )
-            
-            print(f"   📋 Título: {playlist_name[:60]}...")
-            print(f"   📄 Descripción: {len(playlist_description)} caracteres")
-            
-            # Crear playlist
-            playlist = creator.create_playlist(
-                access_token,
-                current_user['user_id'],
-                playlist_name,
-                playlist_description
-            )
-            
-            playlist_id = playlist['id']
-            playlist_url = playlist['external_urls']['spotify']
-            print(f"   ✅ Playlist creada: {playlist_id}")
-            
-            # ===== Construcción de canciones =====
-            track_uris = []
-            
-            # 1) Canción principal
-            track_uris.append(song['uri'])
-            
-            # 2) Obtener 2 canciones adicionales del artista
-            extra_tracks = []
-            if song.get('artist_id'):
-                top_tracks = creator.get_artist_top_tracks(
-                    access_token, 
-                    song['artist_id'], 
-                    limit=5
-                )
-                # Evitar repetir la canción principal
-                extra_tracks = [
-                    t['uri'] for t in top_tracks 
-                    if t['uri'] != song['uri']
-                ][:2]
-            
-            # 3) Orden final: Principal → Promo1 → Extra1 → Promo2 → Extra2
-            ordered_tracks = [song['uri']]
-            
-            if len(promo_tracks) > 0:
-                ordered_tracks.append(promo_tracks[0])
-            
-            if len(extra_tracks) > 0:
-                ordered_tracks.append(extra_tracks[0])
-            
-            if len(promo_tracks) > 1:
-                ordered_tracks.append(promo_tracks[1])
-            
-            if len(extra_tracks) > 1:
-                ordered_tracks.append(extra_tracks[1])
-            
-            # Agregar canciones
-            if creator.add_tracks_to_playlist(access_token, playlist_id, ordered_tracks):
-                print(f"   ✅ {len(ordered_tracks)} canciones agregadas")
-                stats['total_songs_added'] += len(ordered_tracks)
-            else:
-                print(f"   ⚠️ Error agregando canciones")
-            
-            # Subir imagen
-            if song.get('image_url'):
-                if creator.upload_playlist_image(access_token, playlist_id, song['image_url']):
-                    print(f"   ✅ Imagen subida")
-                else:
-                    print(f"   ⚠️ Sin imagen")
-            
-            # Actualizar estadísticas
-            stats['total_playlists'] += 1
-            stats['playlists_por_usuario'][current_user['user_id']] += 1
-            
-            # Log
-            log.write(f"✅ [{song_idx + 1}] {current_user['user_id']} | {playlist_name} | {playlist_url}\n")
-            
-            # Delay entre peticiones (importante para evitar rate limits)
-            time.sleep(2)
-            
-        except Exception as e:
-            error_msg = f"❌ Error en canción {song_idx + 1}: {str(e)}"
-            print(f"   {error_msg}")
-            log.write(f"{error_msg}\n")
-            stats['total_errors'] += 1
-            time.sleep(3)
+    if stream is not None:
+        stream.start()
+    try:
+        asyncio.run(run_circular_distribution_async(
+            creator, songs, user_list, PROMO_TRACKS, in_flight_per_user, stats, log, journal,
+            token_cache_path, quotas=user_quotas(user_list, daily_quota), ledger=ledger,
+            on_finish=stream.on_finish if stream is not None else None,
+            check_existing=check_existing, positions=positions, catalog_size=catalog_size
+        ))
+    finally:
+        if stream is not None:
+            # Lo que quedó a medias (Ctrl+C) vuelve a la cola para otra instancia
+            stream.stats['released'] = stream.close()
+        ledger.save()
+        creator.events.flush()
+        journal.close()
+        creator.covers.close()
+        creator.transport.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if metrics_path:
+            creator.metrics.save_json(metrics_path)
     
     # ===== RESUMEN FINAL =====
     print("\n" + "="*70)
     print("🎉 PROCESO COMPLETADO")
     print("="*70)
     print(f"\n📊 Estadísticas Globales:")
-    print(f"   ✅ Playlists creadas: {stats['total_playlists']}/{len(test_songs)}")
+    print(f"   ✅ Playlists creadas: {created_count(stats)}/{len(songs)}")
     print(f"   🎵 Canciones agregadas: {stats['total_songs_added']}")
     print(f"   ❌ Errores: {stats['total_errors']}")
+    if resume:
+        print(f"   ♻️ Retomadas de la corrida anterior: {stats['total_resumed']}")
+    if stats['total_existing']:
+        print(f"   🔁 Ya existían en Spotify (no se crearon de nuevo): {stats['total_existing']}")
+    if stream is not None:
+        counts = job_queue.counts()
+        print(f"   🗂️  Cola: {stream.stats['done']} completadas acá, {stream.stats['requeued']} devueltas "
+              f"para reintentar, {stream.stats['no_lane']} sin usuario libre, "
+              f"{stream.stats['lost_leases']} leases perdidos | quedan "
+              f"{counts.get(PENDING, 0)} pendientes, {counts.get(FAILED, 0)} fallidas")
+    print(f"   🚦 Peticiones HTTP: {creator.scheduler.stats['requests']} "
+          f"(429 recibidos: {creator.scheduler.stats['throttled']})")
+    lyrics_stats = creator.lyrics_cache.stats
+    print(f"   💾 Caché de letras: {lyrics_stats['hits'] + lyrics_stats['negative_hits']} aciertos, "
+          f"{lyrics_stats['misses']} consultas a Genius")
+    top_stats = creator.top_tracks_cache.stats
+    print(f"   💾 Caché de top tracks: {top_stats['hits']} aciertos, "
+          f"{top_stats['coalesced']} combinadas, {top_stats['fetches']} consultas a Spotify")
+    cover_stats = creator.covers.stats
+    print(f"   🖼️  Portadas: {cover_stats['hits']} desde caché, {cover_stats['downloads']} descargadas, "
+          f"{cover_stats['recompressed']} recomprimidas")
     
     if stats['total_playlists'] > 0:
-        success_rate = (stats['total_playlists'] / len(test_songs) * 100)
+        success_rate = (stats['total_playlists'] / len(songs) * 100)
         print(f"   📈 Tasa de éxito: {success_rate:.1f}%")
     
-    print(f"\n📊 Distribución por Usuario:")
-    for user_id, count in stats['playlists_por_usuario'].items():
-        print(f"   • {user_id}: {count} playlists")
+    print_summary(creator.metrics.summary())
+    
+    print_user_distribution(stats)
     
-    print(f"\n📄 Log detallado: creation_log.txt")
+    print(f"\n📄 Log detallado: {log_path}")
+    if creator.events.file is not None:
+        print(f"🧾 Eventos: {creator.events.file.name}")
+    if metrics_path:
+        print(f"📈 Métricas: {metrics_path}")
     print("="*70 + "\n")
     
     # Guardar log final
+    if log_summary:
+        write_log_summary(log, stats, resume)
+    log.close()
+    
+    return stats
+
+
+def new_stats(user_list):
+    return {
+        'total_playlists': 0,
+        'total_errors': 0,
+        'total_songs_added': 0,
+        'total_resumed': 0,
+        'total_existing': 0,
+        'playlists_por_usuario': {user['user_id']: 0 for user in user_list}
+    }
+
+
+def print_user_distribution(stats):
+    print(f"\n📊 Distribución por Usuario:")
+    lanes = stats.get('carriles', {})
+    for user_id, count in stats['playlists_por_usuario'].items():
+        lane = lanes.get(user_id)
+        detail = ""
+        if lane:
+            if lane['error_rate']:
+                detail += f" | errores recientes {lane['error_rate']:.0%}"
+            if lane['rests']:
+                detail += f" | {lane['rests']} descansos"
+            if lane['quota']:
+                detail += f" | cupo {lane['used_today']}/{lane['quota']} hoy"
+        print(f"   • {user_id}: {count} playlists{detail}")
+
+
+def write_log_header(log, song_count, user_count, resume=False, started=None, detail=""):
+    """Encabezado de creation_log.txt"""
+    started = started or datetime.now()
+    if resume:
+        log.write(f"\n{'='*60}\nReanudación: {started}\n")
+    log.write(f"Inicio: {started}\n")
+    log.write(f"Distribución según capacidad: {song_count} canciones entre {user_count} usuarios{detail}\n\n")
+
+
+def created_count(stats):
+    """Playlists creadas de verdad: total_playlists también cuenta las que ya existían"""
+    return stats['total_playlists'] - stats.get('total_existing', 0)
+
+
+def write_log_summary(log, stats, resume=False):
+    """Resumen al final de creation_log.txt"""
     log.write(f"\n{'='*60}\n")
     log.write(f"Fin: {datetime.now()}\n")
-    log.write(f"Playlists creadas: {stats['total_playlists']}\n")
+    log.write(f"Playlists creadas: {created_count(stats)}\n")
     log.write(f"Canciones agregadas: {stats['total_songs_added']}\n")
-    log.write(f"Errores: {stats['total_errors']}\n\n")
+    log.write(f"Errores: {stats['total_errors']}\n")
+    if resume:
+        log.write(f"Retomadas: {stats['total_resumed']}\n")
+    if stats.get('total_existing'):
+        log.write(f"Ya existían en Spotify: {stats['total_existing']}\n")
+    log.write("\n")
     log.write("Distribución por usuario:\n")
     for user_id, count in stats['playlists_por_usuario'].items():
         log.write(f"  {user_id}: {count} playlists\n")
-    log.close()
 
 
-if __name__ == "__main__":
-    # Verificar archivos necesarios
-    required = ['./Credencials/config.json', './Credencials/users.json', './outputs/Dragons_data.json']
-    missing = [f for f in required if not os.path.exists(os.path.join(base_dir, f))]
-    
+# ===== LÍNEA DE COMANDOS =====
+
+REQUIRED_FILES = {
+    'config': config_path,
+    'users': users_path,
+    'songs': songs_path,
+}
+
+
+def check_files(*names, catalog=None):
+    """Verifica que existan los archivos necesarios para un comando (catalog: --catalog)"""
+    paths = [
+        catalog if name == 'songs' and catalog else REQUIRED_FILES[name]
+        for name in names
+    ]
+    missing = [path for path in paths if not os.path.exists(path)]
     if missing:
-        print(f"❌ Faltan archivos: {', '.join(missing)}")
-        exit(1)
+        print(f"❌ Faltan archivos: {', '.join(os.path.relpath(f, base_dir) for f in missing)}")
+        sys.exit(1)
+
+
+def confirm(args):
+    """Pide confirmación salvo con --yes (sin terminal no se puede preguntar)"""
+    if args.yes:
+        return True
+    if not sys.stdin.isatty():
+        print("❌ No hay terminal para confirmar: usar --yes")
+        return False
+    return input("¿Continuar? (si/no): ").lower() in ['si', 's', 'yes', 'y']
+
+
+def selected_songs(args):
+    print(f"📀 Canciones de {os.path.relpath(args.catalog or songs_path, base_dir)}")
+    songs, _ = playable_songs(load_songs(args.catalog))
+    return songs[:args.limit] if args.limit else songs
+
+
+def print_plan(song_count, users, in_flight):
+    # Tiempo estimado: cada slot tarda ~SECONDS_PER_PLAYLIST por playlist
+    parallel_slots = max(1, len(users) * in_flight)
     
     print("\n" + "="*70)
     print("⚠️  INFORMACIÓN IMPORTANTE")
     print("="*70)
     print(f"\n📋 Se crearán:")
-    print(f"   • {len(all_songs)} playlists (una por cada canción del JSON)")
-    print(f"   • Distribuidas circularmente entre {len(users)} usuarios")
+    print(f"   • {song_count} playlists (una por cada canción del JSON)")
+    print(f"   • Repartidas entre {len(users)} usuarios según la capacidad de cada uno")
+    print(f"   • {in_flight} playlists simultáneas por usuario")
     print(f"   • Cada playlist tendrá ~5 canciones (1 principal + extras + promos)")
-    print(f"\n⏱️  Tiempo estimado: ~{len(all_songs) * 2 / 60:.0f} minutos")
+    print(f"\n⏱️  Tiempo estimado: ~{song_count * SECONDS_PER_PLAYLIST / parallel_slots / 60:.0f} minutos")
     print(f"⚠️  No interrumpir el proceso hasta completar")
     print("="*70 + "\n")
+
+
+def cmd_run(args, resume=False):
+    if args.queue:
+        return cmd_run_queue(args)
+    check_files('config', 'users', 'songs', catalog=args.catalog)
+    songs = selected_songs(args)
+    users = load_users()
+    print_plan(len(songs), users, args.in_flight)
     
-    confirm = input("¿Continuar? (si/no): ").lower()
+    if not confirm(args):
+        print("\n❌ Proceso cancelado.")
+        return 1
     
-    if confirm in ['si', 's', 'yes', 'y']:
-        create_playlists_circular_distribution()
-    else:
-        print("\n❌ Proceso cancelado.")
\ No newline at end of file
+    if args.shards > 1:
+        from shards import run_sharded
+        stats = run_sharded(
+            args.shards,
+            in_flight_per_user=args.in_flight,
+            resume=resume,
+            http2=args.http2,
+            songs=songs,
+            user_list=users,
+            journal_path=args.journal,
+            metrics_port=args.metrics_port,
+            log_level=args.log_level,
+            daily_quota=args.daily_quota,
+            check_existing=not args.ignore_existing
+        )
+        return 0 if stats['total_errors'] == 0 else 2
+    
+    stats = create_playlists_circular_distribution(
+        in_flight_per_user=args.in_flight,
+        resume=resume,
+        http2=args.http2,
+        songs=songs,
+        user_list=users,
+        journal_path=args.journal,
+        metrics_port=args.metrics_port,
+        log_level=args.log_level,
+        daily_quota=args.daily_quota,
+        check_existing=not args.ignore_existing
+    )
+    return 0 if stats['total_errors'] == 0 else 2
+
+
+def cmd_run_queue(args):
+    """Toma canciones de la cola compartida hasta que no quede nada (ver jobqueue.py)"""
+    if args.shards > 1:
+        print("❌ --queue y --shards no se combinan: para más procesos, correr varias instancias con --queue")
+        return 1
+    check_files('config', 'users')
+    users = load_users()
+    job_queue = JobQueue(args.queue)
+    try:
+        if not len(job_queue):
+            print("❌ La cola está vacía: correr primero `python creator.py queue load`")
+            return 1
+        print_plan(job_queue.claimable([user['user_id'] for user in users]), users, args.in_flight)
+        
+        if not confirm(args):
+            print("\n❌ Proceso cancelado.")
+            return 1
+        
+        stats = create_playlists_circular_distribution(
+            in_flight_per_user=args.in_flight,
+            http2=args.http2,
+            user_list=users,
+            metrics_port=args.metrics_port,
+            log_level=args.log_level,
+            daily_quota=args.daily_quota,
+            check_existing=not args.ignore_existing,
+            job_queue=job_queue
+        )
+    finally:
+        job_queue.close()
+    return 0 if stats['total_errors'] == 0 else 2
+
+
+def cmd_resume(args):
+    return cmd_run(args, resume=True)
+
+
+def cmd_dry_run(args):
+    """Muestra el reparto y qué falta hacer, sin llamar a ninguna API"""
+    check_files('users', 'songs', catalog=args.catalog)
+    songs = selected_songs(args)
+    users = load_users()
+    state = load_journal(args.journal)
+    
+    print_plan(len(songs), users, args.in_flight)
+    
+    # Reparto estimado con la regla de la corrida real suponiendo que todos
+    # los usuarios responden igual: el que menos lleva (y no llegó a su cupo
+    # diario) toma la siguiente; la playlist ya creada se queda con su usuario.
+    # En la corrida real un usuario frenado o sin token recibe menos
+    quotas = user_quotas(users, args.daily_quota)
+    ledger = QuotaLedger()
+    assigned = {user['user_id']: 0 for user in users}
+    per_user = {user['user_id']: 0 for user in users}
+    unassigned = done = 0
+    print(f"📝 Primeras {min(args.show, len(songs))} asignaciones (estimadas):")
+    for song_idx, song in enumerate(songs):
+        song_state = state.get(song_key(song), {})
+        if song_state.get(STEP_DONE):
+            done += 1
+            if song_state.get('user_id') in assigned:
+                assigned[song_state['user_id']] += 1
+            continue
+        owner = song_state.get('user_id') if song_state.get(STEP_PLAYLIST) else None
+        if owner not in assigned:
+            available = [
+                user_id for user_id in assigned
+                if quotas[user_id] is None or ledger.used(user_id) + per_user[user_id] < quotas[user_id]
+            ]
+            if not available:
+                unassigned += 1
+                continue
+            owner = min(available, key=lambda user_id: assigned[user_id])
+        assigned[owner] += 1
+        per_user[owner] += 1
+        if song_idx < args.show:
+            print(f"   [{song_idx + 1}] {song.song} - {song.artist} → {owner}")
+    
+    print(f"\n📊 Pendientes por usuario ({done} ya completadas en el journal):")
+    for user_id, count in per_user.items():
+        quota = f" (cupo diario {quotas[user_id]}, usado hoy {ledger.used(user_id)})" if quotas[user_id] else ""
+        print(f"   • {user_id}: {count} playlists{quota}")
+    if unassigned:
+        print(f"   ⚠️ {unassigned} canciones no entran en los cupos diarios de hoy")
+    return 0
+
+
+def cmd_stats(args):
+    """Progreso registrado en el journal y tamaño de los cachés"""
+    state = load_journal(args.journal)
+    steps = [STEP_PLAYLIST, STEP_TRACKS, STEP_IMAGE, STEP_DONE]
+    counts = {step: sum(1 for song_state in state.values() if song_state.get(step)) for step in steps}
+    
+    print("\n" + "="*70)
+    print("📊 PROGRESO")
+    print("="*70)
+    print(f"\n📄 Journal: {os.path.relpath(args.journal, base_dir)}")
+    print(f"   • Canciones con progreso: {len(state)}")
+    print(f"   • Playlists creadas: {counts[STEP_PLAYLIST]}")
+    print(f"   • Con canciones agregadas: {counts[STEP_TRACKS]}")
+    print(f"   • Con imagen: {counts[STEP_IMAGE]}")
+    print(f"   • Completas: {counts[STEP_DONE]}")
+    
+    per_user = {}
+    for song_state in state.values():
+        if song_state.get(STEP_PLAYLIST):
+            per_user[song_state['user_id']] = per_user.get(song_state['user_id'], 0) + 1
+    if per_user:
+        print(f"\n📊 Playlists por usuario:")
+        for user_id, count in sorted(per_user.items()):
+            print(f"   • {user_id}: {count}")
+    
+    # Los cachés se abren solo si ya existen (stats no crea archivos)
+    if os.path.exists(DEFAULT_CACHE_PATH):
+        lyrics_cache, top_tracks_cache = LyricsCache(), TopTracksCache()
+        print(f"\n💾 Caché: {len(lyrics_cache)} letras, {len(top_tracks_cache)} artistas con top tracks")
+        lyrics_cache.close()
+        top_tracks_cache.close()
+    if os.path.isdir(DEFAULT_COVERS_DIR):
+        print(f"🖼️  Portadas en caché: {len(os.listdir(DEFAULT_COVERS_DIR))}")
+    if os.path.exists(DEFAULT_METRICS_PATH):
+        with open(DEFAULT_METRICS_PATH, 'r', encoding='utf-8') as f:
+            print(f"\n📈 Última corrida ({os.path.relpath(DEFAULT_METRICS_PATH, base_dir)}):", end="")
+            print_summary(json.load(f))
+    if os.path.exists(DEFAULT_QUEUE_PATH):
+        job_queue = JobQueue()
+        counts = job_queue.counts()
+        print(f"\n🗂️  Cola: {counts.get(PENDING, 0)} pendientes, {counts.get(LEASED, 0)} en curso, "
+              f"{counts.get(DONE, 0)} completas, {counts.get(FAILED, 0)} fallidas")
+        job_queue.close()
+    print("="*70 + "\n")
+    return 0
+
+
+def cmd_queue(args):
+    """Carga el catálogo en la cola, muestra su estado o reintenta las fallidas"""
+    if args.action == 'load':
+        check_files('songs', catalog=args.catalog)
+    job_queue = JobQueue(args.queue)
+    try:
+        if args.action == 'load':
+            songs = selected_songs(args)
+            added = job_queue.load(songs)
+            print(f"🗂️  {added} canciones agregadas a la cola ({len(songs) - added} ya estaban)")
+        elif args.action == 'retry':
+            print(f"🔁 {job_queue.retry_failed()} canciones fallidas vuelven a pendientes")
+        
+        counts = job_queue.counts()
+        print("\n" + "="*70)
+        print(f"🗂️  COLA ({os.path.relpath(job_queue.path, base_dir)})")
+        print("="*70)
+        print(f"\n   • Pendientes: {counts.get(PENDING, 0)}")
+        print(f"   • En curso: {counts.get(LEASED, 0)}")
+        print(f"   • Completas: {counts.get(DONE, 0)}")
+        print(f"   • Fallidas: {counts.get(FAILED, 0)}")
+        if args.action == 'status':
+            workers = job_queue.workers()
+            if workers:
+                print(f"\n🖥️  Instancias con canciones tomadas:")
+                now = time.time()
+                for worker_id, (count, expires) in sorted(workers.items()):
+                    print(f"   • {worker_id}: {count} (el lease vence en {max(0, expires - now):.0f}s)")
+            per_user = job_queue.done_per_user()
+            if per_user:
+                print(f"\n📊 Playlists completas por usuario:")
+                for user_id, count in sorted(per_user.items()):
+                    print(f"   • {user_id}: {count}")
+        print("="*70 + "\n")
+    finally:
+        job_queue.close()
+    return 0
+
+
+COMMANDS = {
+    'run': cmd_run,
+    'resume': cmd_resume,
+    'dry-run': cmd_dry_run,
+    'stats': cmd_stats,
+    'queue': cmd_queue,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Creador masivo de playlists en Spotify")
+    subparsers = parser.add_subparsers(dest='command', metavar='{run,resume,dry-run,stats,queue}')
+    
+    # Opciones comunes
+    journal_options = argparse.ArgumentParser(add_help=False)
+    journal_options.add_argument(
+        '--journal', default=DEFAULT_JOURNAL_PATH,
+        help="Journal de progreso (por defecto outputs/progress_journal.jsonl)"
+    )
+    plan_options = argparse.ArgumentParser(add_help=False)
+    plan_options.add_argument(
+        '--in-flight', type=int, default=IN_FLIGHT_PER_USER,
+        help="Playlists simultáneas por usuario"
+    )
+    plan_options.add_argument(
+        '--limit', type=int, default=0,
+        help="Procesa solo las primeras N canciones del catálogo (para pruebas)"
+    )
+    plan_options.add_argument(
+        '--catalog', default=None,
+        help="Toma las canciones del catálogo de getSongList/ingest.py (.json o .parquet) "
+             "en vez de outputs/Dragons_data.json"
+    )
+    plan_options.add_argument(
+        '--daily-quota', type=int, default=None,
+        help="Máximo de playlists por usuario por día (users.json puede fijar \"daily_quota\" por usuario)"
+    )
+    run_options = argparse.ArgumentParser(add_help=False)
+    run_options.add_argument(
+        '--http2', action='store_true',
+        help="Usa HTTP/2 para multiplexar las peticiones (requiere httpx[http2])"
+    )
+    run_options.add_argument(
+        '--metrics-port', type=int, default=None,
+        help="Expone las métricas en http://127.0.0.1:PUERTO/metrics (Prometheus) durante la corrida"
+    )
+    run_options.add_argument(
+        '--shards', type=int, default=1,
+        help="Reparte usuarios y canciones entre N procesos (uno por núcleo)"
+    )
+    run_options.add_argument(
+        '--queue', nargs='?', const=DEFAULT_QUEUE_PATH, default=None,
+        help="Toma las canciones de la cola compartida (por defecto outputs/jobs.sqlite); "
+             "se pueden correr varias instancias a la vez"
+    )
+    run_options.add_argument(
+        '--ignore-existing', action='store_true',
+        help="No busca las playlists que ya existen en las cuentas: crea una por canción igual"
+    )
+    run_options.add_argument(
+        '--log-level', choices=list(LEVELS), default='info',
+        help="debug registra cada paso en outputs/events.jsonl; en consola, una línea por playlist"
+    )
+    run_options.add_argument(
+        '-y', '--yes', action='store_true',
+        help="No pide confirmación (para scripts y cron)"
+    )
+    
+    run_parser = subparsers.add_parser(
+        'run', parents=[journal_options, plan_options, run_options],
+        help="Crea las playlists (corrida nueva)"
+    )
+    # Compatibilidad con `python creator.py --resume`
+    run_parser.add_argument('--resume', action='store_true', help=argparse.SUPPRESS)
+    subparsers.add_parser(
+        'resume', parents=[journal_options, plan_options, run_options],
+        help="Reanuda la corrida anterior usando el journal de progreso"
+    )
+    dry_run_parser = subparsers.add_parser(
+        'dry-run', parents=[journal_options, plan_options],
+        help="Muestra el reparto de canciones sin llamar a ninguna API"
+    )
+    dry_run_parser.add_argument('--show', type=int, default=10, help="Asignaciones a mostrar")
+    subparsers.add_parser(
+        'stats', parents=[journal_options],
+        help="Muestra el progreso del journal y los cachés"
+    )
+    queue_parser = subparsers.add_parser(
+        'queue', help="Cola de trabajos compartida entre instancias: load, status, retry"
+    )
+    queue_parser.add_argument(
+        'action', choices=['load', 'status', 'retry'],
+        help="load: carga el catálogo; status: estado; retry: vuelve a pendientes las fallidas"
+    )
+    queue_parser.add_argument(
+        '--queue', default=DEFAULT_QUEUE_PATH,
+        help="Archivo de la cola (por defecto outputs/jobs.sqlite)"
+    )
+    queue_parser.add_argument(
+        '--limit', type=int, default=0,
+        help="Carga solo las primeras N canciones del catálogo (para pruebas)"
+    )
+    queue_parser.add_argument(
+        '--catalog', default=None,
+        help="Carga el catálogo de getSongList/ingest.py en vez de outputs/Dragons_data.json"
+    )
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Sin subcomando se comporta como antes: `run`
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = ['run'] + argv
+    
+    args = build_parser().parse_args(argv)
+    if args.command == 'run' and args.resume:
+        args.command = 'resume'
+    return COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
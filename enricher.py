@@ -0,0 +1,179 @@
+"""
+Completa la metadata del catálogo con la API de Spotify, de a 50 ids por llamada
+- GET /tracks?ids=   artist_id, image_url (portada del álbum) y popularity
+- GET /artists?ids=  imagen del artista si la canción no tiene portada
+Las llamadas corren en paralelo (pasan por el RequestScheduler del creator:
+rate limit y reintentos en 429): 10.000 canciones ≈ 200 llamadas
+
+    python enricher.py                  → completa outputs/catalog.* en el lugar
+    python enricher.py --refresh        → vuelve a pedir todo (datos viejos)
+
+Por defecto solo se piden las filas que nunca se pidieron (columna
+enriched_at, se marca aunque la API no traiga portada o popularidad), así
+que volver a correrlo sobre el mismo catálogo no hace ninguna llamada
+"""
+import argparse
+import concurrent.futures
+import threading
+from datetime import date
+
+from catalog import load_catalog, find_catalog
+from creator import SpotifyPlaylistCreator, load_config, MAX_IDS_PER_REQUEST
+
+# Campos que completa /tracks
+TRACK_FIELDS = ('artist_id', 'image_url', 'popularity')
+
+# Llamadas simultáneas
+MAX_WORKERS = 8
+
+
+def _track_id(uri):
+    if uri and uri.startswith("spotify:track:"):
+        return uri.rsplit(":", 1)[-1]
+    return None
+
+
+def _batches(ids, size):
+    ids = list(ids)
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+class CatalogEnricher:
+    def __init__(self, creator, max_workers=MAX_WORKERS, market=None, refresh=False):
+        self.creator = creator
+        self.max_workers = max_workers
+        self.market = market
+        self.refresh = refresh
+        self.batch_size = MAX_IDS_PER_REQUEST
+        self.access_token = None
+        self.token_lock = threading.Lock()
+        self.stats = {
+            'requests': 0,      # llamadas a /tracks y /artists
+            'errors': 0,        # llamadas fallidas (sus filas quedan como estaban)
+            'enriched': 0,      # filas con algún campo nuevo
+            'not_found': 0,     # URIs que Spotify no reconoce
+        }
+
+    def _token(self):
+        # Se pide recién si hay algo que completar
+        with self.token_lock:
+            if self.access_token is None:
+                self.access_token = self.creator.get_client_token()
+            return self.access_token
+
+    def _fetch_all(self, fetch, ids):
+        """
+        Pide todos los ids en tandas de batch_size, en paralelo
+        Retorna ({id: metadata}, ids de las tandas que fallaron)
+        """
+        batches = _batches(ids, self.batch_size)
+        if not batches:
+            return {}, set()
+
+        found, failed = {}, set()
+        with concurrent.futures.ThreadPoolExecutor(min(self.max_workers, len(batches))) as pool:
+            for batch, result in zip(batches, pool.map(fetch, batches)):
+                self.stats['requests'] += 1
+                if result is None:
+                    self.stats['errors'] += 1
+                    failed.update(batch)
+                else:
+                    found.update(result)
+        return found, failed
+
+    def _fetch_tracks(self, track_ids):
+        return self.creator.get_tracks(self._token(), track_ids, market=self.market)
+
+    def _fetch_artists(self, artist_ids):
+        return self.creator.get_artists(self._token(), artist_ids)
+
+    def enrich(self, catalog):
+        """Completa las columnas del catálogo en el lugar y lo retorna"""
+        columns = catalog.columns
+        enriched = set()
+
+        # Filas por id de canción (la misma URI puede aparecer más de una vez)
+        rows_by_track = {}
+        for row, uri in enumerate(columns['uri']):
+            track_id = _track_id(uri)
+            if track_id and (self.refresh or columns['enriched_at'][row] is None):
+                rows_by_track.setdefault(track_id, []).append(row)
+
+        tracks, failed = self._fetch_all(self._fetch_tracks, rows_by_track)
+        today = date.today().isoformat()
+        fetched = set()
+        for track_id, rows in rows_by_track.items():
+            # Si su tanda falló no se sabe si existe: ya cuenta en errors y
+            # se vuelve a pedir la próxima vez
+            if track_id in failed:
+                continue
+            for row in rows:
+                columns['enriched_at'][row] = today
+            track = tracks.get(track_id)
+            if track is None:
+                self.stats['not_found'] += 1
+                continue
+            fetched.update(rows)
+            for row in rows:
+                for field in TRACK_FIELDS:
+                    # Lo que dice la API reemplaza lo que venía del scraping
+                    if track[field] is not None and columns[field][row] != track[field]:
+                        columns[field][row] = track[field]
+                        enriched.add(row)
+
+        # Sin portada: la imagen del artista (sin imagen no se sube portada).
+        # Solo para las filas pedidas ahora: las demás ya se buscaron antes
+        rows_by_artist = {}
+        for row in sorted(fetched):
+            artist_id = columns['artist_id'][row]
+            if artist_id and not columns['image_url'][row]:
+                rows_by_artist.setdefault(artist_id, []).append(row)
+
+        artists, _ = self._fetch_all(self._fetch_artists, rows_by_artist)
+        for artist_id, rows in rows_by_artist.items():
+            image_url = (artists.get(artist_id) or {}).get('image_url')
+            if image_url:
+                for row in rows:
+                    columns['image_url'][row] = image_url
+                    enriched.add(row)
+
+        self.stats['enriched'] = len(enriched)
+        return catalog
+
+
+def enrich_catalog(catalog, refresh=False):
+    """Completa el catálogo usando las credenciales de config.json e imprime el resumen"""
+    config = load_config()
+    creator = SpotifyPlaylistCreator(
+        config['spotify_client_id'], config['spotify_client_secret'], config['genius_token']
+    )
+    enricher = CatalogEnricher(creator, refresh=refresh)
+    print(f"🔎 Completando metadata de {len(catalog)} canciones...")
+    try:
+        enricher.enrich(catalog)
+    finally:
+        creator.transport.close()
+
+    stats = enricher.stats
+    print(f"   ✅ {stats['enriched']} filas completadas con {stats['requests']} llamadas   "
+          f"⚠️ No encontradas: {stats['not_found']}   ❌ Errores: {stats['errors']}")
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Completa artist_id, image_url y popularity del catálogo")
+    parser.add_argument('catalog', nargs='?', default=None,
+                        help="Catálogo a completar (por defecto outputs/catalog.*)")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Vuelve a pedir todas las filas, no solo las incompletas")
+    args = parser.parse_args()
+
+    path = args.catalog or find_catalog()
+    catalog = load_catalog(path)
+    enrich_catalog(catalog, refresh=args.refresh)
+    catalog.save(path)
+    print(f"✅ Catálogo guardado en: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Log de eventos estructurado: una línea JSON por evento en outputs/events.jsonl
+
+    {"ts": 1718000000.123, "level": "info", "event": "playlist", "user_id": "...", ...}
+
+- Niveles (debug < info < warning < error): un evento por debajo del nivel
+  configurado se descarta antes de armar nada, así el debug apagado no cuesta
+- Un hilo aparte escribe en tandas (archivo y consola): el hilo que crea
+  playlists solo encola el evento y sigue
+- Los secretos nunca llegan al archivo: el valor de campos como
+  Authorization/access_token/refresh_token (también dentro de dicts, por
+  ejemplo headers) se reemplaza por ***. En el texto libre (mensajes,
+  errores que repiten una URL o un header) se tapan solo los valores con
+  forma de credencial: "Bearer <token>" o access_token=<token>; "Bearer of
+  Bad News" es una canción y queda como está
+
+Los eventos con `msg` además se muestran en la consola (texto para humanos)
+
+    creator.py run --log-level debug     → también el detalle de cada paso (en el archivo)
+"""
+import atexit
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EVENTS_PATH = os.path.join(base_dir, "./outputs/events.jsonl")
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR}
+LEVEL_NAMES = {number: name for name, number in LEVELS.items()}
+
+# Cada cuánto se vuelca lo encolado aunque no se haya juntado una tanda
+FLUSH_INTERVAL = 0.5
+
+# Campos cuyo valor nunca se escribe (se comparan en minúsculas)
+SECRET_KEYS = {
+    'authorization', 'access_token', 'refresh_token', 'client_secret',
+    'genius_token', 'token', 'password'
+}
+REDACTED = "***"
+
+# Credenciales dentro de texto: "Bearer xxx", "Basic xxx" y clave=valor o
+# "clave": "valor" con las claves de SECRET_KEYS. El valor tiene que parecer
+# un token (20+ caracteres sin espacios) para no tocar títulos ni letras
+_SECRET_TEXT = re.compile(
+    r'\b((?:Bearer|Basic)\s+|(?:' + '|'.join(sorted(SECRET_KEYS)) + r')["\']?\s*[:=]\s*["\']?)'
+    r'[A-Za-z0-9._~+/=-]{20,}',
+    re.IGNORECASE
+)
+
+_STOP = object()
+
+
+def redact(value):
+    """
+    Copia del valor con los campos secretos tapados (dicts y listas,
+    recursivo) y las credenciales que aparezcan dentro de los strings
+    """
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if str(key).lower() in SECRET_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str):
+        return _SECRET_TEXT.sub(lambda m: m.group(1) + REDACTED, value)
+    return value
+
+
+class EventLog:
+    def __init__(self, path=None, level=INFO, append=False, console=sys.stdout,
+                 flush_interval=FLUSH_INTERVAL):
+        """
+        path: archivo JSONL (None = solo consola)
+        append: True al reanudar una corrida (si no, se empieza un archivo nuevo)
+        """
+        self.level = LEVELS.get(level, level)
+        self.console = console
+        self.flush_interval = flush_interval
+        self.file = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Buffer grande: el hilo escritor vuelca tandas enteras
+            self.file = open(path, 'a' if append else 'w', encoding='utf-8', buffering=1 << 16)
+
+        self.queue = queue.SimpleQueue()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='events', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    # ===== REGISTRO =====
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, event, msg=None, **fields):
+        """
+        Encola un evento; msg (opcional) es la línea para la consola
+        Los valores se serializan en el hilo escritor: no pasar objetos que
+        se sigan modificando después
+        """
+        if level < self.level or self.closed:
+            return
+        self.queue.put((time.time(), level, event, msg, fields))
+
+    def debug(self, event, msg=None, **fields):
+        self.log(DEBUG, event, msg, **fields)
+
+    def info(self, event, msg=None, **fields):
+        self.log(INFO, event, msg, **fields)
+
+    def warning(self, event, msg=None, **fields):
+        self.log(WARNING, event, msg, **fields)
+
+    def error(self, event, msg=None, **fields):
+        self.log(ERROR, event, msg, **fields)
+
+    # ===== ESCRITURA (hilo aparte) =====
+
+    def _run(self):
+        while True:
+            try:
+                items = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # Todo lo que ya está encolado va en la misma tanda
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            lines, console_lines, waiters = [], [], []
+            for item in items:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    self._format(item, lines, console_lines)
+            self._write(lines, console_lines)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _format(self, item, lines, console_lines):
+        ts, level, event, msg, fields = item
+        if self.file is not None:
+            entry = {'ts': round(ts, 3), 'level': LEVEL_NAMES.get(level, level), 'event': event}
+            entry.update(redact(fields))
+            if msg:
+                entry['msg'] = redact(msg)
+            lines.append(json.dumps(entry, ensure_ascii=False, default=str))
+        if msg and self.console is not None:
+            console_lines.append(redact(msg))
+
+    def _write(self, lines, console_lines):
+        try:
+            if lines:
+                self.file.write('\n'.join(lines) + '\n')
+                self.file.flush()
+            if console_lines:
+                self.console.write('\n'.join(console_lines) + '\n')
+                self.console.flush()
+        except (OSError, ValueError):
+            # Consola o archivo cerrados al salir: el evento se pierde, la corrida no
+            pass
+
+    def flush(self):
+        """Espera a que todo lo encolado esté escrito"""
+        if self.closed:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self.thread.join()
+        if self.file is not None:
+            self.file.close()
+        atexit.unregister(self.close)
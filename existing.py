@@ -0,0 +1,188 @@
+"""
+Playlists que ya existen en cada cuenta, para no crearlas de nuevo
+(antes una corrida repetida o cortada dejaba duplicados que se borraban a mano)
+
+Antes de empezar se listan las playlists de cada usuario (GET /me/playlists,
+de a 50: la primera página da el total y el resto se pide todo a la vez) y
+se arma un índice en memoria:
+- por nombre: el título que textrender genera para la canción
+- por primera canción: la canción principal va primera en cada playlist
+  (ver build_ordered_tracks); el listado no la trae, así que se consulta
+  solo para los nombres repetidos (una llamada por playlist repetida)
+
+Una playlist es de la canción solo si su nombre es el que textrender arma
+para esa canción tomando la descripción de la playlist (la letra) como
+letra: así se confirma con lo que trae el listado, sin una llamada por
+canción, y una playlist ajena (llena o vacía) que se llame igual no se toma
+
+Antes de enriquecer, una canción que ya tiene playlist en alguna cuenta:
+- con canciones → se da por completa: no se consulta Genius ni top tracks
+  ni se escribe nada
+- vacía (la corrida se cortó después de crearla) → se adopta: su dueño le
+  agrega las canciones y la portada
+
+Repetir la corrida sobre el catálogo ya procesado cuesta unas pocas
+llamadas por usuario en vez de ~5 escrituras por canción
+
+    creator.py run --ignore-existing    → crea todas igual (como antes)
+"""
+import asyncio
+import bisect
+import html
+import threading
+
+from textrender import render_title, NO_LYRICS_DESCRIPTION
+
+# Máximo que acepta Spotify en GET /me/playlists
+PAGE_SIZE = 50
+
+
+def _name_key(name):
+    # Spotify guarda el nombre tal cual, salvo espacios en los bordes
+    return (name or '').strip()
+
+
+def _is_ours(playlist, song):
+    """El nombre de la playlist es el que se arma para la canción con su descripción como letra"""
+    description = playlist['description']
+    if not description:
+        return False
+    lyrics = None if description == NO_LYRICS_DESCRIPTION else description
+    return render_title(song.song, song.artist, lyrics) == _name_key(playlist['name'])
+
+
+class PlaylistIndex:
+    """
+    Playlists propias de los usuarios de la corrida, por nombre y por
+    primera canción. Cada playlist se entrega una sola vez (match la saca
+    del índice), así dos canciones nunca adoptan la misma
+    """
+    def __init__(self):
+        self.by_name = {}           # nombre → [playlist, ...]
+        self.by_first_track = {}    # uri de la primera canción → [playlist, ...]
+        self.names = None           # nombres ordenados, para buscar por prefijo
+        self.lock = threading.Lock()
+        self.incomplete = set()     # usuarios cuyo listado falló
+        self.stats = {'playlists': 0, 'list_calls': 0, 'track_calls': 0, 'duplicates': 0, 'matched': 0}
+
+    def __len__(self):
+        return self.stats['playlists']
+
+    def add(self, user_id, item):
+        """Agrega una playlist del listado (las que sigue pero no son suyas no cuentan)"""
+        if (item.get('owner') or {}).get('id') != user_id:
+            return
+        playlist = {
+            'id': item['id'],
+            'name': item.get('name', ''),
+            # Spotify la devuelve con entidades HTML (&#x27;, &amp;...)
+            'description': html.unescape(item.get('description') or ''),
+            'url': (item.get('external_urls') or {}).get('spotify'),
+            'user_id': user_id,
+            'tracks': (item.get('tracks') or {}).get('total', 0),
+            'first_track': None,
+        }
+        with self.lock:
+            self.by_name.setdefault(_name_key(playlist['name']), []).append(playlist)
+            self.stats['playlists'] += 1
+
+    def set_first_track(self, playlist, uri):
+        with self.lock:
+            playlist['first_track'] = uri
+            if uri:
+                self.by_first_track.setdefault(uri, []).append(playlist)
+
+    def repeated(self):
+        """Playlists con canciones cuyo nombre aparece más de una vez"""
+        with self.lock:
+            groups = [group for group in self.by_name.values() if len(group) > 1]
+            self.stats['duplicates'] = sum(len(group) - 1 for group in groups)
+        return [playlist for group in groups for playlist in group if playlist['tracks']]
+
+    def _named(self, base_title):
+        """Playlists cuyo nombre es base_title o empieza con base_title + ' ' (comienzo de la letra)"""
+        if self.names is None:
+            self.names = sorted(self.by_name)
+        start = bisect.bisect_left(self.names, base_title)
+        for name in self.names[start:]:
+            if not name.startswith(base_title):
+                break
+            if len(name) == len(base_title) or name[len(base_title)] == ' ':
+                yield from self.by_name[name]
+
+    def match(self, song):
+        """
+        Playlist existente para la canción (y la saca del índice) o None
+        Solo las que pasan _is_ours: primero por primera canción; si no,
+        por nombre descartando las que se sabe que empiezan con otra
+        canción. Entre varias, la que ya tiene canciones
+        """
+        with self.lock:
+            candidates = [
+                playlist for playlist in self.by_first_track.get(song.uri, ())
+                if _is_ours(playlist, song)
+            ]
+            if not candidates:
+                # Sin letra todavía: el título sin la letra es un prefijo del nombre
+                candidates = [
+                    playlist for playlist in self._named(render_title(song.song, song.artist, None))
+                    if playlist['first_track'] in (None, song.uri) and _is_ours(playlist, song)
+                ]
+            if not candidates:
+                return None
+            playlist = max(candidates, key=lambda p: p['tracks'] > 0)
+            self.by_name[_name_key(playlist['name'])].remove(playlist)
+            if playlist['first_track']:
+                self.by_first_track[playlist['first_track']].remove(playlist)
+            self.stats['matched'] += 1
+            return playlist
+
+
+async def _fetch_user(creator, token_manager, user_id, index, page_size):
+    """Todas las páginas de un usuario: la primera da el total, el resto en paralelo"""
+    access_token = await asyncio.to_thread(token_manager.token_for, user_id)
+    first = await creator.get_user_playlists_async(access_token, 0, page_size)
+    index.stats['list_calls'] += 1
+    if first is None:
+        index.incomplete.add(user_id)
+        return
+    pages = [first]
+    offsets = range(page_size, first.get('total', 0), page_size)
+    pages += await asyncio.gather(*(
+        creator.get_user_playlists_async(access_token, offset, page_size) for offset in offsets
+    ))
+    index.stats['list_calls'] += len(offsets)
+
+    for page in pages:
+        if page is None:
+            index.incomplete.add(user_id)
+            continue
+        for item in page.get('items', []):
+            if item:
+                index.add(user_id, item)
+
+
+async def _fetch_first_track(creator, token_manager, playlist, index):
+    access_token = await asyncio.to_thread(token_manager.token_for, playlist['user_id'])
+    uri = await creator.get_playlist_first_track_async(access_token, playlist['id'])
+    index.stats['track_calls'] += 1
+    index.set_first_track(playlist, uri)
+
+
+async def fetch_index(creator, token_manager, user_ids, page_size=PAGE_SIZE):
+    """
+    Índice de las playlists de todos los usuarios con token vigente (todos
+    a la vez). Un usuario cuyo listado falla queda en index.incomplete: sus
+    canciones se crean como siempre
+    """
+    index = PlaylistIndex()
+    await asyncio.gather(*(
+        _fetch_user(creator, token_manager, user_id, index, page_size)
+        for user_id in user_ids if token_manager.is_valid(user_id)
+    ))
+    # Los nombres repetidos se desempatan por la primera canción
+    await asyncio.gather(*(
+        _fetch_first_track(creator, token_manager, playlist, index)
+        for playlist in index.repeated()
+    ))
+    return index
@@ -0,0 +1,301 @@
+"""
+Ingesta unificada de chartsJson → catálogo columnar (ver catalog.py)
+Cada tipo de JSON de origen es un adapter: dónde está el arreglo de canciones
+y cómo leer cada item. Los archivos se leen en streaming (streamReader.py)
+
+    python getSongList/ingest.py
+        → openSp1 + openSp2 (lo mismo que Dragons_data.json) en outputs/catalog.json
+    python creator.py run --catalog outputs/catalog.json
+        → el creador usa el catálogo solo si se lo pide: por defecto sigue
+          con Dragons_data.json
+
+    python getSongList/ingest.py chartsSp:chartsJson/chartsSp.json chartsYt:chartsJson/chartsYt.json \\
+        --out outputs/charts.parquet
+
+    python getSongList/ingest.py chartsYt:chartsJson/chartsYt.json --resolve \\
+        --records outputs/chartsYt_data.json
+        → busca en Spotify las canciones de YouTube (ver resolver.py) y además
+          las guarda con la forma de Dragons_data.json
+
+    python getSongList/ingest.py --enrich
+        → completa artist_id, portada y popularidad desde la API (ver enricher.py)
+
+Fuentes: chartsSp (charts.spotify.com), chartsYt (charts.youtube.com),
+openSp (playlist de open.spotify.com)
+
+Con varios archivos cada uno se parsea en su propio proceso (--workers) y los
+resultados se juntan en el orden de las fuentes: el catálogo sale igual que
+leyéndolos de a uno. Al juntarlos se descartan los repetidos (misma URI o
+mismo título + artista principal, ver catalog.CatalogIndex)
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(base_dir, "..")
+sys.path.insert(0, root_dir)
+
+from catalog import Catalog, CatalogIndex, DEFAULT_CATALOG_PATH
+from streamReader import iter_items
+
+charts_dir = os.path.join(root_dir, "chartsJson")
+
+# Lo que hoy termina en Dragons_data.json (openSp3 queda afuera, como antes)
+DEFAULT_SOURCES = [
+    ("openSp", os.path.join(charts_dir, "openSp1.json")),
+    ("openSp", os.path.join(charts_dir, "openSp2.json")),
+]
+
+
+class SourceAdapter:
+    """Un tipo de JSON de origen"""
+    name = None
+    # Camino hasta el arreglo de canciones (claves e índices)
+    items_path = []
+    # True si varios archivos seguidos son páginas de una misma lista: el
+    # rank sigue contando en la página siguiente en vez de volver a 1
+    paged = False
+
+    def parse(self, item, position):
+        """
+        Un item del arreglo → dict con las columnas del catálogo
+        (song, artist, uri, artist_id, image_url, rank) o None para saltearlo
+        position: posición del item en el arreglo (desde 1)
+        """
+        raise NotImplementedError
+
+
+def _spotify_id(uri):
+    return uri.split(":")[-1] if uri else None
+
+
+class SpotifyChartsSource(SourceAdapter):
+    name = "chartsSp"
+    items_path = ["chartEntryViewResponses", 0, "entries"]
+
+    def parse(self, item, position):
+        metadata = item["trackMetadata"]
+        artists = metadata.get("artists", [])
+        return {
+            "song": metadata["trackName"],
+            "artist": ", ".join(artist["name"] for artist in artists),
+            "uri": metadata.get("trackUri", ""),
+            "artist_id": _spotify_id(artists[0].get("spotifyUri")) if artists else None,
+            "image_url": metadata.get("displayImageUri") or None,
+            "rank": item.get("chartEntryData", {}).get("currentRank") or position,
+        }
+
+
+class YoutubeChartsSource(SourceAdapter):
+    name = "chartsYt"
+    items_path = [
+        "contents", "sectionListRenderer", "contents", 0,
+        "musicAnalyticsSectionRenderer", "content", "trackTypes", 0, "trackViews"
+    ]
+
+    def parse(self, item, position):
+        # Sin URI de Spotify: hay que resolverla buscando en Spotify
+        thumbnails = item.get("thumbnail", {}).get("thumbnails", [])
+        largest = max(thumbnails, key=lambda t: t.get("width", 0), default={})
+        return {
+            "song": item.get("name", ""),
+            "artist": ", ".join(a["name"] for a in item.get("artists", [])),
+            "uri": "",
+            "artist_id": None,
+            "image_url": largest.get("url"),
+            "rank": item.get("chartEntryMetadata", {}).get("currentPosition") or position,
+        }
+
+
+class OpenSpotifySource(SourceAdapter):
+    name = "openSp"
+    items_path = ["data", "playlistV2", "content", "items"]
+    paged = True
+
+    def parse(self, item, position):
+        item_data = item.get("itemV2", {}).get("data", {})
+
+        # Skip items sin información válida (p. ej. NotFound)
+        if not item_data.get("name") or not item_data.get("artists"):
+            return None
+
+        artists_data = item_data.get("artists", {}).get("items", [])
+        if not artists_data:
+            return None
+
+        artists = [a["profile"]["name"] for a in artists_data if "profile" in a and "name" in a["profile"]]
+        artists_str = ", ".join(artists)
+        if not artists_str:
+            return None
+
+        # Imagen del álbum (usar la más grande: 640x640)
+        cover_art = item_data.get("albumOfTrack", {}).get("coverArt", {}).get("sources", [])
+        image_url = None
+        for source in cover_art:
+            if source.get("width") == 640:
+                image_url = source.get("url")
+                break
+        if not image_url and cover_art:
+            image_url = cover_art[0].get("url")
+
+        return {
+            "song": item_data["name"],
+            "artist": artists_str,
+            "uri": item_data.get("uri", ""),
+            "artist_id": _spotify_id(artists_data[0].get("uri")),
+            "image_url": image_url,
+            "rank": position,
+        }
+
+
+ADAPTERS = {
+    adapter.name: adapter
+    for adapter in (SpotifyChartsSource(), YoutubeChartsSource(), OpenSpotifySource())
+}
+
+
+def register_adapter(adapter):
+    """Agrega una fuente nueva (instancia de una subclase de SourceAdapter)"""
+    ADAPTERS[adapter.name] = adapter
+
+
+def parse_file(adapter, json_path):
+    """
+    Una fuente → (columnas del catálogo, cantidad de items leídos)
+    Corre dentro del pool de procesos (por eso es una función de módulo)
+    """
+    catalog = Catalog()
+    items = 0
+    for items, item in enumerate(iter_items(json_path, adapter.items_path), 1):
+        record = adapter.parse(item, items)
+        if record:
+            record['source'] = adapter.name
+            catalog.append(record)
+    return catalog.columns, items
+
+
+def ingest(sources=DEFAULT_SOURCES, workers=None, index=None):
+    """
+    Lee todas las fuentes y arma el catálogo sin repetidos, en el orden de `sources`
+    sources: lista de (nombre del adapter, ruta del JSON)
+    workers: procesos para parsear (por defecto uno por núcleo; 1 = sin pool)
+    index: CatalogIndex a usar (para leer sus estadísticas después)
+    """
+    existing = []
+    for name, json_path in sources:
+        if os.path.exists(json_path):
+            existing.append((ADAPTERS[name], json_path))
+        else:
+            print(f"⚠️ No existe: {json_path}")
+
+    workers = min(workers or os.cpu_count() or 1, len(existing))
+    if workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            # map conserva el orden de las fuentes aunque terminen en otro orden
+            results = list(pool.map(parse_file, *zip(*existing)))
+    else:
+        results = [parse_file(adapter, json_path) for adapter, json_path in existing]
+
+    if index is None:
+        index = CatalogIndex()
+    previous, offset = None, 0
+    for (adapter, _), (columns, items) in zip(existing, results):
+        # Páginas seguidas de la misma lista: ranks continuos (1..N, N+1..)
+        if not (adapter.paged and adapter.name == previous):
+            offset = 0
+        if offset:
+            columns['rank'] = [rank + offset for rank in columns['rank']]
+        offset += items
+        previous = adapter.name
+        for record in Catalog(columns).rows():
+            index.add(record)
+    return index.catalog()
+
+
+def resolve(catalog):
+    """Completa las filas sin URI buscándolas en Spotify (requiere config.json)"""
+    from creator import SpotifyPlaylistCreator, load_config
+    from resolver import SpotifyResolver, resolve_catalog
+
+    pending = sum(1 for uri in catalog['uri'] if not uri)
+    if not pending:
+        return catalog
+
+    config = load_config()
+    creator = SpotifyPlaylistCreator(
+        config['spotify_client_id'], config['spotify_client_secret'], config['genius_token']
+    )
+    resolver = SpotifyResolver(creator)
+    print(f"🔍 Buscando en Spotify {pending} canciones sin URI...")
+    try:
+        catalog, stats = resolve_catalog(catalog, resolver)
+    finally:
+        creator.transport.close()
+
+    search_stats = resolver.search_cache.stats
+    print(f"   ✅ Resueltas: {resolver.stats['resolved']}   "
+          f"⚠️ Sin coincidencia: {resolver.stats['unresolved']}   "
+          f"❌ Errores: {resolver.stats['errors']} (quedan sin URI para reintentar)")
+    print(f"   💾 {search_stats['hits']} desde caché, {search_stats['fetches']} búsquedas en Spotify")
+    if stats['uri_duplicates']:
+        print(f"   • {stats['uri_duplicates']} ya estaban en el catálogo")
+    return catalog
+
+
+def parse_source(value):
+    """'chartsSp:ruta.json' → ('chartsSp', 'ruta.json')"""
+    name, sep, json_path = value.partition(":")
+    if not sep or name not in ADAPTERS:
+        raise argparse.ArgumentTypeError(
+            f"Fuente inválida: {value} (usar <{'|'.join(ADAPTERS)}>:<ruta.json>)"
+        )
+    return name, json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta de chartsJson → catálogo columnar")
+    parser.add_argument('sources', nargs='*', type=parse_source,
+                        help="Fuentes en orden, como chartsSp:chartsJson/chartsSp.json")
+    parser.add_argument('--out', default=DEFAULT_CATALOG_PATH,
+                        help="Catálogo de salida (.json o .parquet)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos para parsear (por defecto uno por núcleo)")
+    parser.add_argument('--resolve', action='store_true',
+                        help="Busca en Spotify las canciones sin URI (charts de YouTube)")
+    parser.add_argument('--enrich', action='store_true',
+                        help="Completa artist_id, image_url y popularity con la API de Spotify")
+    parser.add_argument('--records',
+                        help="Guarda también las canciones con la forma de Dragons_data.json")
+    args = parser.parse_args()
+
+    print("Procesando archivos JSON...")
+    index = CatalogIndex()
+    catalog = ingest(args.sources or DEFAULT_SOURCES, workers=args.workers, index=index)
+    if args.resolve:
+        catalog = resolve(catalog)
+    if args.enrich:
+        from enricher import enrich_catalog
+        enrich_catalog(catalog)
+    catalog.save(args.out)
+
+    stats = index.stats
+    print(f"✅ Total de canciones procesadas: {len(catalog)} "
+          f"(de {stats['rows']}: {stats['uri_duplicates']} URIs repetidas, "
+          f"{stats['joined']} unidas por título/artista, "
+          f"{stats['name_collisions']} versiones distintas con el mismo nombre)")
+    for source, count in collections.Counter(catalog['source']).items():
+        print(f"   • {source}: {count}")
+    print(f"✅ Catálogo guardado en: {args.out}")
+
+    if args.records:
+        with open(args.records, "w", encoding="utf-8") as f:
+            json.dump(catalog.records(), f, indent=2, ensure_ascii=False)
+        print(f"✅ JSON guardado en: {args.records}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Lector incremental de los JSON de chartsJson
+En vez de json.load (todo el archivo en memoria, varias veces su tamaño)
+recorre el archivo por bloques hasta el arreglo que interesa y entrega sus
+elementos de a uno: la memoria queda acotada por el elemento más grande,
+no por el tamaño del archivo
+
+    for item in iter_items(json_path, ["data", "playlistV2", "content", "items"]):
+        ...
+
+El camino es una lista de claves (objetos) e índices (arreglos), igual que
+data["chartEntryViewResponses"][0]["entries"] → ["chartEntryViewResponses", 0, "entries"]
+Solo usa la librería estándar
+"""
+import json
+import re
+
+# Tamaño de cada lectura del archivo (caracteres)
+CHUNK_SIZE = 1 << 16
+
+_DECODER = json.JSONDecoder()
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Dentro de un objeto/arreglo solo importan comillas y llaves/corchetes
+_STRUCTURE = re.compile(r'["{}\[\]]')
+# Dentro de un string solo importan la comilla final y los escapes
+_STRING = re.compile(r'["\\]')
+# Números, true, false, null
+_SCALAR = re.compile(r'[^,\]}\s]*')
+
+
+class _Reader:
+    """Buffer sobre el archivo que solo guarda lo que todavía hace falta"""
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+
+    def _extend(self, i):
+        """
+        Mientras se saltea un valor: descarta todo antes de i (ya recorrido)
+        y lee otro bloque. Retorna i ajustado al buffer nuevo (0)
+        """
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            raise ValueError("JSON incompleto: el archivo terminó antes de tiempo")
+        self.buf = self.buf[i:] + chunk
+        self.pos = 0
+        return 0
+
+    def peek(self):
+        """Siguiente carácter que no es espacio ('' al final del archivo)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read_more():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON inesperado: se esperaba {char!r} y se encontró {found!r}")
+        self.pos += 1
+
+    def _string_end(self, i):
+        """i: posición después de la comilla inicial → posición después de la final"""
+        while True:
+            m = _STRING.search(self.buf, i)
+            if not m:
+                i = self._extend(i)
+                continue
+            if m.group() == '"':
+                return m.end()
+            # Escape: se saltea también el carácter siguiente
+            i = m.end() + 1
+            if i > len(self.buf):
+                i = self._extend(i - 1) + 1
+
+    def skip_value(self):
+        """
+        Avanza self.pos hasta el final del valor actual sin decodificarlo
+        (para saltear lo que no está en el camino)
+        """
+        char = self.peek()
+        i = self.pos + 1
+
+        if char == '"':
+            self.pos = self._string_end(i)
+            return
+
+        if char in '{[':
+            depth = 1
+            while depth:
+                m = _STRUCTURE.search(self.buf, i)
+                if not m:
+                    i = self._extend(i)
+                    continue
+                i = m.end()
+                found = m.group()
+                if found == '"':
+                    i = self._string_end(i)
+                elif found in '{[':
+                    depth += 1
+                else:
+                    depth -= 1
+            self.pos = i
+            return
+
+        # Escalar: termina en el primer separador
+        while True:
+            end = _SCALAR.match(self.buf, self.pos).end()
+            if end < len(self.buf) or not self._read_more():
+                self.pos = end
+                return
+
+    def _read_more(self, size=None):
+        """Agrega un bloque conservando desde self.pos (False al final del archivo)"""
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def read_value(self):
+        """
+        Decodifica el valor actual (solo ese valor queda en memoria)
+        El decoder de C lee directo del buffer; si el valor quedó cortado al
+        final del bloque se lee más (el doble cada vez) y se reintenta
+        """
+        if self.peek() not in '{["':
+            # Un número al final del bloque puede seguir en el próximo
+            while _SCALAR.match(self.buf, self.pos).end() == len(self.buf) and self._read_more():
+                pass
+        while True:
+            try:
+                value, self.pos = _DECODER.raw_decode(self.buf, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if not self._read_more(max(self.chunk_size, len(self.buf) - self.pos)):
+                    raise
+
+
+def _enter(reader, step):
+    """Posiciona el lector al comienzo del valor reader[step]"""
+    if isinstance(step, int):
+        reader.expect('[')
+        for _ in range(step):
+            if reader.peek() == ']':
+                raise IndexError(f"El arreglo no tiene el índice {step}")
+            reader.skip_value()
+            reader.expect(',')
+        if reader.peek() == ']':
+            raise IndexError(f"El arreglo no tiene el índice {step}")
+        return
+
+    reader.expect('{')
+    while reader.peek() != '}':
+        key = reader.read_value()
+        reader.expect(':')
+        if key == step:
+            return
+        reader.skip_value()
+        if reader.peek() == ',':
+            reader.pos += 1
+    raise KeyError(step)
+
+
+def iter_array(f, path, chunk_size=CHUNK_SIZE):
+    """Elementos del arreglo que está en `path`, leyendo `f` (archivo de texto) por bloques"""
+    reader = _Reader(f, chunk_size)
+    for step in path:
+        _enter(reader, step)
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.read_value()
+        char = reader.peek()
+        if char == ']':
+            return
+        reader.expect(',')
+
+
+def iter_items(json_path, path, chunk_size=CHUNK_SIZE):
+    """Como iter_array, pero abre el archivo"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        yield from iter_array(f, path, chunk_size)
@@ -0,0 +1,116 @@
+"""
+Pipeline de portadas para las playlists
+- Caché en disco direccionado por contenido (hash de la URL) en outputs/covers/
+- Si la imagen supera el límite de Spotify (256 KB en base64) se redimensiona
+  y recomprime en un pool de procesos (es trabajo de CPU)
+- El payload base64 se calcula una sola vez por portada, no por playlist
+"""
+import base64
+import concurrent.futures
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+
+from cache import SingleFlight
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_COVERS_DIR = os.path.join(base_dir, "./outputs/covers")
+
+# Spotify acepta como máximo 256 KB de JPEG codificado en base64
+MAX_PAYLOAD_BYTES = 256 * 1024
+
+JPEG_MAGIC = b'\xff\xd8'
+
+
+def recompress_cover(raw, max_bytes=MAX_PAYLOAD_BYTES):
+    """
+    Convierte la imagen a JPEG y la achica hasta que el base64 entre en max_bytes
+    Corre dentro del pool de procesos (por eso es una función de módulo)
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(raw)).convert('RGB')
+    for size in (640, 480, 320, 240):
+        image.thumbnail((size, size))
+        for quality in (90, 80, 70, 60, 50):
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=quality, optimize=True)
+            payload = base64.b64encode(buffer.getvalue())
+            if len(payload) <= max_bytes:
+                return payload.decode()
+    raise ValueError("No se pudo reducir la imagen bajo el límite de Spotify")
+
+
+class CoverImageCache:
+    """
+    Portadas listas para subir (payload base64) indexadas por hash de URL
+    Varias canciones del mismo álbum comparten una sola descarga y un solo
+    procesamiento
+    """
+    def __init__(self, covers_dir=DEFAULT_COVERS_DIR, max_workers=None):
+        self.covers_dir = covers_dir
+        self.max_workers = max_workers
+        self.pool = None
+        self.pool_lock = threading.Lock()
+        self.single_flight = SingleFlight()
+        self.stats = {'hits': 0, 'downloads': 0, 'recompressed': 0}
+        os.makedirs(covers_dir, exist_ok=True)
+
+    def _path_for(self, url):
+        digest = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.covers_dir, f"{digest}.b64")
+
+    def _process_pool(self):
+        with self.pool_lock:
+            if self.pool is None:
+                # spawn y no fork: a esta altura hay hilos (eventos, tokens,
+                # executor) y conexiones sqlite, y un fork hereda sus locks tomados
+                self.pool = concurrent.futures.ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self.pool
+
+    def get_payload(self, url, download):
+        """
+        Retorna el base64 listo para el PUT de /playlists/{id}/images
+        `download(url)` debe retornar los bytes de la imagen o None si falla
+        """
+        path = self._path_for(url)
+        if os.path.exists(path):
+            self.stats['hits'] += 1
+            with open(path, 'r') as f:
+                return f.read()
+
+        return self.single_flight.do(path, lambda: self._build_payload(url, path, download))
+
+    def _build_payload(self, url, path, download):
+        # Otro hilo pudo haberla guardado mientras esperábamos
+        if os.path.exists(path):
+            self.stats['hits'] += 1
+            with open(path, 'r') as f:
+                return f.read()
+
+        raw = download(url)
+        self.stats['downloads'] += 1
+        if raw is None:
+            return None
+
+        payload = base64.b64encode(raw).decode()
+        if len(payload) > MAX_PAYLOAD_BYTES or not raw.startswith(JPEG_MAGIC):
+            payload = self._process_pool().submit(recompress_cover, raw).result()
+            self.stats['recompressed'] += 1
+
+        # Escritura atómica: nunca queda un archivo a medias en el caché
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return payload
+
+    def close(self):
+        with self.pool_lock:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
@@ -0,0 +1,427 @@
+"""
+Cola de trabajos persistente en SQLite (outputs/jobs.sqlite) para que varias
+instancias de creator.py trabajen la misma campaña sin repartirse
+Dragons_data.json a mano
+
+    python creator.py queue load        carga el catálogo en la cola (una vez)
+    python creator.py run --queue       en cada terminal; se pueden sumar a mitad de corrida
+    python creator.py queue status      cuántas quedan, por estado y por usuario
+    python creator.py queue retry       las que fallaron vuelven a la cola
+
+Cada canción es un trabajo con estado (pending → leased → done / failed),
+usuario, intentos y vencimiento del lease:
+- Una instancia reclama trabajos de a tandas dentro de una transacción
+  (BEGIN IMMEDIATE): dos instancias nunca se llevan el mismo
+- Mientras los procesa renueva sus leases; si se cae, los leases vencen y
+  cualquier otra instancia los vuelve a tomar
+- Los pasos de cada canción (playlist creada, canciones, imagen) quedan en
+  el trabajo en vez del journal local: quien retome una canción a medias
+  sigue con el mismo usuario y no crea otra playlist
+
+Todas las instancias tienen que abrir el mismo archivo: misma máquina o un
+disco compartido con locks que funcionen (SQLite no se lleva bien con NFS)
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from queue import SimpleQueue
+
+from assigner import NoLaneAvailable, PERMANENT
+from catalog import Track
+from journal import song_key, STEP_DONE
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUEUE_PATH = os.path.join(base_dir, "./outputs/jobs.sqlite")
+
+# Un lease dura esto; se renueva cada LEASE_SECONDS / 3 mientras la instancia vive
+LEASE_SECONDS = 120
+# Trabajos por reclamo (el pipeline pide más a medida que tiene lugar)
+CLAIM_BATCH = 16
+# Después de esta cantidad de intentos el trabajo queda 'failed'
+MAX_ATTEMPTS = 3
+# Sin nada para reclamar pero con leases de otros: cada cuánto volver a mirar
+POLL_INTERVAL = 5.0
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    def __init__(self, path=DEFAULT_QUEUE_PATH, lease_seconds=LEASE_SECONDS,
+                 max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        # timeout: cuánto espera un reclamo si otra instancia tiene la escritura
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Cada paso es tan durable como una línea del journal (fsync)
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                song TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                user_id TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                state TEXT NOT NULL DEFAULT '{}',
+                error TEXT,
+                updated_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, id)")
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transacción de escritura: toma el lock de la base antes de leer"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    # ===== CARGA =====
+
+    def load(self, songs):
+        """Agrega las canciones que no estén ya en la cola; retorna cuántas entraron"""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (key, song, updated_at) VALUES (?, ?, ?)",
+                (
+                    (song_key(song), json.dumps(song.to_dict(), ensure_ascii=False), now)
+                    for song in songs
+                )
+            )
+            return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] - before
+
+    # ===== LEASES =====
+
+    def _requeue_expired(self, conn, now):
+        """Leases vencidos (instancia caída o colgada) → de vuelta a la cola"""
+        return conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "lease_owner = NULL, lease_expires = NULL, error = 'lease vencido', updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (self.max_attempts, FAILED, PENDING, now, LEASED, now)
+        ).rowcount
+
+    @staticmethod
+    def _user_filter(user_ids):
+        # Una canción con playlist creada solo la puede terminar su dueño
+        if user_ids is None:
+            return "", ()
+        marks = ", ".join("?" for _ in user_ids)
+        return f" AND (user_id IS NULL OR user_id IN ({marks}))", tuple(user_ids)
+
+    def claim(self, worker_id, limit=CLAIM_BATCH, user_ids=None):
+        """
+        Reclama hasta `limit` trabajos pendientes (en orden del catálogo)
+        Retorna [(Track, estado)]; el estado es el mismo dict que da el journal
+        """
+        now = time.time()
+        user_filter, params = self._user_filter(user_ids)
+        with self._transaction() as conn:
+            self._requeue_expired(conn, now)
+            rows = conn.execute(
+                f"SELECT id, song, state FROM jobs WHERE status = ?{user_filter} ORDER BY id LIMIT ?",
+                (PENDING, *params, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                [(LEASED, worker_id, now + self.lease_seconds, now, row[0]) for row in rows]
+            )
+        return [(Track.from_dict(json.loads(song)), json.loads(state)) for _, song, state in rows]
+
+    def renew(self, worker_id):
+        """Extiende todos los leases de la instancia; retorna cuántos"""
+        now = time.time()
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE lease_owner = ? AND status = ?",
+                (now + self.lease_seconds, now, worker_id, LEASED)
+            ).rowcount
+
+    def release(self, worker_id):
+        """Al salir: lo que la instancia no llegó a terminar vuelve a la cola sin gastar intento"""
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0), updated_at = ? WHERE lease_owner = ? AND status = ?",
+                (PENDING, time.time(), worker_id, LEASED)
+            ).rowcount
+
+    # ===== PROGRESO =====
+
+    def record(self, key, step, **data):
+        """Guarda un paso de la canción en su trabajo (como ProgressJournal.record)"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT state FROM jobs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            state = json.loads(row[0])
+            state[step] = True
+            state.update(data)
+            conn.execute(
+                "UPDATE jobs SET state = ?, user_id = COALESCE(?, user_id), updated_at = ? WHERE key = ?",
+                (json.dumps(state, ensure_ascii=False), data.get('user_id'), time.time(), key)
+            )
+
+    def finish(self, key, worker_id, error=None, attempt=True):
+        """
+        Cierra el lease de una canción: done si quedó completa, si no vuelve a
+        la cola (o queda failed al agotar los intentos)
+        attempt=False: no se llegó a intentar (ningún usuario libre), vuelve
+        sin gastar intento, como en release
+        Retorna False si el lease ya no era de esta instancia
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT status, attempts, state, lease_owner FROM jobs WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] != LEASED or row[3] != worker_id:
+                return False
+            attempts = row[1] if attempt else max(row[1] - 1, 0)
+            if json.loads(row[2]).get(STEP_DONE):
+                status = DONE
+            elif attempts >= self.max_attempts:
+                status = FAILED
+            else:
+                status = PENDING
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, lease_owner = NULL, lease_expires = NULL, "
+                "error = ?, updated_at = ? WHERE key = ?",
+                (status, attempts, str(error) if error else None, time.time(), key)
+            )
+            return True
+
+    # ===== CONSULTAS =====
+
+    def counts(self):
+        """{estado: cantidad} (incluye los leases vencidos como 'leased')"""
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: rows_count for status, rows_count in rows}
+
+    def claimable(self, user_ids=None):
+        """Pendientes que podría tomar una instancia con estos usuarios"""
+        user_filter, params = self._user_filter(user_ids)
+        with self.lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE status = ?{user_filter}", (PENDING, *params)
+            ).fetchone()[0]
+
+    def leased(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (LEASED,)
+            ).fetchone()[0]
+
+    def done_per_user(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT user_id, COUNT(*) FROM jobs WHERE status = ? GROUP BY user_id", (DONE,)
+            ).fetchall()
+        return dict(rows)
+
+    def workers(self):
+        """{instancia: (leases, vencimiento más próximo)} de los leases activos"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT lease_owner, COUNT(*), MIN(lease_expires) FROM jobs "
+                "WHERE status = ? GROUP BY lease_owner", (LEASED,)
+            ).fetchall()
+        return {owner: (count, expires) for owner, count, expires in rows}
+
+    def retry_failed(self):
+        """Las que fallaron vuelven a la cola con los intentos en cero"""
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, error = NULL, updated_at = ? WHERE status = ?",
+                (PENDING, time.time(), FAILED)
+            ).rowcount
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class QueueJournal:
+    """
+    Lo que el pipeline usa como journal (get / record / close), guardado en la cola
+    Las escrituras en SQLite las hace un hilo aparte y en orden: si otra
+    instancia tiene tomada la base, espera ese hilo y no el event loop
+    """
+    def __init__(self, queue):
+        self.queue = queue
+        self.state = {}     # song_key → estado, de los trabajos reclamados
+        self.ops = SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name='jobqueue', daemon=True)
+        self.thread.start()
+
+    def get(self, key):
+        return self.state.get(key, {})
+
+    def submit(self, fn, *args, **kwargs):
+        """Encola una escritura en la cola; retorna un Future con su resultado"""
+        future = concurrent.futures.Future()
+        self.ops.put((fn, args, kwargs, future))
+        return future
+
+    def _run(self):
+        while True:
+            op = self.ops.get()
+            if op is None:
+                return
+            fn, args, kwargs, future = op
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def record(self, key, step, **data):
+        """Actualiza el estado en memoria ya; retorna un Future que se completa al guardarlo"""
+        song_state = self.state.setdefault(key, {})
+        song_state[step] = True
+        song_state.update(data)
+        return self.submit(self.queue.record, key, step, **data)
+
+    async def record_async(self, key, step, **data):
+        await asyncio.wrap_future(self.record(key, step, **data))
+
+    def close(self):
+        """Espera a que se guarde todo lo encolado"""
+        if self.thread is not None:
+            self.ops.put(None)
+            self.thread.join()
+            self.thread = None
+
+
+class QueueStream:
+    """
+    Canciones para el pipeline, reclamadas de la cola a medida que las pide
+    (iterable asíncrono de (song_idx, song)). Termina cuando no queda nada
+    pendiente que pueda tomar ni leases activos de nadie: si otra instancia
+    se cae, sus canciones vuelven a la cola al vencer el lease y se toman acá
+
+        stream.start()      renueva los leases en un hilo aparte
+        stream.close()      lo no terminado vuelve a la cola
+
+    Con stream.assigner puesto no reclama mientras ningún usuario pueda
+    crear playlists (cupo, token, rate limit): si es por cupo o token deja
+    de reclamar, si no espera. Una canción que vuelve por falta de usuario
+    no gasta intento y frena los reclamos un rato
+    """
+    def __init__(self, queue, user_ids=None, worker_id=None, batch=CLAIM_BATCH):
+        self.queue = queue
+        self.user_ids = list(user_ids) if user_ids is not None else None
+        self.worker_id = worker_id or worker_name()
+        self.batch = batch
+        self.journal = QueueJournal(queue)
+        self.total = queue.claimable(self.user_ids)
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.assigner = None
+        self.backoff_until = 0.0
+        self.stats = {'claimed': 0, 'done': 0, 'requeued': 0, 'no_lane': 0, 'lost_leases': 0}
+
+    def __len__(self):
+        # Pendientes al arrancar (otras instancias pueden llevarse parte)
+        return self.total
+
+    async def __aiter__(self):
+        song_idx = 0
+        while True:
+            blocked = self.assigner.blocked() if self.assigner is not None else None
+            if blocked and all(reason in PERMANENT for reason in blocked.values()):
+                return
+            wait = self.backoff_until - time.monotonic()
+            if blocked or wait > 0:
+                await asyncio.sleep(POLL_INTERVAL if blocked else wait)
+                continue
+            claimed = await asyncio.to_thread(self.queue.claim, self.worker_id, self.batch, self.user_ids)
+            if not claimed:
+                if not await asyncio.to_thread(self.queue.leased):
+                    return
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            self.stats['claimed'] += len(claimed)
+            for song, state in claimed:
+                self.journal.state[song_key(song)] = state
+                yield song_idx, song
+                song_idx += 1
+
+    def on_finish(self, job, error):
+        """
+        El pipeline terminó una canción (bien o con error): el cierre del
+        lease va detrás de sus pasos en el hilo de escritura, no frena el event loop
+        """
+        done = bool(self.journal.get(job['key']).get(STEP_DONE))
+        no_lane = isinstance(error, NoLaneAvailable)
+        if no_lane:
+            self.backoff_until = time.monotonic() + POLL_INTERVAL
+        future = self.journal.submit(
+            self.queue.finish, job['key'], self.worker_id, error, attempt=not no_lane
+        )
+        future.add_done_callback(lambda finished: self._count(finished, done, no_lane))
+
+    def _count(self, finished, done, no_lane):
+        # Corre en el hilo de escritura
+        if finished.exception() is not None or not finished.result():
+            self.stats['lost_leases'] += 1
+        elif done:
+            self.stats['done'] += 1
+        elif no_lane:
+            self.stats['no_lane'] += 1
+        else:
+            self.stats['requeued'] += 1
+
+    def _renew_loop(self):
+        while not self.stop_event.wait(self.queue.lease_seconds / 3):
+            try:
+                self.queue.renew(self.worker_id)
+            except sqlite3.Error:
+                # Base ocupada: se intenta en la próxima vuelta (el lease tiene margen)
+                pass
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._renew_loop, name='leases', daemon=True)
+            self.thread.start()
+
+    def close(self):
+        # Primero se guardan los pasos y cierres pendientes, después se
+        # devuelve lo que quedó sin terminar
+        self.journal.close()
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread = None
+        return self.queue.release(self.worker_id)
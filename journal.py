@@ -0,0 +1,140 @@
+"""
+Journal de progreso append-only (JSONL con fsync)
+Cada paso completado de cada canción queda registrado en disco, así una
+corrida que se cae puede reanudarse con --resume sin duplicar playlists
+
+Un hilo aparte escribe y hace fsync en tandas (todo lo que llegó mientras
+el disco trabajaba va en el mismo fsync): el event loop solo encola y, si
+necesita que el paso esté en disco antes de seguir, lo espera con
+`await journal.record_async(...)`
+"""
+import asyncio
+import concurrent.futures
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_JOURNAL_PATH = os.path.join(base_dir, "./outputs/progress_journal.jsonl")
+
+# Pasos que se registran por canción (en orden)
+STEP_LYRICS = 'lyrics'
+STEP_PLAYLIST = 'playlist_created'
+STEP_TRACKS = 'tracks_added'
+STEP_IMAGE = 'image_uploaded'
+STEP_DONE = 'done'
+
+_STOP = object()
+
+
+def song_key(song):
+    """Identificador estable de una canción del catálogo"""
+    return song.uri or f"{song.song}|{song.artist}"
+
+
+def load_journal(path=DEFAULT_JOURNAL_PATH):
+    """
+    Estado de cada canción según el journal (solo lectura)
+    song_key → {'playlist_created': True, 'playlist_id': ..., ...}
+    """
+    state = {}
+    if not os.path.exists(path):
+        return state
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Última línea a medio escribir si el proceso se cayó
+                continue
+            song_state = state.setdefault(entry.pop('song'), {})
+            entry.pop('ts', None)
+            step = entry.pop('step')
+            song_state[step] = True
+            song_state.update(entry)
+    return state
+
+
+class ProgressJournal:
+    """
+    Journal JSONL: una línea por paso completado
+        {"ts": "...", "song": "<song_key>", "step": "playlist_created", ...}
+    """
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, resume=False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = self.load() if resume else {}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Corrida nueva → journal nuevo; reanudación → se sigue agregando
+        self.file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name='journal', daemon=True)
+        self.thread.start()
+
+    def load(self):
+        """Reconstruye el estado de cada canción a partir del journal"""
+        return load_journal(self.path)
+
+    def get(self, key):
+        """Estado registrado de una canción ({} si no hay nada)"""
+        return self.state.get(key, {})
+
+    def record(self, key, step, **data):
+        """
+        Agrega un paso al journal (el estado en memoria se actualiza ya)
+        Retorna un Future que se completa cuando la línea está en disco
+        """
+        entry = {'ts': datetime.now().isoformat(), 'song': key, 'step': step, **data}
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            song_state = self.state.setdefault(key, {})
+            song_state[step] = True
+            song_state.update(data)
+        written = concurrent.futures.Future()
+        self.queue.put((line, written))
+        return written
+
+    async def record_async(self, key, step, **data):
+        """record que espera el fsync sin frenar el event loop"""
+        await asyncio.wrap_future(self.record(key, step, **data))
+
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            # Todo lo que ya está encolado va en el mismo fsync
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in items
+            items = [item for item in items if item is not _STOP]
+            error = None
+            try:
+                if items:
+                    self.file.write(''.join(line for line, _ in items))
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+            except OSError as e:
+                error = e
+            for _, written in items:
+                if error is None:
+                    written.set_result(None)
+                else:
+                    written.set_exception(error)
+            if stop:
+                return
+
+    def close(self):
+        """Espera a que todo lo encolado esté en disco y cierra el archivo"""
+        if self.thread is not None:
+            self.queue.put(_STOP)
+            self.thread.join()
+            self.thread = None
+            self.file.close()
@@ -0,0 +1,286 @@
+"""
+Métricas de la corrida: cuántas llamadas se hicieron a cada API, con qué
+resultado y cuánto tardaron, y el tiempo de punta a punta de cada canción
+
+- Por tipo de llamada (get_access_token, get_lyrics, create_playlist,
+  get_artist_top_tracks, add_tracks_to_playlist, upload_playlist_image, ...):
+  cantidad por status HTTP (o found/not_found/error para Genius) e
+  histograma de latencia (incluye la espera del rate limit y los reintentos)
+- Por canción: desde que entra al pipeline hasta que queda creada (o falla)
+
+Al terminar se guarda un resumen en outputs/metrics.json; durante la corrida
+se puede exponer en formato Prometheus (`creator.py run --metrics-port 9100`):
+
+    curl localhost:9100/metrics         texto para Prometheus
+    curl localhost:9100/metrics.json    el mismo resumen que metrics.json
+"""
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_METRICS_PATH = os.path.join(base_dir, "./outputs/metrics.json")
+
+# Límites de los buckets (segundos), como los de los clientes de Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SONG_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+PREFIX = "spotify_auto"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # el último es +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimación por interpolación dentro del bucket (como histogram_quantile)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_seconds': round(self.sum, 3),
+            'mean_ms': round(self.sum / self.count * 1000, 1) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.5) * 1000, 1),
+            'p90_ms': round(self.quantile(0.9) * 1000, 1),
+            'p99_ms': round(self.quantile(0.99) * 1000, 1),
+            'max_ms': round(self.max * 1000, 1),
+        }
+
+    def state(self):
+        return {'counts': list(self.counts), 'count': self.count, 'sum': self.sum, 'max': self.max}
+
+    def merge(self, state):
+        """Suma el estado de otro histograma con los mismos buckets"""
+        self.counts = [a + b for a, b in zip(self.counts, state['counts'])]
+        self.count += state['count']
+        self.sum += state['sum']
+        self.max = max(self.max, state['max'])
+
+    def prometheus(self, name, labels=""):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class CallTimer:
+    """Lo que devuelve Metrics.time_call: se le asigna el status al terminar"""
+    __slots__ = ('status',)
+
+    def __init__(self):
+        self.status = 'ok'
+
+
+def _is_error(status):
+    return status == 'error' or (isinstance(status, int) and status >= 400)
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.calls = {}          # call → {'statuses': {status: n}, 'latency': Histogram}
+        self.songs = {}          # outcome → n
+        self.song_seconds = Histogram(SONG_BUCKETS)
+
+    # ===== REGISTRO =====
+
+    def observe_call(self, call, status, seconds):
+        with self.lock:
+            entry = self.calls.get(call)
+            if entry is None:
+                entry = self.calls[call] = {'statuses': {}, 'latency': Histogram(LATENCY_BUCKETS)}
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+            entry['latency'].observe(seconds)
+
+    @contextlib.contextmanager
+    def time_call(self, call):
+        """
+        with metrics.time_call('create_playlist') as timer:
+            response = ...
+            timer.status = response.status_code
+        Si se escapa una excepción se registra con status 'error'
+        """
+        timer = CallTimer()
+        start = time.perf_counter()
+        try:
+            yield timer
+        except BaseException:
+            timer.status = 'error'
+            raise
+        finally:
+            self.observe_call(call, timer.status, time.perf_counter() - start)
+
+    def observe_song(self, seconds, outcome='ok'):
+        """Tiempo de punta a punta de una canción (outcome: ok / error)"""
+        with self.lock:
+            self.songs[outcome] = self.songs.get(outcome, 0) + 1
+            self.song_seconds.observe(seconds)
+
+    # ===== VARIOS PROCESOS =====
+
+    def snapshot(self):
+        """Estado crudo (se puede mandar entre procesos) para juntarlo con load_snapshots"""
+        with self.lock:
+            return {
+                'calls': {
+                    call: {'statuses': dict(entry['statuses']), 'latency': entry['latency'].state()}
+                    for call, entry in self.calls.items()
+                },
+                'songs': dict(self.songs),
+                'song_seconds': self.song_seconds.state(),
+            }
+
+    def load_snapshots(self, snapshots):
+        """Reemplaza el contenido por la suma de los snapshots (uno por proceso)"""
+        calls, songs, song_seconds = {}, {}, Histogram(SONG_BUCKETS)
+        for snapshot in snapshots:
+            for call, data in snapshot['calls'].items():
+                entry = calls.get(call)
+                if entry is None:
+                    entry = calls[call] = {'statuses': {}, 'latency': Histogram(LATENCY_BUCKETS)}
+                for status, count in data['statuses'].items():
+                    entry['statuses'][status] = entry['statuses'].get(status, 0) + count
+                entry['latency'].merge(data['latency'])
+            for outcome, count in snapshot['songs'].items():
+                songs[outcome] = songs.get(outcome, 0) + count
+            song_seconds.merge(snapshot['song_seconds'])
+        with self.lock:
+            self.calls, self.songs, self.song_seconds = calls, songs, song_seconds
+
+    # ===== EXPORTACIÓN =====
+
+    def summary(self):
+        """Resumen en un dict listo para JSON"""
+        with self.lock:
+            calls = {}
+            for call, entry in sorted(self.calls.items()):
+                statuses = entry['statuses']
+                calls[call] = {
+                    'statuses': {str(status): count for status, count in statuses.items()},
+                    'errors': sum(count for status, count in statuses.items() if _is_error(status)),
+                    **entry['latency'].summary(),
+                }
+            return {
+                'started': self.started,
+                'elapsed_seconds': round(time.time() - self.started, 3),
+                'calls': calls,
+                'songs': {'outcomes': dict(self.songs), **self.song_seconds.summary()},
+            }
+
+    def save_json(self, path=DEFAULT_METRICS_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def prometheus(self):
+        """Formato de texto de Prometheus (exposition format 0.0.4)"""
+        with self.lock:
+            lines = [
+                f"# HELP {PREFIX}_calls_total Llamadas a APIs externas por tipo y status",
+                f"# TYPE {PREFIX}_calls_total counter",
+            ]
+            for call, entry in sorted(self.calls.items()):
+                for status, count in sorted(entry['statuses'].items(), key=lambda item: str(item[0])):
+                    lines.append(f'{PREFIX}_calls_total{{call="{call}",status="{status}"}} {count}')
+
+            lines += [
+                f"# HELP {PREFIX}_call_seconds Latencia de cada llamada (incluye rate limit y reintentos)",
+                f"# TYPE {PREFIX}_call_seconds histogram",
+            ]
+            for call, entry in sorted(self.calls.items()):
+                lines += entry['latency'].prometheus(f"{PREFIX}_call_seconds", f'call="{call}"')
+
+            lines += [
+                f"# HELP {PREFIX}_songs_total Canciones procesadas por resultado",
+                f"# TYPE {PREFIX}_songs_total counter",
+            ]
+            for outcome, count in sorted(self.songs.items()):
+                lines.append(f'{PREFIX}_songs_total{{outcome="{outcome}"}} {count}')
+
+            lines += [
+                f"# HELP {PREFIX}_song_seconds Tiempo de punta a punta por canción",
+                f"# TYPE {PREFIX}_song_seconds histogram",
+            ]
+            lines += self.song_seconds.prometheus(f"{PREFIX}_song_seconds")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Expone /metrics y /metrics.json en un hilo aparte
+        Retorna el servidor (server.shutdown() para detenerlo)
+        """
+        import http.server
+
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = metrics.prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif self.path == '/metrics.json':
+                    body = json.dumps(metrics.summary()).encode()
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Sin una línea por scrape en la consola
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+        return server
+
+
+def print_summary(summary):
+    """Tabla de llamadas ordenada por tiempo total: la primera es el cuello de botella"""
+    calls = sorted(summary['calls'].items(), key=lambda item: item[1]['total_seconds'], reverse=True)
+    if calls:
+        print(f"\n⏱️  Tiempo por tipo de llamada (de mayor a menor):")
+        print(f"   {'llamada':<26}{'n':>7}{'errores':>9}{'total s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for call, data in calls:
+            print(f"   {call:<26}{data['count']:>7}{data['errors']:>9}{data['total_seconds']:>10.1f}"
+                  f"{data['p50_ms']:>9.0f}{data['p99_ms']:>9.0f}")
+    songs = summary['songs']
+    if songs['count']:
+        print(f"   🎵 Por canción: p50 {songs['p50_ms'] / 1000:.1f}s, p99 {songs['p99_ms'] / 1000:.1f}s "
+              f"({songs['count']} canciones)")
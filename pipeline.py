@@ -0,0 +1,495 @@
+"""
+Pipeline por etapas para crear las playlists
+Cada etapa tiene sus propios workers y se conecta con la siguiente por una
+cola acotada (backpressure: si una etapa se atrasa, la anterior espera y la
+memoria no crece con el tamaño del catálogo)
+
+    canciones → [enriquecimiento] → [render] → [escritura por usuario]
+                 letra, top tracks,   título y     crear playlist, agregar
+                 portada              descripción  canciones, subir imagen
+
+Así la búsqueda lenta en Genius de una canción no frena las escrituras en
+Spotify de las canciones anteriores: todas las etapas trabajan a la vez
+
+El usuario de cada canción se decide recién al escribirla: va al carril que
+tenga lugar en ese momento (ver assigner.py), salvo que ya tenga una
+playlist en alguna cuenta (ver existing.py)
+"""
+import asyncio
+import time
+
+from assigner import NoLaneAvailable
+from events import INFO, ERROR
+from journal import (
+    song_key,
+    STEP_LYRICS, STEP_PLAYLIST, STEP_TRACKS, STEP_IMAGE, STEP_DONE
+)
+
+# Workers por etapa (la escritura usa los lugares de cada carril, ver assigner.py)
+ENRICH_WORKERS = 8
+RENDER_WORKERS = 2
+
+# Tamaño de cada cola entre etapas (y máximo de canciones esperando carril)
+QUEUE_SIZE = 64
+
+# Máximo de canciones que el render procesa en una sola llamada
+RENDER_BATCH = 32
+
+# Usuarios distintos que prueban una canción cuya playlist no se pudo crear
+MAX_ATTEMPTS = 3
+
+# Marca de fin de cola
+_DONE = object()
+
+
+def build_ordered_tracks(song, extra_tracks, promo_tracks):
+    """Orden final: Principal → Promo1 → Extra1 → Promo2 → Extra2"""
+    ordered_tracks = [song.uri]
+
+    if len(promo_tracks) > 0:
+        ordered_tracks.append(promo_tracks[0])
+
+    if len(extra_tracks) > 0:
+        ordered_tracks.append(extra_tracks[0])
+
+    if len(promo_tracks) > 1:
+        ordered_tracks.append(promo_tracks[1])
+
+    if len(extra_tracks) > 1:
+        ordered_tracks.append(extra_tracks[1])
+
+    return ordered_tracks
+
+
+async def _aiter(items):
+    """Recorre igual un iterable normal o uno asíncrono"""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class OrderedLogWriter:
+    """
+    Escribe los resultados en creation_log.txt en el orden original de las
+    canciones, aunque las playlists terminen en otro orden
+    """
+    def __init__(self, log):
+        self.log = log
+        self.next_idx = 0
+        self.pending = {}
+
+    def add(self, song_idx, line):
+        """Registra la línea de una canción (None si no genera línea)"""
+        self.pending[song_idx] = line
+        while self.next_idx in self.pending:
+            line = self.pending.pop(self.next_idx)
+            if line:
+                self.log.write(line)
+            self.next_idx += 1
+        self.log.flush()
+
+
+class PlaylistPipeline:
+    def __init__(self, creator, token_manager, assigner, journal, promo_tracks, stats,
+                 log_writer, total, enrich_workers=ENRICH_WORKERS,
+                 render_workers=RENDER_WORKERS, queue_size=QUEUE_SIZE, on_finish=None,
+                 existing=None, positions=None):
+        """
+        positions: posición de cada canción en el catálogo completo (con
+        --shards cada proceso recibe solo una parte); por defecto, su índice
+        on_finish(job, error): se llama una vez por canción al terminar (error None
+        si salió bien), desde el event loop: no debe bloquear (ver QueueStream.on_finish)
+        existing: PlaylistIndex con las playlists que ya hay en las cuentas (ver existing.py)
+        """
+        self.creator = creator
+        self.token_manager = token_manager
+        self.assigner = assigner
+        self.journal = journal
+        self.promo_tracks = promo_tracks
+        self.stats = stats
+        self.log_writer = log_writer
+        self.total = total
+        self.enrich_workers = enrich_workers
+        self.render_workers = render_workers
+        self.queue_size = queue_size
+        self.on_finish = on_finish
+        self.existing = existing
+        self.positions = positions
+
+    # ===== RESULTADOS =====
+
+    def _position(self, job):
+        """Número de la canción en el catálogo (el que muestran la consola y el log)"""
+        if self.positions is not None:
+            return self.positions[job['idx']] + 1
+        return job['idx'] + 1
+
+    def _record(self, job, status, msg, **fields):
+        """Un evento 'playlist' por canción con todo lo que pasó (ver events.py)"""
+        song = job['song']
+        seconds = time.perf_counter() - job['started'] if 'started' in job else None
+        level = ERROR if status == 'error' else INFO
+        self.creator.events.log(
+            level, 'playlist', msg,
+            status=status, idx=self._position(job), total=self.total, user_id=job['user_id'],
+            song=song.song, artist=song.artist, uri=song.uri,
+            playlist_id=job.get('playlist_id'), playlist_url=job.get('playlist_url'),
+            playlist_name=job.get('playlist_name'), tracks_added=job.get('tracks_added', 0),
+            image_uploaded=job.get('image_uploaded', False), resumed=job['resumed'],
+            existing=job.get('existing', False),
+            seconds=round(seconds, 3) if seconds is not None else None, **fields
+        )
+        return seconds
+
+    def _success(self, job, songs_added):
+        if job.get('existing'):
+            self.stats['total_existing'] += 1
+        elif job['resumed']:
+            self.stats['total_resumed'] += 1
+        self.stats['total_playlists'] += 1
+        self.stats['total_songs_added'] += songs_added
+        per_user = self.stats['playlists_por_usuario']
+        per_user[job['user_id']] = per_user.get(job['user_id'], 0) + 1
+
+        song = job['song']
+        if 'started' in job:
+            status, icon = 'ok', "✅"
+        else:
+            status, icon = 'skipped', "⏭️ "
+        seconds = self._record(
+            job, status,
+            f"{icon} [{self._position(job)}/{self.total}] {job['user_id']} | "
+            f"{song.song} - {song.artist} → {job['playlist_url']}"
+        )
+        if seconds is not None:
+            self.creator.metrics.observe_song(seconds, 'ok')
+        self.log_writer.add(
+            job['idx'],
+            f"✅ [{self._position(job)}] {job['user_id']} | {job['playlist_name']} | {job['playlist_url']}\n"
+        )
+        if self.on_finish is not None:
+            self.on_finish(job, None)
+
+    def _error(self, job, error):
+        error_msg = f"❌ Error en canción {self._position(job)}: {str(error)}"
+        seconds = self._record(job, 'error', f"   {error_msg}", error=str(error))
+        self.log_writer.add(job['idx'], f"{error_msg}\n")
+        self.stats['total_errors'] += 1
+        self.creator.metrics.observe_song(seconds, 'error')
+        if self.on_finish is not None:
+            self.on_finish(job, error)
+
+    # ===== ETAPA 1: ENRIQUECIMIENTO =====
+
+    async def _enrich(self, job):
+        """Todo lo que se lee de APIs externas: letra, top tracks, portada"""
+        song, state = job['song'], job['state']
+
+        if not state.get(STEP_PLAYLIST):
+            job['lyrics'] = await self.creator.get_lyrics_async(song.song, song.artist)
+            await self.journal.record_async(job['key'], STEP_LYRICS, found=job['lyrics'] is not None)
+
+        job['extra_tracks'] = []
+        if not state.get(STEP_TRACKS) and song.artist_id:
+            # Todavía no tiene usuario: lee con el que esté menos frenado
+            reader = job['owner'] or self.assigner.reader()
+            access_token = await asyncio.to_thread(self.token_manager.token_for, reader)
+            top_tracks = await self.creator.get_artist_top_tracks_async(
+                access_token,
+                song.artist_id,
+                limit=5
+            )
+            # Evitar repetir la canción principal
+            job['extra_tracks'] = [
+                t['uri'] for t in top_tracks
+                if t['uri'] != song.uri
+            ][:2]
+
+        if song.image_url and not state.get(STEP_IMAGE):
+            # Deja la portada lista en el caché; si falla se reintenta al subirla
+            try:
+                await self.creator.prepare_cover_async(song.image_url)
+            except Exception as e:
+                self.creator.events.warning(
+                    'cover_error', f"   ⚠️ Error preparando portada de {song.song}: {e}",
+                    image_url=song.image_url, error=str(e)
+                )
+
+    async def _enrich_worker(self, enrich_queue, render_queue):
+        while True:
+            job = await enrich_queue.get()
+            if job is _DONE:
+                return
+            try:
+                await self._enrich(job)
+                await render_queue.put(job)
+            except Exception as e:
+                self._error(job, e)
+
+    # ===== ETAPA 2: RENDER =====
+
+    def _render(self, jobs):
+        """Títulos y descripciones de un lote de canciones (solo CPU)"""
+        pending = []
+        for job in jobs:
+            if job['state'].get(STEP_PLAYLIST):
+                job['playlist_name'] = job['state']['playlist_name']
+            else:
+                pending.append(job)
+        if not pending:
+            return
+
+        # 🎨 AQUÍ SE GENERA EL NOMBRE DE LA PLAYLIST (ver textrender.py)
+        titles, descriptions = self.creator.render_playlists(
+            [job['song'] for job in pending],
+            [job['lyrics'] for job in pending]
+        )
+        for job, title, description in zip(pending, titles, descriptions):
+            job['playlist_name'] = title
+            job['playlist_description'] = description
+
+    def _adopt(self, job, playlist):
+        """
+        Si la canción ya tiene playlist en alguna cuenta se usa esa: con
+        canciones queda completa; vacía, su dueño la termina
+        (los pasos se encolan en el journal sin esperar el disco: si se
+        pierden, la próxima corrida vuelve a encontrar la playlist)
+        """
+        key = job['key']
+        self.journal.record(
+            key, STEP_PLAYLIST,
+            user_id=playlist['user_id'], playlist_id=playlist['id'],
+            playlist_url=playlist['url'], playlist_name=playlist['name'], existing=True
+        )
+        if playlist['tracks']:
+            self.journal.record(key, STEP_DONE)
+        job['state'] = self.journal.get(key)
+        job['owner'] = job['user_id'] = playlist['user_id']
+        job['playlist_id'], job['playlist_url'] = playlist['id'], playlist['url']
+        job['existing'] = True
+        self.creator.events.debug(
+            'playlist_existing', idx=self._position(job), user_id=playlist['user_id'],
+            playlist_id=playlist['id'], tracks=playlist['tracks']
+        )
+
+    async def _render_worker(self, render_queue, write_queue):
+        finished = False
+        while not finished:
+            # Toma todo lo que ya esté esperando (hasta RENDER_BATCH) de una vez
+            jobs = [await render_queue.get()]
+            while len(jobs) < RENDER_BATCH and not render_queue.empty():
+                jobs.append(render_queue.get_nowait())
+            done_marks = jobs.count(_DONE)
+            if done_marks:
+                finished = True
+                jobs = [job for job in jobs if job is not _DONE]
+                # Las marcas de fin que tomamos de más son de otros workers
+                for _ in range(done_marks - 1):
+                    render_queue.put_nowait(_DONE)
+
+            try:
+                self._render(jobs)
+            except Exception as e:
+                for job in jobs:
+                    self._error(job, e)
+                continue
+            for job in jobs:
+                await write_queue.put(job)
+
+    # ===== ETAPA 3: ESCRITURA =====
+
+    async def _write(self, job):
+        """Crear playlist → (agregar canciones ∥ subir imagen)"""
+        creator, journal = self.creator, self.journal
+        song, state, key, user_id = job['song'], job['state'], job['key'], job['user_id']
+        access_token = await asyncio.to_thread(self.token_manager.token_for, user_id)
+
+        events = creator.events
+        events.debug('write_start', idx=self._position(job), user_id=user_id, song=song.song, artist=song.artist)
+
+        if state.get(STEP_PLAYLIST):
+            # La playlist ya existe: retomamos desde donde quedó
+            playlist_id = state['playlist_id']
+            job['playlist_url'] = state['playlist_url']
+            events.debug('playlist_reused', idx=self._position(job), playlist_id=playlist_id)
+        else:
+            playlist = await creator.create_playlist_async(
+                access_token,
+                user_id,
+                job['playlist_name'],
+                job['playlist_description'],
+                prerendered=True
+            )
+            playlist_id = playlist['id']
+            job['playlist_url'] = playlist['external_urls']['spotify']
+            await journal.record_async(
+                key, STEP_PLAYLIST,
+                user_id=user_id, playlist_id=playlist_id,
+                playlist_url=job['playlist_url'], playlist_name=job['playlist_name']
+            )
+            events.debug('playlist_created', idx=self._position(job), playlist_id=playlist_id)
+        job['playlist_id'] = playlist_id
+
+        async def add_tracks():
+            if state.get(STEP_TRACKS):
+                return 0
+            ordered_tracks = build_ordered_tracks(song, job['extra_tracks'], self.promo_tracks)
+            if await creator.add_tracks_to_playlist_async(access_token, playlist_id, ordered_tracks):
+                await journal.record_async(key, STEP_TRACKS, count=len(ordered_tracks))
+                job['tracks_added'] = len(ordered_tracks)
+                return len(ordered_tracks)
+            events.warning(
+                'add_tracks_failed', f"   ⚠️ Error agregando canciones a {playlist_id} ({song.song})",
+                idx=self._position(job), playlist_id=playlist_id
+            )
+            return 0
+
+        async def upload_image():
+            if not song.image_url or state.get(STEP_IMAGE):
+                return
+            if await creator.upload_playlist_image_async(access_token, playlist_id, song.image_url):
+                await journal.record_async(key, STEP_IMAGE)
+                job['image_uploaded'] = True
+            else:
+                events.warning('image_failed', idx=self._position(job), playlist_id=playlist_id)
+
+        # Canciones e imagen son independientes: se hacen al mismo tiempo
+        songs_added, _ = await asyncio.gather(add_tracks(), upload_image())
+
+        # Solo se marca como completa si las canciones quedaron agregadas
+        if journal.get(key).get(STEP_TRACKS):
+            await journal.record_async(key, STEP_DONE)
+
+        return songs_added
+
+    async def _write_job(self, job, slots):
+        """
+        Espera un carril con lugar, escribe y se lo devuelve al asignador
+        Si la playlist no llegó a crearse, la canción pasa a otro usuario
+        """
+        new_playlist = not job['state'].get(STEP_PLAYLIST)
+        tried, error = set(), None
+        try:
+            while True:
+                try:
+                    job['user_id'] = await self.assigner.acquire(job['owner'], new_playlist, exclude=tried)
+                except NoLaneAvailable as e:
+                    self._error(job, error or e)
+                    return
+
+                ok = False
+                try:
+                    songs_added = await self._write(job)
+                    ok = True
+                except Exception as e:
+                    error = e
+                finally:
+                    await self.assigner.release(
+                        job['user_id'], ok, new_playlist,
+                        created=new_playlist and job.get('playlist_id') is not None
+                    )
+
+                if ok:
+                    self._success(job, songs_added)
+                    return
+                tried.add(job['user_id'])
+                if job['owner'] or job.get('playlist_id') is not None or len(tried) >= MAX_ATTEMPTS:
+                    self._error(job, error)
+                    return
+                self.creator.events.warning(
+                    'reassigned', idx=self._position(job), user_id=job['user_id'], error=str(error)
+                )
+        finally:
+            slots.release()
+
+    async def _dispatch(self, write_queue):
+        """
+        Cada canción renderizada espera su carril por separado: una que solo
+        puede ir a un usuario ocupado no frena a las que pueden ir a otro
+        """
+        slots = asyncio.Semaphore(self.queue_size)
+        tasks = set()
+        while True:
+            job = await write_queue.get()
+            if job is _DONE:
+                break
+            await slots.acquire()
+            task = asyncio.create_task(self._write_job(job, slots))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+    # ===== ORQUESTACIÓN =====
+
+    async def _produce(self, songs, enrich_queue):
+        """Encola las canciones; las ya completadas no pasan por las etapas"""
+        async for song_idx, song in _aiter(songs):
+            key = song_key(song)
+            state = self.journal.get(key)
+            # Una playlist ya creada se termina con el usuario que la creó
+            owner = state.get('user_id') if state.get(STEP_PLAYLIST) else None
+            if not self.assigner.has_lane(owner):
+                owner = None
+            job = {
+                'idx': song_idx, 'song': song, 'user_id': owner, 'owner': owner,
+                'key': key, 'state': state,
+                # El journal va completando state a medida que avanza: se
+                # mira al armar el trabajo si venía de otra corrida
+                'resumed': bool(state)
+            }
+
+            if self.existing is not None and not state.get(STEP_PLAYLIST):
+                # Antes de enriquecer: si ya está completa en Spotify no se
+                # consulta Genius ni top tracks
+                playlist = self.existing.match(song)
+                if playlist is not None:
+                    self._adopt(job, playlist)
+                    state = job['state']
+
+            if state.get(STEP_DONE):
+                job['user_id'] = state.get('user_id')
+                self.assigner.count_existing(job['user_id'])
+                job['playlist_id'] = state.get('playlist_id')
+                job['playlist_name'] = state['playlist_name']
+                job['playlist_url'] = state['playlist_url']
+                self._success(job, 0)
+                continue
+
+            # Tiempo de punta a punta: incluye la espera en las colas
+            job['started'] = time.perf_counter()
+            await enrich_queue.put(job)
+
+    async def run(self, songs):
+        """
+        songs: iterable (o iterable asíncrono, ver jobqueue.py) de (song_idx, song) en orden
+        El usuario de cada una lo elige el asignador al momento de escribirla
+        """
+        enrich_queue = asyncio.Queue(self.queue_size)
+        render_queue = asyncio.Queue(self.queue_size)
+        write_queue = asyncio.Queue(self.queue_size)
+
+        enrichers = [
+            asyncio.create_task(self._enrich_worker(enrich_queue, render_queue))
+            for _ in range(self.enrich_workers)
+        ]
+        renderers = [
+            asyncio.create_task(self._render_worker(render_queue, write_queue))
+            for _ in range(self.render_workers)
+        ]
+        dispatcher = asyncio.create_task(self._dispatch(write_queue))
+
+        # Cada etapa termina cuando la anterior terminó y vació su cola
+        await self._produce(songs, enrich_queue)
+        for _ in enrichers:
+            await enrich_queue.put(_DONE)
+        await asyncio.gather(*enrichers)
+
+        for _ in renderers:
+            await render_queue.put(_DONE)
+        await asyncio.gather(*renderers)
+
+        await write_queue.put(_DONE)
+        await dispatcher
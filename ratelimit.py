@@ -0,0 +1,179 @@
+"""
+Planificador de peticiones con control de rate limit
+- Un token bucket por access token (cada usuario tiene su propio límite)
+- Respeta el header Retry-After cuando Spotify responde 429
+- Concurrencia global adaptativa (AIMD): sube de a poco mientras todo va
+  bien y se reduce a la mitad cuando aparece un 429
+"""
+import threading
+import time
+
+
+# Códigos que se reintentan automáticamente
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket con tasa adaptativa
+    La tasa crece de forma aditiva con cada éxito y se divide con cada 429
+    """
+    def __init__(self, rate, capacity, min_rate, max_rate):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds, throttled=True):
+        """Detiene el bucket (Retry-After); si fue un 429 reduce la tasa a la mitad"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            if throttled:
+                self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+
+    def on_success(self, increase):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + increase)
+
+
+class RequestScheduler:
+    """
+    Planificador compartido por todas las peticiones HTTP del creador
+
+    Uso:
+        response = scheduler.request(lambda: requests.get(url), key=access_token)
+    """
+    def __init__(self, rate_per_token=5.0, max_rate_per_token=50.0, burst=5,
+                 initial_concurrency=8, min_concurrency=1, max_concurrency=64,
+                 max_retries=6, default_retry_after=1.0):
+        self.rate_per_token = rate_per_token
+        self.max_rate_per_token = max_rate_per_token
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.default_retry_after = default_retry_after
+
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+
+        # Estado AIMD de la concurrencia global
+        self.limit = float(initial_concurrency)
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+        self.stats = {'requests': 0, 'throttled': 0, 'retries': 0}
+
+    def bucket_for(self, key):
+        """Devuelve (o crea) el token bucket de un access token"""
+        with self.buckets_lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(
+                    self.rate_per_token, self.burst,
+                    min_rate=0.5, max_rate=self.max_rate_per_token
+                )
+                self.buckets[key] = bucket
+            return bucket
+
+    def backoff_remaining(self, key):
+        """Segundos que le faltan a la pausa (Retry-After) del bucket de `key` (0 si no hay)"""
+        with self.buckets_lock:
+            bucket = self.buckets.get(key)
+        if bucket is None:
+            return 0.0
+        return max(0.0, bucket.paused_until - time.monotonic())
+
+    def _acquire_slot(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def _release_slot(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.stats['requests'] += 1
+            self.condition.notify_all()
+
+    def _on_success(self):
+        # Aumento aditivo: ~+1 de concurrencia por cada "ventana" completa
+        with self.condition:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def _on_throttled(self, retry_after):
+        # Disminución multiplicativa, una sola vez por ráfaga de 429
+        with self.condition:
+            self.stats['throttled'] += 1
+            now = time.monotonic()
+            if now - self.last_decrease >= retry_after:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.last_decrease = now
+
+    def _retry_after(self, response, attempt):
+        value = response.headers.get('Retry-After')
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return self.default_retry_after * (2 ** attempt)
+
+    def request(self, send, key=None):
+        """
+        Ejecuta `send()` respetando el bucket de `key` y la concurrencia global
+        Reintenta 429/5xx; si se agotan los reintentos retorna la última respuesta
+        """
+        bucket = self.bucket_for(key)
+
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            self._acquire_slot()
+            try:
+                response = send()
+            finally:
+                self._release_slot()
+
+            if response.status_code not in RETRY_STATUS:
+                bucket.on_success(increase=0.5)
+                self._on_success()
+                return response
+
+            if attempt == self.max_retries:
+                break
+
+            retry_after = self._retry_after(response, attempt)
+            throttled = response.status_code == 429
+            if throttled:
+                self._on_throttled(retry_after)
+            else:
+                with self.condition:
+                    self.stats['retries'] += 1
+            bucket.pause(retry_after, throttled=throttled)
+
+        return response
@@ -0,0 +1,148 @@
+"""
+Resolución de canciones sin URI (charts de YouTube) → tracks de Spotify
+- Búsquedas concurrentes en /v1/search (pasan por el RequestScheduler del
+  creator: rate limit y reintentos en 429)
+- Caché persistente de los candidatos por (canción, artista) normalizados:
+  al volver a correr, las entradas que no cambiaron no hacen ninguna llamada
+- Los candidatos se ordenan por similitud de título y artista (rapidfuzz si
+  está instalado, si no difflib)
+
+Las filas resueltas quedan con la forma de Dragons_data.json: uri,
+artist_id, artist_uri e image_url de Spotify
+"""
+import concurrent.futures
+import difflib
+import threading
+
+from cache import SearchCache, normalize_key
+from catalog import CatalogIndex, clean_title, primary_artist
+
+# Candidatos por búsqueda
+SEARCH_LIMIT = 5
+
+# Puntaje mínimo (0 a 1) para aceptar un candidato
+MIN_SCORE = 0.75
+
+# Búsquedas simultáneas
+MAX_WORKERS = 16
+
+
+def _ratio():
+    try:
+        from rapidfuzz import fuzz
+        return lambda a, b: fuzz.ratio(a, b) / 100
+    except ImportError:
+        return lambda a, b: difflib.SequenceMatcher(None, a, b).ratio()
+
+
+similarity = _ratio()
+
+
+def score(record, candidate):
+    """Similitud (0 a 1) entre una fila del catálogo y un candidato de Spotify"""
+    title = normalize_key(clean_title(record['song']))
+    artist = normalize_key(primary_artist(record['artist']))
+    title_score = similarity(title, normalize_key(clean_title(candidate['name'])))
+    artist_score = max(
+        (similarity(artist, normalize_key(name)) for name in candidate['artists']),
+        default=0.0
+    )
+    return 0.6 * title_score + 0.4 * artist_score
+
+
+def best_match(record, candidates, min_score=MIN_SCORE):
+    """Mejor candidato si supera min_score, si no None"""
+    scored = [(score(record, candidate), candidate) for candidate in candidates or []]
+    if not scored:
+        return None
+    best_score, best = max(scored, key=lambda pair: pair[0])
+    return best if best_score >= min_score else None
+
+
+class SpotifyResolver:
+    def __init__(self, creator, search_cache=None, max_workers=MAX_WORKERS,
+                 min_score=MIN_SCORE, market=None):
+        self.creator = creator
+        self.search_cache = search_cache if search_cache is not None else SearchCache()
+        self.max_workers = max_workers
+        self.min_score = min_score
+        self.market = market
+        self.access_token = None
+        self.token_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {'resolved': 0, 'unresolved': 0, 'errors': 0}
+
+    def _count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def _token(self):
+        # Se pide recién si hay que buscar algo (todo en caché = cero llamadas)
+        with self.token_lock:
+            if self.access_token is None:
+                self.access_token = self.creator.get_client_token()
+            return self.access_token
+
+    def _candidates(self, record):
+        title, artist = clean_title(record['song']), primary_artist(record['artist'])
+
+        def fetch():
+            return self.creator.search_tracks(
+                self._token(), f'track:"{title}" artist:"{artist}"',
+                limit=SEARCH_LIMIT, market=self.market
+            )
+
+        return self.search_cache.get_or_fetch(title, artist, fetch)
+
+    def resolve_one(self, record):
+        """
+        Completa la fila con los datos de Spotify
+        Retorna True si se resolvió, False si no hay coincidencia y None si
+        la búsqueda falló (vale la pena reintentarla)
+        """
+        candidates = self._candidates(record)
+        if candidates is None:
+            self._count('errors')
+            return None
+
+        match = best_match(record, candidates, self.min_score)
+        if match is None:
+            self._count('unresolved')
+            return False
+
+        record['uri'] = match['uri']
+        record['artist_id'] = match['artist_id']
+        record['artist_uri'] = f"spotify:artist:{match['artist_id']}" if match['artist_id'] else None
+        if match['image_url']:
+            record['image_url'] = match['image_url']
+        self._count('resolved')
+        return True
+
+    def resolve(self, records):
+        """
+        Resuelve (en paralelo) las filas sin URI; las modifica en el lugar
+        Retorna las filas en el orden original sin las que Spotify confirmó
+        que no tiene: las que fallaron por un error (5xx, timeout) quedan
+        sin URI para que otro --resolve las reintente
+        """
+        pending = [record for record in records if not record.get('uri')]
+        unmatched = set()
+        if pending:
+            with concurrent.futures.ThreadPoolExecutor(self.max_workers) as pool:
+                results = list(pool.map(self.resolve_one, pending))
+            unmatched = {id(record) for record, result in zip(pending, results) if result is False}
+        return [record for record in records if id(record) not in unmatched]
+
+
+def resolve_catalog(catalog, resolver):
+    """
+    Resuelve las filas sin URI de un catálogo y lo vuelve a deduplicar (una
+    canción de YouTube puede resultar ser la misma que una de Spotify)
+    Las filas sin coincidencia en Spotify quedan afuera; las que fallaron por
+    un error quedan sin URI (se reintentan en el próximo --resolve)
+    Retorna (catálogo nuevo, estadísticas del índice)
+    """
+    index = CatalogIndex()
+    for record in resolver.resolve(list(catalog.rows())):
+        index.add(record)
+    return index.catalog(), index.stats
@@ -0,0 +1,372 @@
+"""
+Ejecución repartida en varios procesos (uno por núcleo)
+
+Aunque todo sea asíncrono, un solo proceso hace el trabajo de CPU (JSON,
+limpieza de letras, portadas) de todos los usuarios. Con `--shards N` se
+arrancan N procesos worker: cada uno es dueño de un grupo de users.json y
+de su parte del catálogo, y corre el pipeline normal con esos usuarios
+
+    python creator.py run --shards 4
+
+- Los usuarios se reparten en N grupos disjuntos; las canciones, en
+  proporción a la cantidad de usuarios de cada grupo
+- Al reanudar, una canción cuya playlist ya existe va al worker de su dueño
+- Todos comparten el journal (cada paso es un append de una línea), el
+  caché SQLite, las portadas, el caché de tokens y el cupo diario; cada uno
+  tiene su archivo de eventos (outputs/events.shardN.jsonl)
+- Cada worker le manda su progreso y sus métricas al coordinador, que
+  muestra el total y al final arma creation_log.txt, la distribución por
+  usuario y outputs/metrics.json con todo junto
+"""
+import heapq
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from journal import load_journal, song_key, STEP_PLAYLIST
+
+# Cada cuánto los workers mandan su progreso
+PROGRESS_INTERVAL = 1.0
+
+# Al cortar (Ctrl+C, error del coordinador) cuánto se espera a que los
+# workers cierren journal y cachés antes de terminarlos
+JOIN_TIMEOUT = 30.0
+
+
+def shard_path(path, shard):
+    """outputs/events.jsonl → outputs/events.shard2.jsonl"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard}{ext}"
+
+
+def split_users(users, shards):
+    """N grupos disjuntos (nunca vacíos) de usuarios"""
+    if not users:
+        return []
+    shards = max(1, min(shards, len(users)))
+    return [users[i::shards] for i in range(shards)]
+
+
+def split_songs(songs, user_groups, state):
+    """
+    Canciones de cada grupo, en proporción a la cantidad de usuarios y en el
+    orden del catálogo. Una canción con playlist ya creada va al grupo de su dueño
+    Retorna, por grupo, la lista de (posición en el catálogo, canción)
+    """
+    shard_of = {user['user_id']: i for i, group in enumerate(user_groups) for user in group}
+    shares = [[] for _ in user_groups]
+    free = []
+    for song_idx, song in enumerate(songs):
+        song_state = state.get(song_key(song), {})
+        owner = song_state.get('user_id') if song_state.get(STEP_PLAYLIST) else None
+        if owner in shard_of:
+            shares[shard_of[owner]].append((song_idx, song))
+        else:
+            free.append((song_idx, song))
+
+    # El grupo menos cargado (por usuario) se lleva la siguiente
+    heap = [(len(share) / len(group), i) for i, (share, group) in enumerate(zip(shares, user_groups))]
+    heapq.heapify(heap)
+    for item in free:
+        _, i = heapq.heappop(heap)
+        shares[i].append(item)
+        heapq.heappush(heap, (len(shares[i]) / len(user_groups[i]), i))
+
+    return [sorted(share, key=lambda item: item[0]) for share in shares]
+
+
+def _copy_stats(stats):
+    """Copia del dict de estadísticas que el pipeline va modificando en otro hilo"""
+    while True:
+        try:
+            return {key: dict(value) if isinstance(value, dict) else value for key, value in stats.items()}
+        except RuntimeError:
+            # Cambió de tamaño mientras se copiaba: se intenta de nuevo
+            continue
+
+
+def _drain(progress):
+    """Descarta lo que quedó en la cola de progreso"""
+    while True:
+        try:
+            progress.get_nowait()
+        except (queue.Empty, OSError, EOFError):
+            return
+
+
+def _stop_workers(processes, progress):
+    """
+    Espera a los workers vaciando la cola mientras tanto: un worker que
+    todavía está mandando progreso no termina hasta que alguien lo lea
+    (join sin vaciar se queda colgado). Al vencer JOIN_TIMEOUT se terminan
+    """
+    deadline = time.monotonic() + JOIN_TIMEOUT
+    for process in processes:
+        while process.is_alive() and time.monotonic() < deadline:
+            _drain(progress)
+            process.join(0.2)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    _drain(progress)
+
+
+def build_shard_creator(shard, users, options):
+    """Creador de un worker: APIs reales, sus eventos y un pool de portadas a su medida"""
+    from creator import build_creator
+    from events import EventLog
+    from images import CoverImageCache
+
+    events_path = options['events_path']
+    return build_creator(
+        len(users), options['in_flight_per_user'], options['http2'],
+        events=EventLog(
+            shard_path(events_path, shard) if events_path else None,
+            level=options['log_level'], append=True, console=None
+        ),
+        covers=CoverImageCache(max_workers=max(1, (os.cpu_count() or 1) // options['shards']))
+    )
+
+
+def _worker(shard, users, share, options, factory, progress):
+    """
+    Proceso worker: corre el pipeline normal con su grupo de usuarios
+    share: sus (posición en el catálogo, canción), para que el log numere igual que sin --shards
+    """
+    # La consola es del coordinador
+    sys.stdout = open(os.devnull, 'w')
+    from creator import create_playlists_circular_distribution
+
+    creator = (factory or build_shard_creator)(shard, users, options)
+    stats = {}
+    stop = threading.Event()
+
+    def report():
+        while not stop.wait(PROGRESS_INTERVAL):
+            progress.put(('progress', shard, _copy_stats(stats), creator.metrics.snapshot(), None))
+
+    threading.Thread(target=report, daemon=True).start()
+    error = None
+    try:
+        # El coordinador ya dejó el journal listo: los workers siempre agregan
+        create_playlists_circular_distribution(
+            in_flight_per_user=options['in_flight_per_user'],
+            resume=True,
+            songs=[song for _, song in share],
+            positions=[position for position, _ in share],
+            catalog_size=options['catalog_size'],
+            user_list=users,
+            creator=creator,
+            log_path=shard_path(options['log_path'], shard),
+            journal_path=options['journal_path'],
+            token_cache_path=options['token_cache_path'],
+            metrics_path=None,
+            daily_quota=options['daily_quota'],
+            quota_path=options['quota_path'],
+            check_existing=options['check_existing'],
+            stats=stats,
+            log_summary=False
+        )
+    except BaseException:
+        error = traceback.format_exc()
+    finally:
+        stop.set()
+        progress.put(('done', shard, _copy_stats(stats), creator.metrics.snapshot(), error))
+
+
+def run_sharded(shards, in_flight_per_user=None, resume=False, http2=False, songs=None,
+                user_list=None, log_path='creation_log.txt', journal_path=None,
+                token_cache_path=None, metrics_path=None, metrics_port=None,
+                events_path=None, log_level='info', daily_quota=None, quota_path=None,
+                check_existing=True, factory=None):
+    """
+    Igual que create_playlists_circular_distribution pero con `shards`
+    procesos worker. factory(shard, users, options) arma el creador de cada
+    worker (tiene que poder mandarse a otro proceso: una función de módulo)
+    Retorna el dict de estadísticas de todos juntos
+    """
+    import creator as creator_module
+    from assigner import DEFAULT_QUOTA_PATH
+    from events import DEFAULT_EVENTS_PATH
+    from journal import DEFAULT_JOURNAL_PATH
+    from metrics import Metrics, DEFAULT_METRICS_PATH, print_summary
+    from tokens import DEFAULT_TOKEN_CACHE_PATH
+
+    options = {
+        'shards': shards,
+        'in_flight_per_user': in_flight_per_user or creator_module.IN_FLIGHT_PER_USER,
+        'http2': http2,
+        'log_path': log_path,
+        'journal_path': journal_path or DEFAULT_JOURNAL_PATH,
+        'token_cache_path': token_cache_path or DEFAULT_TOKEN_CACHE_PATH,
+        'events_path': DEFAULT_EVENTS_PATH if events_path is None else events_path,
+        'log_level': log_level,
+        'daily_quota': daily_quota,
+        'quota_path': quota_path or DEFAULT_QUOTA_PATH,
+        'check_existing': check_existing,
+    }
+    metrics_path = DEFAULT_METRICS_PATH if metrics_path is None else metrics_path
+
+    if songs is None:
+        songs = creator_module.load_songs()
+    songs, skipped = creator_module.playable_songs(songs)
+    if user_list is None:
+        user_list = creator_module.load_users()
+
+    groups = split_users(user_list, shards)
+    if not groups:
+        raise ValueError("No hay usuarios para repartir entre los procesos")
+    state = load_journal(options['journal_path']) if resume else {}
+    shares = split_songs(songs, groups, state)
+    options['catalog_size'] = len(songs)
+
+    # Corrida nueva: journal vacío y sin restos de los workers anteriores
+    if not resume:
+        os.makedirs(os.path.dirname(os.path.abspath(options['journal_path'])), exist_ok=True)
+        open(options['journal_path'], 'w').close()
+        if options['events_path']:
+            for shard in range(len(groups)):
+                if os.path.exists(shard_path(options['events_path'], shard)):
+                    os.remove(shard_path(options['events_path'], shard))
+    for shard in range(len(groups)):
+        if os.path.exists(shard_path(log_path, shard)):
+            os.remove(shard_path(log_path, shard))
+
+    print("\n" + "="*70)
+    print("🎵 SPOTIFY PLAYLIST CREATOR - VARIOS PROCESOS")
+    print("="*70)
+    print(f"\n📊 Configuración:")
+    print(f"   • Total de usuarios: {len(user_list)}")
+    print(f"   • Total de canciones: {len(songs)}")
+    if skipped:
+        print(f"   • Descartadas (repetidas o sin URI): {skipped}")
+    print(f"   • Procesos: {len(groups)}")
+    for shard, (group, share) in enumerate(zip(groups, shares)):
+        print(f"     - Proceso {shard}: {len(group)} usuarios, {len(share)} canciones")
+    print("\n" + "="*70 + "\n")
+
+    started = datetime.now()
+    metrics = Metrics()
+    metrics_server = None
+    if metrics_port:
+        metrics_server = metrics.serve(metrics_port)
+        print(f"📈 Métricas en http://127.0.0.1:{metrics_port}/metrics\n")
+
+    # spawn: procesos limpios (el coordinador puede tener hilos andando)
+    context = multiprocessing.get_context('spawn')
+    progress = context.Queue()
+    processes = [
+        context.Process(
+            target=_worker, args=(shard, group, share, options, factory, progress),
+            name=f"shard{shard}"
+        )
+        for shard, (group, share) in enumerate(zip(groups, shares))
+    ]
+    for process in processes:
+        process.start()
+
+    latest_stats = {shard: {} for shard in range(len(groups))}
+    latest_metrics = {}
+    errors = {}
+    pending = set(range(len(groups)))
+    start = time.perf_counter()
+    last_print = 0.0
+    try:
+        while pending:
+            try:
+                kind, shard, stats, snapshot, error = progress.get(timeout=PROGRESS_INTERVAL)
+            except queue.Empty:
+                # Un worker que murió sin avisar (kill, segfault) no va a mandar 'done'
+                for shard in list(pending):
+                    if not processes[shard].is_alive():
+                        pending.discard(shard)
+                        errors[shard] = f"El proceso terminó con código {processes[shard].exitcode}"
+            else:
+                latest_stats[shard] = stats
+                latest_metrics[shard] = snapshot
+                if kind == 'done':
+                    pending.discard(shard)
+                    if error:
+                        errors[shard] = error
+                metrics.load_snapshots(list(latest_metrics.values()))
+
+            now = time.perf_counter()
+            if now - last_print >= PROGRESS_INTERVAL or not pending:
+                last_print = now
+                created = sum(stats.get('total_playlists', 0) for stats in latest_stats.values())
+                failed = sum(stats.get('total_errors', 0) for stats in latest_stats.values())
+                elapsed = now - start
+                print(f"⏳ {created + failed}/{len(songs)} canciones | ✅ {created} | ❌ {failed} | "
+                      f"{created / elapsed if elapsed else 0:.1f} playlists/seg | "
+                      f"{len(pending)} procesos activos")
+    finally:
+        _stop_workers(processes, progress)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if metrics_path:
+            metrics.save_json(metrics_path)
+    elapsed = time.perf_counter() - start
+
+    # ===== UNIR RESULTADOS =====
+    stats = creator_module.new_stats(user_list)
+    stats['carriles'] = {}
+    for shard, shard_stats in latest_stats.items():
+        for key in ('total_playlists', 'total_errors', 'total_songs_added', 'total_resumed',
+                    'total_existing'):
+            stats[key] += shard_stats.get(key, 0)
+        stats['playlists_por_usuario'].update(shard_stats.get('playlists_por_usuario', {}))
+        stats['carriles'].update(shard_stats.get('carriles', {}))
+        if shard in errors:
+            # Lo que el worker no llegó a procesar cuenta como error
+            processed = shard_stats.get('total_playlists', 0) + shard_stats.get('total_errors', 0)
+            stats['total_errors'] += max(0, len(shares[shard]) - processed)
+
+    with open(log_path, 'a' if resume else 'w', encoding='utf-8') as log:
+        creator_module.write_log_header(
+            log, len(songs), len(user_list), resume, started, detail=f" en {len(groups)} procesos"
+        )
+        for shard, group in enumerate(groups):
+            path = shard_path(log_path, shard)
+            log.write(f"----- Proceso {shard}: {', '.join(user['user_id'] for user in group)} -----\n")
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    log.write(f.read())
+                os.remove(path)
+            if shard in errors:
+                log.write(f"❌ El proceso falló:\n{errors[shard]}\n")
+        creator_module.write_log_summary(log, stats, resume)
+
+    # ===== RESUMEN FINAL =====
+    print("\n" + "="*70)
+    print("🎉 PROCESO COMPLETADO")
+    print("="*70)
+    print(f"\n📊 Estadísticas Globales:")
+    print(f"   ✅ Playlists creadas: {creator_module.created_count(stats)}/{len(songs)}")
+    print(f"   🎵 Canciones agregadas: {stats['total_songs_added']}")
+    print(f"   ❌ Errores: {stats['total_errors']}")
+    if resume:
+        print(f"   ♻️ Retomadas de la corrida anterior: {stats['total_resumed']}")
+    if stats['total_existing']:
+        print(f"   🔁 Ya existían en Spotify (no se crearon de nuevo): {stats['total_existing']}")
+    print(f"   🚀 {stats['total_playlists'] / elapsed if elapsed else 0:.1f} playlists/seg "
+          f"con {len(groups)} procesos")
+    for shard, error in sorted(errors.items()):
+        print(f"   ❌ Proceso {shard} falló: {error.strip().splitlines()[-1]}")
+    if stats['total_playlists'] > 0:
+        print(f"   📈 Tasa de éxito: {stats['total_playlists'] / len(songs) * 100:.1f}%")
+
+    print_summary(metrics.summary())
+    creator_module.print_user_distribution(stats)
+
+    print(f"\n📄 Log detallado: {log_path}")
+    if options['events_path']:
+        print(f"🧾 Eventos: {shard_path(options['events_path'], 'N')}")
+    if metrics_path:
+        print(f"📈 Métricas: {metrics_path}")
+    print("="*70 + "\n")
+    return stats
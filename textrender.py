@@ -0,0 +1,117 @@
+"""
+Render de títulos y descripciones de playlists para todo el catálogo
+- Tablas de translate precalculadas (nada de `import re` ni regex
+  recompiladas por llamada)
+- Una sola pasada por texto: split/join, encode ASCII y translate corren en C
+- Solo se limpia el prefijo de la letra que realmente se va a usar (el título
+  y la descripción usan a lo sumo ~300 caracteres de letras de miles)
+
+Produce exactamente el mismo texto que las funciones originales de
+SpotifyPlaylistCreator (clean_text_for_spotify, create_playlist_title y
+create_playlist_description), ya limpio como lo enviaba create_playlist
+"""
+
+# Límites de Spotify
+MAX_TITLE = 100
+MAX_DESCRIPTION = 300
+
+NO_LYRICS_DESCRIPTION = "Letra no disponible."
+
+# Caracteres de control ASCII que Spotify rechaza (0x00-0x1F y 0x7F)
+_CONTROL_BYTES = bytes(range(0x20)) + b'\x7f'
+
+
+def clean_text(text):
+    """
+    Limpia el texto para que sea aceptado por Spotify
+    Remueve caracteres no ASCII y de control, y colapsa los espacios
+    """
+    text = text.encode('ascii', 'ignore').translate(None, _CONTROL_BYTES).decode('ascii')
+    return ' '.join(text.split())
+
+
+def clean_multiline(text):
+    """
+    Igual que clean_text pero antes convierte saltos de línea (y cualquier
+    espacio Unicode) en espacios simples, para que las líneas no se peguen
+    """
+    return clean_text(' '.join(text.split()))
+
+
+def _clean_prefix(text, needed):
+    """
+    Limpia solo el comienzo del texto: retorna un prefijo de
+    clean_multiline(text) con al menos `needed` caracteres (o el texto
+    completo limpio si es más corto)
+    """
+    window = needed * 2 + 32
+    while True:
+        cleaned = clean_multiline(text[:window])
+        if len(cleaned) >= needed or window >= len(text):
+            return cleaned
+        window *= 2
+
+
+def render_title(song_name, artist_name, lyrics):
+    """
+    Título: "<canción> <artista> <comienzo de la letra>..." (máx. 100)
+    Ya con el colapso de espacios que create_playlist le hacía al nombre
+    (el doble espacio antes de la letra nunca llegaba a Spotify)
+    """
+    return ' '.join(_title(song_name, artist_name, lyrics).split())
+
+
+def _title(song_name, artist_name, lyrics):
+    base_title = f"{clean_text(song_name)} {clean_text(artist_name)}"
+
+    if len(base_title) >= MAX_TITLE:
+        return base_title[:MAX_TITLE - 3] + "..."
+
+    if not lyrics:
+        return base_title
+
+    # Calcular espacio disponible
+    available_space = MAX_TITLE - len(base_title) - 3
+    if available_space <= 10:
+        return base_title
+
+    preview = _clean_prefix(lyrics, available_space + 1)
+    if len(preview) <= available_space:
+        return f"{base_title}  {preview}"
+
+    truncated = preview[:available_space - 3]
+    last_space = truncated.rfind(' ')
+    if last_space > 10:
+        truncated = truncated[:last_space]
+    return f"{base_title}  {truncated}..."
+
+
+def render_description(lyrics):
+    """Descripción: SOLO la letra, limitada a 300 caracteres"""
+    if not lyrics:
+        return NO_LYRICS_DESCRIPTION
+
+    lyrics = _clean_prefix(lyrics, MAX_DESCRIPTION + 1)
+    if len(lyrics) <= MAX_DESCRIPTION:
+        return lyrics
+
+    truncated = lyrics[:MAX_DESCRIPTION - 3]
+    last_space = truncated.rfind(' ')
+    if last_space > 280:  # evita cortar palabras
+        truncated = truncated[:last_space]
+    return truncated.strip() + "..."
+
+
+def render_catalog(songs, lyrics):
+    """
+    Títulos y descripciones de muchas canciones en una sola llamada
+    songs: lista de canciones (catalog.Track: .song y .artist)
+    lyrics: lista paralela con la letra de cada canción (o None)
+    Retorna (titles, descriptions)
+    """
+    titles = [
+        render_title(song.song, song.artist, song_lyrics)
+        for song, song_lyrics in zip(songs, lyrics)
+    ]
+    descriptions = [render_description(song_lyrics) for song_lyrics in lyrics]
+    return titles, descriptions
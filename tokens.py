@@ -0,0 +1,212 @@
+"""
+Manejo de access tokens de todos los usuarios
+- Guarda cuándo expira cada token (expires_in) y lo renueva antes de tiempo
+  en un hilo de fondo, así las corridas largas no fallan a la hora
+- Al arrancar renueva todos los usuarios en paralelo, reutilizando los tokens
+  que sigan vigentes desde un caché local cifrado
+- Un 401 dispara una sola renovación por usuario aunque lleguen varios juntos
+
+El caché cifrado requiere `pip install cryptography`; si no está instalado
+simplemente no se persiste (los tokens se piden de nuevo en cada corrida)
+"""
+import base64
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+
+from cache import SingleFlight, file_lock
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TOKEN_CACHE_PATH = os.path.join(base_dir, "./Credencials/token_cache.bin")
+
+# Renovar cuando falten menos de 5 minutos para que expire
+REFRESH_MARGIN = 300
+
+
+def _refresh_hash(refresh_token):
+    # Si cambia el refresh token de un usuario, su caché deja de valer
+    return hashlib.sha256(refresh_token.encode()).hexdigest()[:16]
+
+
+class TokenManager:
+    def __init__(self, creator, users, cache_path=DEFAULT_TOKEN_CACHE_PATH,
+                 refresh_margin=REFRESH_MARGIN, max_workers=8):
+        self.creator = creator
+        self.refresh_tokens = {user['user_id']: user['refresh_token'] for user in users}
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.max_workers = max_workers
+
+        self.tokens = {}          # user_id → {'access_token', 'expires_at'}
+        self.token_owner = {}     # access_token (actual o anterior) → user_id
+        self.errors = {}          # user_id → último error de renovación
+        self.lock = threading.Lock()
+        self.single_flight = SingleFlight()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {'refreshes': 0, 'from_cache': 0, 'after_401': 0}
+
+        self.fernet = self._build_fernet(creator.client_secret)
+
+    # ===== CACHÉ CIFRADO =====
+
+    def _build_fernet(self, secret):
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError:
+            return None
+        key = base64.urlsafe_b64encode(hashlib.sha256(secret.encode()).digest())
+        return Fernet(key)
+
+    def _load_cache(self):
+        if self.fernet is None or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'rb') as f:
+                return json.loads(self.fernet.decrypt(f.read()))
+        except Exception:
+            # Caché corrupto o de otra app: se ignora
+            return {}
+
+    def _save_cache(self):
+        if self.fernet is None:
+            return
+        with self.lock:
+            data = {
+                user_id: {**info, 'refresh_hash': _refresh_hash(self.refresh_tokens[user_id])}
+                for user_id, info in self.tokens.items()
+            }
+        # Se conservan los usuarios de otros procesos (--shards comparte el
+        # caché): con el lock, otro proceso no puede guardar entre la lectura y el reemplazo
+        with file_lock(self.cache_path):
+            data = {**self._load_cache(), **data}
+            tmp_path = f"{self.cache_path}.tmp{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(self.fernet.encrypt(json.dumps(data).encode()))
+            os.replace(tmp_path, self.cache_path)
+
+    # ===== RENOVACIÓN =====
+
+    def _store(self, user_id, access_token, expires_at):
+        with self.lock:
+            # Los tokens viejos siguen mapeados: un 401 tardío con un token
+            # ya renovado debe poder encontrar a su usuario
+            self.tokens[user_id] = {'access_token': access_token, 'expires_at': expires_at}
+            self.token_owner[access_token] = user_id
+            self.errors.pop(user_id, None)
+
+    def _refresh(self, user_id):
+        info = self.creator.get_access_token_info(self.refresh_tokens[user_id])
+        # Spotify a veces rota el refresh token
+        if info.get('refresh_token'):
+            self.refresh_tokens[user_id] = info['refresh_token']
+        self._store(user_id, info['access_token'], time.time() + info.get('expires_in', 3600))
+        self.stats['refreshes'] += 1
+        return info['access_token']
+
+    def refresh(self, user_id):
+        """Renueva el token de un usuario (una sola petición aunque lo pidan varios)"""
+        return self.single_flight.do(user_id, lambda: self._refresh(user_id))
+
+    def _expiring(self, user_id, now=None):
+        info = self.tokens.get(user_id)
+        now = now or time.time()
+        return info is None or info['expires_at'] - now < self.refresh_margin
+
+    def start(self):
+        """
+        Carga el caché y renueva en paralelo los tokens que falten o estén por
+        expirar. Retorna {user_id: error} de los usuarios que fallaron
+        """
+        cached = self._load_cache()
+        now = time.time()
+        for user_id, refresh_token in self.refresh_tokens.items():
+            info = cached.get(user_id)
+            if (info and info.get('refresh_hash') == _refresh_hash(refresh_token)
+                    and info['expires_at'] - now > self.refresh_margin):
+                self._store(user_id, info['access_token'], info['expires_at'])
+                self.stats['from_cache'] += 1
+
+        pending = [user_id for user_id in self.refresh_tokens if self._expiring(user_id, now)]
+        with concurrent.futures.ThreadPoolExecutor(max(1, min(self.max_workers, len(pending) or 1))) as pool:
+            futures = {pool.submit(self.refresh, user_id): user_id for user_id in pending}
+            for future in concurrent.futures.as_completed(futures):
+                user_id = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    self.errors[user_id] = e
+
+        self._save_cache()
+        self._start_background()
+        return dict(self.errors)
+
+    def _start_background(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._background_loop, daemon=True)
+            self.thread.start()
+
+    def _background_loop(self):
+        """Renueva antes de tiempo los tokens que están por expirar"""
+        while not self.stop_event.wait(30):
+            refreshed = False
+            for user_id in list(self.tokens):
+                if self._expiring(user_id):
+                    try:
+                        self.refresh(user_id)
+                        refreshed = True
+                    except Exception as e:
+                        self.errors[user_id] = e
+            if refreshed:
+                self._save_cache()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread = None
+        self._save_cache()
+
+    # ===== CONSULTAS =====
+
+    def has_token(self, user_id):
+        return user_id in self.tokens
+
+    def is_valid(self, user_id):
+        """Tiene un token que todavía no expiró (sin renovar nada)"""
+        info = self.tokens.get(user_id)
+        return info is not None and info['expires_at'] > time.time()
+
+    def current_token(self, user_id):
+        """Token actual del usuario tal cual está (None si no tiene)"""
+        info = self.tokens.get(user_id)
+        return info['access_token'] if info else None
+
+    def token_for(self, user_id):
+        """Token vigente del usuario (lo renueva si está por expirar)"""
+        if self._expiring(user_id):
+            return self.refresh(user_id)
+        return self.tokens[user_id]['access_token']
+
+    def refresh_after_401(self, stale_token):
+        """
+        Spotify rechazó `stale_token`: renueva una sola vez y retorna el nuevo
+        Si otro hilo ya lo renovó, retorna directamente el token actual
+        Retorna None si el token no pertenece a ningún usuario conocido
+        """
+        user_id = self.token_owner.get(stale_token)
+        if user_id is None:
+            return None
+        current = self.tokens[user_id]['access_token']
+        if current != stale_token:
+            return current
+        self.stats['after_401'] += 1
+        return self.single_flight.do(
+            user_id,
+            lambda: (self._refresh(user_id)
+                     if self.tokens[user_id]['access_token'] == stale_token
+                     else self.tokens[user_id]['access_token'])
+        )
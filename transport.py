@@ -0,0 +1,80 @@
+"""
+Capa de transporte HTTP del creador
+- Un pool de conexiones por host (api.spotify.com, accounts.spotify.com,
+  i.scdn.co, genius.com...) con keep-alive: el handshake TCP/TLS se hace
+  una vez por conexión y no una vez por petición
+- Tamaño de pool configurable (debe acompañar a la concurrencia del motor)
+- HTTP/2 opcional (multiplexa muchas peticiones en una conexión); requiere
+  `pip install httpx[http2]`, si no está instalado se usa HTTP/1.1
+"""
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpTransport:
+    def __init__(self, pool_size=32, http2=False, timeout=30):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+        self.http2_client = None
+        if http2:
+            try:
+                import httpx
+                self.http2_client = httpx.Client(
+                    http2=True,
+                    timeout=timeout,
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size
+                    )
+                )
+            except ImportError:
+                print("⚠️ httpx[http2] no está instalado, se usa HTTP/1.1 con keep-alive")
+
+    def configure_session(self, session):
+        """Aplica el tamaño de pool y keep-alive a una sesión de requests"""
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=0,        # los reintentos los maneja el RequestScheduler
+            pool_block=True       # nunca abrir más conexiones que pool_size
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        return session
+
+    def session_for(self, url):
+        """Sesión (y pool de conexiones) del host de la URL"""
+        host = urlsplit(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = self.configure_session(requests.Session())
+                self.sessions[host] = session
+            return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+
+        if self.http2_client is not None:
+            # httpx usa `content` para cuerpos crudos (str/bytes)
+            data = kwargs.get('data')
+            if isinstance(data, (str, bytes)):
+                kwargs['content'] = kwargs.pop('data')
+            return self.http2_client.request(method, url, **kwargs)
+
+        return self.session_for(url).request(method, url, **kwargs)
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+        if self.http2_client is not None:
+            self.http2_client.close()